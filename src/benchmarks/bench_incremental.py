@@ -0,0 +1,98 @@
+"""Upstream tokens spent re-validating an itinerary after small edits, with and without the segment cache.
+
+Each round edits ``--changed`` random segments of the same itinerary and validates it again. With the segment
+cache only the edited segments (and the neighbours whose keys include them) are sent to the model.
+
+Usage (from src/): python -m benchmarks.bench_incremental --segments 50 --changed 1 2 5 --rounds 20
+"""
+
+import argparse
+import asyncio
+import copy
+import os
+import random
+import re
+import statistics
+from typing import Any
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from benchmarks.stub_upstream import CANNED_OUTPUT, create_stub_app, start_stub_upstream, stub_stats_key
+from benchmarks.synthetic import synthetic_request
+from models.validator_models import TripValidatorRequest
+from services.segment_cache import SegmentCache
+from services.validation_service import ValidationService
+
+INDICES = re.compile(r"whose index is in \[([\d, ]*)\]")
+
+
+def respond(payload: dict[str, Any]) -> dict[str, Any]:
+    """Answers per-segment prompts with one finding per requested index and a trip finding, others canned."""
+    match = INDICES.search(payload["messages"][-1]["content"])
+    if match is None:
+        return {"output_data": CANNED_OUTPUT}
+    findings = [
+        {"index": int(index), "is_valid": True, "validation_score": 0.9, "feedback": "Segment is feasible."}
+        for index in match.group(1).split(",")
+        if index.strip()
+    ]
+    trip = {"is_valid": True, "validation_score": 0.9, "feedback": "Trip is feasible."}
+    return {"output_data": {"trip": trip, "segments": findings}}
+
+
+def edited(request: dict[str, Any], changed: int, rng: random.Random) -> dict[str, Any]:
+    request = copy.deepcopy(request)
+    segments = request["input_data"]["itinerary"]["segments"]
+    for index in rng.sample(range(len(segments)), changed):
+        segments[index]["cost_estimate"]["source_description"] = f"Revised estimate {rng.random():.6f}"
+    return request
+
+
+async def run(segments: int, changed: int, rounds: int, incremental: bool) -> dict[str, float]:
+    stub = create_stub_app(latency=0.01, responder=respond)
+    runner, url = await start_stub_upstream(stub)
+    service = ValidationService()
+    service.openai_api_url = url
+    service.response_cache = None
+    service.segment_cache = SegmentCache(max_entries=100_000, ttl=3600) if incremental else None
+    await service.start()
+    rng = random.Random(0)
+    base = synthetic_request(segments, seed=segments)
+    tokens, recomputed = [], []
+    try:
+        await service.validate_itinerary(TripValidatorRequest.model_validate(base).input_data)
+        for _ in range(rounds):
+            stats = stub[stub_stats_key]
+            before = stats.prompt_tokens
+            client_data = TripValidatorRequest.model_validate(edited(base, changed, rng)).input_data
+            response = await service.validate_itinerary(client_data)
+            tokens.append(stats.prompt_tokens - before)
+            reuse = response.segment_reuse
+            recomputed.append(reuse.recomputed if reuse is not None else segments)
+    finally:
+        await service.close()
+        await runner.cleanup()
+
+    return {"tokens": statistics.fmean(tokens), "recomputed": statistics.fmean(recomputed)}
+
+
+async def main(segments: int, changes: list[int], rounds: int) -> None:
+    print(f"{'changed':>8}  {'mode':<12}{'recomputed':>12}{'prompt tokens':>16}{'saved':>8}")
+    for changed in changes:
+        full = await run(segments, changed, rounds, incremental=False)
+        incremental = await run(segments, changed, rounds, incremental=True)
+        saved = 1 - incremental["tokens"] / full["tokens"]
+        print(f"{changed:>8}  {'full':<12}{full['recomputed']:>12.1f}{full['tokens']:>16.0f}")
+        print(
+            f"{changed:>8}  {'incremental':<12}{incremental['recomputed']:>12.1f}"
+            f"{incremental['tokens']:>16.0f}{saved:>8.0%}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--segments", type=int, default=50)
+    parser.add_argument("--changed", type=int, nargs="+", default=[1, 2, 5])
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.segments, args.changed, args.rounds))
@@ -0,0 +1,65 @@
+"""Request ingestion cost per body: CPU time, peak allocations and retained size.
+
+Compares the previous FastAPI path (``json.loads`` then model validation of the dicts) with single-pass
+``validate_json`` in ``strict`` and ``fast`` ingestion modes. ``--with-prompt`` also builds the compact
+prompt, which reads review ratings, to show what is left of the saving once the service has used the input.
+
+Usage (from src/): python -m benchmarks.bench_ingestion --sizes 10 100 1000
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from benchmarks.synthetic import synthetic_request
+from models.validator_models import TripValidatorRequest
+from parsers.request_parsers import parse_request
+from services.prompt_compaction import PromptCompactor
+
+INGESTERS: dict[str, Callable[[bytes], TripValidatorRequest]] = {
+    "loads+validate": lambda body: TripValidatorRequest.model_validate(json.loads(body)),
+    "strict": lambda body: parse_request(body, "strict"),
+    "fast": lambda body: parse_request(body, "fast"),
+}
+
+
+def measure(ingest: Callable[[bytes], Any], body: bytes, repeat: int) -> tuple[float, float, float]:
+    ingest(body)
+    start = time.process_time()
+    for _ in range(repeat):
+        ingest(body)
+    cpu_ms = (time.process_time() - start) / repeat * 1000
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    result = ingest(body)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    return cpu_ms, (peak - baseline) / 1024, (retained - baseline) / 1024
+
+
+def main(sizes: list[int], reviews: int, pictures: int, with_prompt: bool) -> None:
+    compactor = PromptCompactor(review_mode="summary")
+    print(f"{'segments':>8}  {'ingestion':<16}{'body KiB':>10}{'CPU ms':>10}{'peak KiB':>12}{'retained KiB':>14}")
+    for size in sizes:
+        body = json.dumps(synthetic_request(size, reviews=reviews, pictures=pictures)).encode()
+        repeat = max(3, 2000 // size)
+        for name, ingest in INGESTERS.items():
+            if with_prompt:
+                ingest = lambda body, ingest=ingest: (request := ingest(body), compactor.render(request.input_data))
+            cpu_ms, peak, retained = measure(ingest, body, repeat)
+            print(f"{size:>8}  {name:<16}{len(body) / 1024:>10.1f}{cpu_ms:>10.2f}{peak:>12.1f}{retained:>14.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--reviews", type=int, default=2, help="Reviews per place")
+    parser.add_argument("--pictures", type=int, default=2, help="Pictures per place")
+    parser.add_argument("--with-prompt", action="store_true", help="Also build the compact prompt from the input")
+    args = parser.parse_args()
+    main(args.sizes, args.reviews, args.pictures, args.with_prompt)
@@ -0,0 +1,112 @@
+"""Upstream calls and tokens per itinerary for concurrent small itineraries, with and without micro-batching.
+
+Clients keep ``--concurrency`` validations of 1 to 3 segments in flight. With micro-batching, those arriving
+within the window share one prompt; ``--drop-rate`` makes the stub leave items out of its batched answers so
+the single-call fallback is exercised too.
+
+Usage (from src/): python -m benchmarks.bench_micro_batch --requests 400 --concurrency 1 8 32
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import re
+import time
+from typing import Any
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from benchmarks.stub_upstream import CANNED_OUTPUT, create_stub_app, start_stub_upstream, stub_stats_key
+from benchmarks.synthetic import synthetic_request
+from models.validator_models import TripValidatorRequest
+from services.micro_batcher import MicroBatcher
+from services.validation_service import ValidationService
+
+ITEMS = re.compile(r"^\s*Itinerary (\d+): ", re.MULTILINE)
+
+
+def responder(drop_rate: float, seed: int = 0):
+    rng = random.Random(seed)
+
+    def respond(payload: dict[str, Any]) -> dict[str, Any]:
+        """Answers batched prompts with one item per itinerary (minus dropped ones), anything else as usual."""
+        ids = [int(item_id) for item_id in ITEMS.findall(payload["messages"][-1]["content"])]
+        if not ids:
+            return {"output_data": CANNED_OUTPUT}
+        items = [{"id": item_id, **CANNED_OUTPUT} for item_id in ids if rng.random() >= drop_rate]
+        return {"output_data": {"items": items}}
+
+    return respond
+
+
+async def run(total: int, concurrency: int, batching: bool, drop_rate: float, window: float) -> dict[str, float]:
+    stub = create_stub_app(latency=0.1, responder=responder(drop_rate))
+    runner, url = await start_stub_upstream(stub)
+    service = ValidationService()
+    service.openai_api_url = url
+    service.response_cache = None
+    service.single_flight = None
+    service.micro_batcher = (
+        MicroBatcher(service._validate_entries, service._validate_entry, window=window, max_items=8, token_budget=6000)
+        if batching
+        else None
+    )
+    await service.start()
+    bodies = [
+        TripValidatorRequest.model_validate(synthetic_request(1 + index % 3, seed=index)).input_data
+        for index in range(total)
+    ]
+    queue = list(range(total))
+    latencies: list[float] = []
+
+    async def client() -> None:
+        while queue:
+            client_data = bodies[queue.pop()]
+            start = time.perf_counter()
+            await service.validate_itinerary(client_data)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+    finally:
+        await service.close()
+        await runner.cleanup()
+    elapsed = time.perf_counter() - start
+
+    stats = stub[stub_stats_key]
+    latencies.sort()
+    return {
+        "calls": stats.calls,
+        "tokens": (stats.prompt_tokens + stats.completion_tokens) / total,
+        "throughput": total / elapsed,
+        "p50": latencies[len(latencies) // 2],
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "fallbacks": service.micro_batcher.stats.fallbacks if service.micro_batcher is not None else 0,
+    }
+
+
+async def main(total: int, concurrencies: list[int], drop_rate: float, window: float) -> None:
+    print(
+        f"{'concurrency':>11}  {'mode':<10}{'calls':>7}{'tokens/itin':>13}{'req/s':>8}{'p50 ms':>8}{'p99 ms':>8}"
+        f"{'fallbacks':>11}"
+    )
+    for concurrency in concurrencies:
+        for batching in (False, True):
+            result = await run(total, concurrency, batching, drop_rate, window)
+            print(
+                f"{concurrency:>11}  {'batched' if batching else 'single':<10}{result['calls']:>7}"
+                f"{result['tokens']:>13.0f}{result['throughput']:>8.1f}{result['p50'] * 1000:>8.0f}"
+                f"{result['p99'] * 1000:>8.0f}{result['fallbacks']:>11}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--drop-rate", type=float, default=0.05, help="Share of items missing from batched answers")
+    parser.add_argument("--window", type=float, default=0.02, help="Batching window in seconds")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.drop_rate, args.window))
@@ -0,0 +1,69 @@
+"""Parser throughput and allocations over a corpus of model answers.
+
+Compares the former two-pass ``json.loads`` parse (plus model validation of the resulting dicts) with the
+single-pass ``ValidationParser``, on answers that inline full segments and on answers that reference them.
+
+Usage (from src/): python -m benchmarks.bench_parser --repeat 200
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Sequence
+
+from benchmarks.response_corpus import response_corpus
+from models.trip_models import TripSegment
+from models.validator_models import TripValidatorOutput, TripValidatorRequest
+from parsers.validator_parsers import ValidationParser
+
+
+def two_pass_parse(response: str, segments: Sequence[TripSegment]) -> TripValidatorOutput:
+    """The previous approach: decode the body, split off the fence, decode again, then validate the dicts."""
+    content = json.loads(response)["choices"][0]["message"]["content"]
+    if content.startswith("```"):
+        content = "\n".join(content.split("\n")[1:-1])
+    return TripValidatorOutput.model_validate(json.loads(content)["output_data"])
+
+
+def measure(
+    parse: Callable[[str, Sequence[TripSegment]], Any], corpus: list[tuple[Sequence[TripSegment], str]], repeat: int
+) -> tuple[float, float]:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for segments, response in corpus:
+            parse(response, segments)
+    microseconds = (time.perf_counter() - start) / (repeat * len(corpus)) * 1e6
+
+    peaks = []
+    tracemalloc.start()
+    for segments, response in corpus:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        parse(response, segments)
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+
+    return microseconds, sum(peaks) / len(peaks) / 1024
+
+
+def main(repeat: int) -> None:
+    print(f"{'parser':<14}{'answers':<14}{'µs/response':>14}{'peak KiB':>12}")
+    for style in ("full", "references"):
+        corpus = [
+            (TripValidatorRequest.model_validate(request).input_data.itinerary.segments, response)
+            for request, response in response_corpus(style)
+        ]
+        parsers: dict[str, Callable[[str, Sequence[TripSegment]], Any]] = {"single-pass": ValidationParser.parse}
+        if style == "full":
+            parsers = {"two-pass": two_pass_parse, **parsers}
+        for name, parse in parsers.items():
+            microseconds, peak = measure(parse, corpus, repeat)
+            print(f"{name:<14}{style:<14}{microseconds:>14.1f}{peak:>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    main(args.repeat)
@@ -0,0 +1,42 @@
+"""Microbenchmark of the local pre-validation rules over large synthetic itineraries.
+
+Usage (from src/): python -m benchmarks.bench_prevalidation --sizes 10 100 1000 10000
+"""
+
+import argparse
+import timeit
+from datetime import timedelta
+
+from benchmarks.synthetic import synthetic_request
+from models.validator_models import TripValidatorInput, TripValidatorRequest
+from services.prevalidation import PreValidator, Tolerances
+
+
+def broken_copy(client_data: TripValidatorInput) -> TripValidatorInput:
+    """Same itinerary with the last segment arriving before it departs."""
+    broken = client_data.model_copy(deep=True)
+    last = broken.itinerary.segments[-1]
+    last.arrival_time = last.departure_time - timedelta(minutes=5)
+    return broken
+
+
+def main(sizes: list[int], repeat: int) -> None:
+    pre_validator = PreValidator(
+        mode="pre-filter", tolerances=Tolerances(duration_hours=0.25, cost_absolute=0.01, cost_relative=0.01)
+    )
+    print(f"{'segments':>10}{'valid µs':>14}{'broken µs':>14}{'violations':>12}")
+    for size in sizes:
+        client_data = TripValidatorRequest.model_validate(synthetic_request(size, reviews=0, pictures=0)).input_data
+        broken = broken_copy(client_data)
+        valid_time = min(timeit.repeat(lambda: pre_validator.check(client_data), number=repeat, repeat=5)) / repeat
+        broken_time = min(timeit.repeat(lambda: pre_validator.check(broken), number=repeat, repeat=5)) / repeat
+        violations = ",".join(violation.rule for violation in pre_validator.check(broken))
+        print(f"{size:>10}{valid_time * 1e6:>14.1f}{broken_time * 1e6:>14.1f}  {violations}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main(args.sizes, args.repeat)
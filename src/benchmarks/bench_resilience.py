@@ -0,0 +1,96 @@
+"""Exercises the upstream policy against a fault-injecting local stub.
+
+Scenarios: a flaky upstream (retries), a slow tail (hedging) and an outage (circuit breaker).
+
+Usage (from src/): python -m benchmarks.bench_resilience --requests 300 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from collections import Counter
+from typing import Any
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from fastapi import HTTPException
+
+from benchmarks.stub_upstream import create_stub_app, start_stub_upstream, stub_stats_key
+from services.upstream_policy import CircuitBreaker, UpstreamPolicy
+from services.validation_service import ValidationService
+
+PAYLOAD: dict[str, Any] = {"model": "stub", "messages": [{"role": "user", "content": "ping"}]}
+
+
+def policy(max_attempts: int = 3, hedging: bool = False, breaker: bool = False) -> UpstreamPolicy:
+    return UpstreamPolicy(
+        max_attempts=max_attempts,
+        attempt_timeout=5.0,
+        total_timeout=10.0,
+        backoff_base=0.01,
+        backoff_max=0.1,
+        breaker=CircuitBreaker(failure_threshold=5, reset_timeout=60.0) if breaker else None,
+        hedging_enabled=hedging,
+        hedge_min_samples=20,
+    )
+
+
+async def scenario(
+    name: str, upstream_policy: UpstreamPolicy, total: int, concurrency: int, **stub_options: Any
+) -> None:
+    stub = create_stub_app(seed=0, **stub_options)
+    runner, url = await start_stub_upstream(stub)
+    service = ValidationService()
+    service.openai_api_url = url
+    service.upstream_policy = upstream_policy
+    await service.start()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    outcomes: Counter[str] = Counter()
+
+    async def one() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await service._ai_request_validation(PAYLOAD)
+                outcomes["ok"] += 1
+            except HTTPException as e:
+                outcomes[str(e.status_code)] += 1
+            latencies.append(time.perf_counter() - start)
+
+    try:
+        await asyncio.gather(*(one() for _ in range(total)))
+    finally:
+        await service.close()
+        await runner.cleanup()
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{name:<28}{dict(outcomes)!s:<24}upstream calls {stub[stub_stats_key].calls:>5}"
+        f"   p50 {statistics.median(latencies) * 1000:7.1f} ms   p99 {p99 * 1000:7.1f} ms"
+    )
+
+
+async def main(total: int, concurrency: int) -> None:
+    flaky = {"latency": 0.01, "failure_rate": 0.3, "retry_after": 0.02}
+    await scenario("flaky, no retries", policy(max_attempts=1), total, concurrency, **flaky)
+    await scenario("flaky, 3 attempts", policy(max_attempts=3), total, concurrency, **flaky)
+
+    slow_tail = {"latency": 0.02, "slow_rate": 0.05, "slow_latency": 1.0}
+    await scenario("slow tail, no hedging", policy(), total, concurrency, **slow_tail)
+    await scenario("slow tail, hedging", policy(hedging=True), total, concurrency, **slow_tail)
+
+    outage = {"latency": 0.05, "failure_rate": 1.0}
+    await scenario("outage, no breaker", policy(), total, concurrency, **outage)
+    await scenario("outage, breaker", policy(breaker=True), total, concurrency, **outage)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,111 @@
+"""Throughput and tail latency with one rate-limiting provider alone, and with the model router over three stubs.
+
+Backends: ``fast`` is quick but answers 429 with Retry-After to a share of calls and has a tokens-per-minute
+budget; ``steady`` is slower and pricier but reliable; ``local`` is a free self-hosted server with little
+concurrency that only takes small itineraries. Requests alternate between small and large itineraries.
+
+Usage (from src/): python -m benchmarks.bench_router --requests 600 --concurrency 30
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from collections import Counter
+from typing import Any
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from fastapi import HTTPException
+
+from benchmarks.stub_upstream import create_stub_app, start_stub_upstream
+from core.config import UpstreamBackend
+from services.model_router import Backend, ModelRouter
+from services.upstream_policy import CircuitBreaker, create_upstream_policy
+from services.validation_service import ValidationService
+
+PAYLOAD: dict[str, Any] = {"model": "stub", "messages": [{"role": "user", "content": "x" * 2000}]}
+
+STUBS: dict[str, dict[str, Any]] = {
+    "fast": {"latency": 0.05, "failure_rate": 0.2, "failure_status": 429, "retry_after": 1},
+    "steady": {"latency": 0.15},
+    "local": {"latency": 0.08},
+}
+
+BACKENDS: dict[str, dict[str, Any]] = {
+    "fast": {"tokens_per_minute": 300_000, "prompt_cost": 0.00015, "completion_cost": 0.0006},
+    "steady": {"prompt_cost": 0.0005, "completion_cost": 0.0015},
+    "local": {"max_concurrency": 4, "max_segments": 3, "model": "local-small"},
+}
+
+
+async def scenario(names: list[str], total: int, concurrency: int, urls: dict[str, str]) -> None:
+    service = ValidationService()
+    service.model_router = ModelRouter(
+        [
+            Backend(
+                UpstreamBackend(name=name, url=urls[name], **BACKENDS[name]),
+                api_key="benchmark",
+                latency_window=50,
+                breaker=CircuitBreaker(failure_threshold=5, reset_timeout=5.0),
+            )
+            for name in names
+        ],
+        cost_weight=1000.0,
+        completion_tokens=400,
+    )
+    service.upstream_policy = create_upstream_policy()
+    await service.start()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    outcomes: Counter[str] = Counter()
+
+    async def one(index: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await service._ai_request_validation(PAYLOAD, size=2 if index % 2 else 20)
+                outcomes["ok"] += 1
+            except HTTPException as e:
+                outcomes[str(e.status_code)] += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(index) for index in range(total)))
+    finally:
+        await service.close()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    router = service.model_router.snapshot()
+    calls = ", ".join(f"{name}={stats['calls']}" for name, stats in router.items())
+    cost = sum(stats["cost"] for stats in router.values())
+    print(
+        f"{'+'.join(names):<18}{total / elapsed:>8.1f}{p50 * 1000:>9.0f}{p99 * 1000:>9.0f}"
+        f"{outcomes['ok']:>6}{cost:>9.4f}  {calls}"
+    )
+
+
+async def main(total: int, concurrency: int) -> None:
+    runners, urls = [], {}
+    for name, options in STUBS.items():
+        runner, urls[name] = await start_stub_upstream(create_stub_app(seed=0, **options))
+        runners.append(runner)
+    print(f"{'backends':<18}{'req/s':>8}{'p50 ms':>9}{'p99 ms':>9}{'ok':>6}{'cost $':>9}  calls")
+    try:
+        await scenario(["fast"], total, concurrency, urls)
+        await scenario(["fast", "steady", "local"], total, concurrency, urls)
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=600)
+    parser.add_argument("--concurrency", type=int, default=30)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
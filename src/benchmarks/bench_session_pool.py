@@ -0,0 +1,79 @@
+"""Compares per-call client sessions against the shared, pooled session of ValidationService.
+
+Usage (from src/): python -m benchmarks.bench_session_pool --requests 2000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from typing import Any, Awaitable, Callable
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import aiohttp
+
+from benchmarks.stub_upstream import create_stub_app, start_stub_upstream
+from services.validation_service import ValidationService
+
+PAYLOAD: dict[str, Any] = {"model": "stub", "messages": [{"role": "user", "content": "ping"}]}
+
+
+async def per_call_session(url: str, headers: dict[str, str]) -> str:
+    """The previous behaviour: a fresh session, connector and connection for every upstream call."""
+    async with aiohttp.ClientSession() as session:
+        async with session.post(url, headers=headers, json=PAYLOAD) as response:
+            return await response.text()
+
+
+async def run(call: Callable[[], Awaitable[Any]], total: int, concurrency: int) -> dict[str, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+
+async def main(total: int, concurrency: int, latency: float) -> None:
+    runner, url = await start_stub_upstream(create_stub_app(latency=latency))
+    try:
+        headers = {"Authorization": "Bearer benchmark", "Content-Type": "application/json"}
+        before = await run(lambda: per_call_session(url, headers), total, concurrency)
+
+        service = ValidationService()
+        service.openai_api_url = url
+        await service.start()
+        try:
+            after = await run(lambda: service._ai_request_validation(PAYLOAD), total, concurrency)
+        finally:
+            await service.close()
+    finally:
+        await runner.cleanup()
+
+    print(f"{'mode':<20}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, result in (("per-call session", before), ("shared session", after)):
+        print(f"{name:<20}{result['rps']:>10.1f}{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated upstream latency in seconds")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.latency))
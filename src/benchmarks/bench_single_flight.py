@@ -0,0 +1,52 @@
+"""Fires bursts of identical validations at a local stub upstream and counts the upstream calls they cost.
+
+A share of the waiters is cancelled mid-flight to check that the shared call still completes for the rest.
+
+Usage (from src/): python -m benchmarks.bench_single_flight --duplicates 200 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import os
+from collections import Counter
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from benchmarks.stub_upstream import create_stub_app, start_stub_upstream, stub_stats_key
+from benchmarks.synthetic import synthetic_request
+from models.validator_models import TripValidatorRequest
+from services.validation_service import ValidationService
+
+
+async def main(duplicates: int, latency: float, cancel_every: int) -> None:
+    stub = create_stub_app(latency=latency)
+    runner, url = await start_stub_upstream(stub)
+    service = ValidationService()
+    service.openai_api_url = url
+    service.response_cache = None
+    await service.start()
+    try:
+        client_data = TripValidatorRequest.model_validate(synthetic_request(segments=5)).input_data
+        tasks = [asyncio.create_task(service.validate_itinerary(client_data)) for _ in range(duplicates)]
+        await asyncio.sleep(latency / 2)
+        for task in tasks[::cancel_every]:
+            task.cancel()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        await service.close()
+        await runner.cleanup()
+
+    outcomes = Counter(type(result).__name__ for result in results)
+    print(f"concurrent duplicates: {duplicates}")
+    print(f"upstream calls:        {stub[stub_stats_key].calls}")
+    print(f"single flight:         {service.stats()['single_flight']}")
+    print(f"waiter outcomes:       {dict(outcomes)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--duplicates", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated upstream latency in seconds")
+    parser.add_argument("--cancel-every", type=int, default=10, help="Cancel every n-th waiter mid-flight")
+    args = parser.parse_args()
+    asyncio.run(main(args.duplicates, args.latency, args.cancel_every))
@@ -0,0 +1,73 @@
+"""Measures when each streamed event arrives, compared to the end of the completion, against a local SSE stub.
+
+Usage (from src/): python -m benchmarks.bench_streaming --suggestions 5 --chunk-delay 0.005
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from typing import Any
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from fastapi import HTTPException
+
+from benchmarks.stub_upstream import create_stub_app, start_stub_upstream
+from benchmarks.synthetic import synthetic_request
+from models.validator_models import TripValidatorRequest
+from services.validation_service import ValidationService
+
+
+def canned_output(segments: list[dict[str, Any]], suggestions: int) -> dict[str, Any]:
+    return {
+        "feedback": "The itinerary is feasible, but some stops can be reordered to save time.",
+        "optimization_suggestions": [
+            {
+                "original_segment": segments[index % len(segments)],
+                "suggested_segment": segments[index % len(segments)],
+                "reason": f"Suggestion {index}: leave earlier to avoid traffic.",
+                "estimated_improvement": 10.0,
+            }
+            for index in range(suggestions)
+        ],
+        "is_valid": True,
+        "validation_score": 0.8,
+    }
+
+
+async def main(suggestions: int, chunk_size: int, chunk_delay: float, latency: float) -> None:
+    request = synthetic_request(segments=4, reviews=0, pictures=0)
+    output = canned_output(request["input_data"]["itinerary"]["segments"], suggestions)
+    runner, url = await start_stub_upstream(
+        create_stub_app(latency=latency, output=output, chunk_size=chunk_size, chunk_delay=chunk_delay)
+    )
+    service = ValidationService()
+    service.openai_api_url = url
+    service.response_cache = None
+    await service.start()
+    client_data = TripValidatorRequest.model_validate(request).input_data
+    timeline: list[tuple[str, float]] = []
+    try:
+        start = time.perf_counter()
+        try:
+            async for event in service.validate_itinerary_stream(client_data):
+                timeline.append((event.event, time.perf_counter() - start))
+        except HTTPException as e:
+            timeline.append((f"error {e.status_code}", time.perf_counter() - start))
+    finally:
+        await service.close()
+        await runner.cleanup()
+
+    for name, elapsed in timeline:
+        print(f"{name:<20}{elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--suggestions", type=int, default=5)
+    parser.add_argument("--chunk-size", type=int, default=16, help="Characters per streamed chunk")
+    parser.add_argument("--chunk-delay", type=float, default=0.005, help="Seconds between streamed chunks")
+    parser.add_argument("--latency", type=float, default=0.1, help="Seconds before the first chunk")
+    args = parser.parse_args()
+    asyncio.run(main(args.suggestions, args.chunk_size, args.chunk_delay, args.latency))
@@ -0,0 +1,284 @@
+"""Drives the real service under fixed concurrency against a local chat completions stub.
+
+The app runs under uvicorn in a child process, so its CPU time and peak RSS are read on their own from
+/proc (Linux); elsewhere those two figures are reported as null. ``--workers N`` serves it with serve.py
+instead, and sums those figures over the workers. The response cache and single-flight are
+off by default so every request takes the full path; pass ``--env KEY=VALUE`` to override any setting.
+Results are printed, or written with ``--output``, as JSON meant to be diffed across commits.
+
+Usage (from src/):
+    python -m benchmarks.loadtest --segments 1 10 100 --concurrency 1 16 64 --requests 200 --output run.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+import aiohttp
+
+from benchmarks.stub_upstream import create_stub_app, start_stub_upstream, stub_stats_key
+from benchmarks.synthetic import synthetic_request
+from models.validator_models import TripValidatorOutput
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_ENV = {"CACHE_ENABLED": "false", "SINGLE_FLIGHT_ENABLED": "false"}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class ProcessProbe:
+    """Reads CPU time and peak RSS of a process and its children from /proc; None where /proc is missing."""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+    def pids(self) -> list[int]:
+        try:
+            children = Path(f"/proc/{self.pid}/task/{self.pid}/children").read_text().split()
+        except OSError:
+            children = []
+        return [self.pid, *(int(child) for child in children)]
+
+    def cpu_seconds(self) -> Optional[float]:
+        total = 0.0
+        for pid in self.pids():
+            try:
+                fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+            except OSError:
+                return None
+            # utime and stime are fields 14 and 15 of /proc/<pid>/stat, counted after the command name.
+            total += (int(fields[11]) + int(fields[12])) / self.ticks
+        return total
+
+    def peak_rss_mb(self) -> Optional[float]:
+        total = 0.0
+        for pid in self.pids():
+            try:
+                status = Path(f"/proc/{pid}/status").read_text()
+            except OSError:
+                return None
+            total += next(
+                (int(line.split()[1]) / 1024 for line in status.splitlines() if line.startswith("VmHWM:")), 0.0
+            )
+        return total
+
+
+async def start_server(
+    upstream_url: str, overrides: dict[str, str], workers: int, state_dir: str
+) -> tuple[subprocess.Popen, str]:
+    port = free_port()
+    env = {**os.environ, "OPENAI_API_KEY": "benchmark", **DEFAULT_ENV, **overrides, "OPENAI_API_URL": upstream_url}
+    command = [sys.executable, "-m", "uvicorn", "server:app"]
+    if workers:
+        command = [sys.executable, "serve.py", "--workers", str(workers)]
+        env.setdefault("CACHE_SQLITE_PATH", os.path.join(state_dir, "cache.sqlite3"))
+        env.setdefault("SHARED_STATE_PATH", os.path.join(state_dir, "shared.sqlite3"))
+    process = subprocess.Popen(
+        command + ["--host", "127.0.0.1", "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        cwd=SRC_DIR,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    async with aiohttp.ClientSession() as session:
+        for _ in range(200):
+            if process.poll() is not None:
+                raise RuntimeError(f"Server exited with status {process.returncode}")
+            try:
+                async with session.get(f"{base_url}/stats") as response:
+                    if response.status == 200:
+                        return process, base_url
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.05)
+    process.terminate()
+    raise RuntimeError("Server did not become ready")
+
+
+def percentile(ordered: list[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def drive(
+    session: aiohttp.ClientSession, url: str, bodies: list[bytes], total: int, concurrency: int
+) -> tuple[list[float], Counter[str], float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    statuses: Counter[str] = Counter()
+    headers = {"Content-Type": "application/json"}
+
+    async def one(index: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                async with session.post(url, data=bodies[index % len(bodies)], headers=headers) as response:
+                    await response.read()
+                    statuses[str(response.status)] += 1
+            except aiohttp.ClientError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(total)))
+    return latencies, statuses, time.perf_counter() - start
+
+
+async def run_level(
+    base_url: str,
+    probe: ProcessProbe,
+    stub: Any,
+    bodies: list[bytes],
+    total: int,
+    concurrency: int,
+    warmup: int,
+) -> dict[str, Any]:
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        if warmup:
+            await drive(session, f"{base_url}/route", bodies, warmup, concurrency)
+        calls_before = stub[stub_stats_key].calls
+        tokens_before = stub[stub_stats_key].prompt_tokens
+        cpu_before = probe.cpu_seconds()
+        latencies, statuses, elapsed = await drive(session, f"{base_url}/route", bodies, total, concurrency)
+        cpu_after = probe.cpu_seconds()
+
+    latencies.sort()
+    cpu = cpu_after - cpu_before if cpu_before is not None and cpu_after is not None else None
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "statuses": dict(statuses),
+        "throughput_rps": round(total / elapsed, 2),
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 3),
+            "p50": round(percentile(latencies, 0.50) * 1000, 3),
+            "p90": round(percentile(latencies, 0.90) * 1000, 3),
+            "p99": round(percentile(latencies, 0.99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3),
+        },
+        "cpu_ms_per_request": round(cpu * 1000 / total, 3) if cpu is not None else None,
+        "peak_rss_mb": round(rss, 1) if (rss := probe.peak_rss_mb()) is not None else None,
+        "upstream_calls": stub[stub_stats_key].calls - calls_before,
+        "upstream_prompt_tokens": stub[stub_stats_key].prompt_tokens - tokens_before,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SRC_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_payloads(path: Optional[str]) -> Optional[list[dict[str, Any]]]:
+    """Reads canned answers (one object or a list), checking each is a valid TripValidatorOutput."""
+    if path is None:
+        return None
+    loaded = json.loads(Path(path).read_text())
+    answers = loaded if isinstance(loaded, list) else [loaded]
+    for answer in answers:
+        TripValidatorOutput.model_validate(answer)
+    return answers
+
+
+async def main(args: argparse.Namespace) -> dict[str, Any]:
+    overrides = dict(item.split("=", 1) for item in args.env)
+    stub = create_stub_app(
+        latency=args.latency,
+        latency_distribution=args.latency_distribution,
+        latency_spread=args.latency_spread,
+        failure_rate=args.error_rate,
+        output=load_payloads(args.payloads),
+        seed=0,
+    )
+    runner, upstream_url = await start_stub_upstream(stub)
+    state_dir = tempfile.TemporaryDirectory()
+    process, base_url = await start_server(upstream_url, overrides, args.workers, state_dir.name)
+    probe = ProcessProbe(process.pid)
+    results = []
+    try:
+        for segments in args.segments:
+            bodies = [
+                json.dumps(synthetic_request(segments, args.reviews, args.pictures, seed=seed)).encode()
+                for seed in range(args.distinct)
+            ]
+            for concurrency in args.concurrency:
+                result = await run_level(base_url, probe, stub, bodies, args.requests, concurrency, args.warmup)
+                result = {"segments": segments, "body_bytes": len(bodies[0]), **result}
+                results.append(result)
+                print(
+                    f"segments {segments:>5}  concurrency {concurrency:>4}  {result['throughput_rps']:>9.1f} req/s"
+                    f"  p50 {result['latency_ms']['p50']:>8.1f} ms  p99 {result['latency_ms']['p99']:>8.1f} ms"
+                    f"  cpu/req {result['cpu_ms_per_request']} ms  rss {result['peak_rss_mb']} MB",
+                    file=sys.stderr,
+                )
+    finally:
+        process.terminate()
+        process.wait()
+        await runner.cleanup()
+        state_dir.cleanup()
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            "reviews": args.reviews,
+            "pictures": args.pictures,
+            "distinct_inputs": args.distinct,
+            "warmup": args.warmup,
+            "latency": args.latency,
+            "latency_distribution": args.latency_distribution,
+            "latency_spread": args.latency_spread,
+            "error_rate": args.error_rate,
+            "workers": args.workers,
+            "env": {**DEFAULT_ENV, **overrides},
+        },
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--reviews", type=int, default=2, help="Reviews per place")
+    parser.add_argument("--pictures", type=int, default=2, help="Pictures per place")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per level")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests before each level")
+    parser.add_argument("--distinct", type=int, default=20, help="Distinct itineraries cycled through per size")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mean upstream latency in seconds")
+    parser.add_argument(
+        "--latency-distribution", choices=["fixed", "uniform", "exponential", "lognormal"], default="fixed"
+    )
+    parser.add_argument("--latency-spread", type=float, default=0.0, help="Half-width (uniform) or sigma (lognormal)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of upstream calls answered with 503")
+    parser.add_argument("--payloads", help="JSON file with a canned TripValidatorOutput or a list of them")
+    parser.add_argument("--workers", type=int, default=0, help="Serve with serve.py and this many workers")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Setting for the server")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = json.dumps(asyncio.run(main(args)), indent=2)
+    if args.output:
+        Path(args.output).write_text(report + "\n")
+    else:
+        print(report)
@@ -0,0 +1,59 @@
+import json
+from typing import Any, Literal
+
+from benchmarks.stub_upstream import completion_body
+from benchmarks.synthetic import synthetic_request
+
+SegmentStyle = Literal["full", "references"]
+
+
+def _suggested_compact(segment: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "from": segment["start_point"]["place_id"],
+        "to": segment["end_point"]["place_id"],
+        "departure": segment["departure_time"],
+        "arrival": segment["arrival_time"],
+        "mode": "PUBLIC_TRANSPORT",
+        "cost": 4.5,
+    }
+
+
+def model_answer(segments: list[dict[str, Any]], suggestions: int, style: SegmentStyle) -> dict[str, Any]:
+    items = []
+    for index in range(suggestions):
+        position = index % len(segments)
+        segment = segments[position]
+        items.append(
+            {
+                "original_segment": position if style == "references" else segment,
+                "suggested_segment": _suggested_compact(segment) if style == "references" else segment,
+                "reason": "Public transport is cheaper at this time of day.",
+                "estimated_improvement": 12.5,
+            }
+        )
+    return {
+        "output_data": {
+            "is_valid": True,
+            "validation_score": 0.82,
+            "feedback": "The itinerary is feasible; a few segments can be cheaper.",
+            "optimization_suggestions": items,
+        }
+    }
+
+
+def response_corpus(
+    style: SegmentStyle, sizes: tuple[int, ...] = (1, 3, 10), suggestions: tuple[int, ...] = (0, 1, 5)
+) -> list[tuple[dict[str, Any], str]]:
+    """Completion bodies shaped like recorded model answers, paired with the request they answer.
+
+    Answers alternate between fenced and bare JSON, as the model does.
+    """
+    corpus = []
+    for size in sizes:
+        request = synthetic_request(size, reviews=2, pictures=2, seed=size)
+        segments = request["input_data"]["itinerary"]["segments"]
+        for count in suggestions:
+            answer = json.dumps(model_answer(segments, count, style), indent=2)
+            for content in (f"```json\n{answer}\n```", answer):
+                corpus.append((request, json.dumps(completion_body(content))))
+    return corpus
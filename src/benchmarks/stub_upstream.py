@@ -0,0 +1,159 @@
+import asyncio
+import json
+import math
+import random
+from dataclasses import dataclass
+from typing import Any, Callable, Literal, Optional, Union
+
+from aiohttp import web
+
+from services.prompt_compaction import estimate_tokens
+
+LatencyDistribution = Literal["fixed", "uniform", "exponential", "lognormal"]
+
+CANNED_OUTPUT: dict[str, Any] = {
+    "is_valid": True,
+    "validation_score": 0.9,
+    "feedback": "The itinerary is feasible.",
+    "optimization_suggestions": [],
+}
+
+
+@dataclass
+class StubStats:
+    calls: int = 0
+    failures: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+stub_stats_key = web.AppKey("stub_stats", StubStats)
+
+
+def completion_body(content: str, prompt_tokens: int = 0) -> dict[str, Any]:
+    completion_tokens = estimate_tokens(content)
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "model": "stub",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def chunk_body(delta: str) -> dict[str, Any]:
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion.chunk",
+        "model": "stub",
+        "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}],
+    }
+
+
+def usage_chunk_body(usage: dict[str, Any]) -> dict[str, Any]:
+    return {"id": "chatcmpl-stub", "object": "chat.completion.chunk", "model": "stub", "choices": [], "usage": usage}
+
+
+def sample_latency(rng: random.Random, distribution: LatencyDistribution, latency: float, spread: float) -> float:
+    """Draws one response delay; ``latency`` is the mean (the median for lognormal), ``spread`` its dispersion."""
+    if not latency or distribution == "fixed":
+        return latency
+    if distribution == "uniform":
+        return max(0.0, rng.uniform(latency - spread, latency + spread))
+    if distribution == "exponential":
+        return rng.expovariate(1 / latency)
+    return rng.lognormvariate(math.log(latency), spread)
+
+
+def prompt_tokens(payload: dict[str, Any]) -> int:
+    return sum(estimate_tokens(str(message.get("content", ""))) for message in payload.get("messages", []))
+
+
+def create_stub_app(
+    latency: float = 0.0,
+    output: Optional[Union[dict[str, Any], list[dict[str, Any]]]] = None,
+    latency_distribution: LatencyDistribution = "fixed",
+    latency_spread: float = 0.0,
+    chunk_size: int = 16,
+    chunk_delay: float = 0.0,
+    failure_rate: float = 0.0,
+    fail_first: int = 0,
+    failure_status: int = 503,
+    retry_after: Optional[float] = None,
+    slow_rate: float = 0.0,
+    slow_latency: float = 0.0,
+    seed: Optional[int] = None,
+    responder: Optional[Callable[[dict[str, Any]], dict[str, Any]]] = None,
+) -> web.Application:
+    """Local stand-in for the chat completions endpoint returning a canned, fenced JSON answer.
+
+    ``output`` is one canned answer or a list picked from at random. Delays are drawn from
+    ``latency_distribution`` (see ``sample_latency``) and token usage is estimated from the prompt and answer.
+    ``responder``, when given, builds the answer from the request payload instead.
+
+    Requests with ``"stream": true`` are answered as server-sent events, ``chunk_size`` characters every
+    ``chunk_delay`` seconds after the initial ``latency``, followed by a usage chunk when the request sets
+    ``stream_options.include_usage``. Faults are injected at random: ``failure_rate`` of the
+    requests fail with ``failure_status`` (and an optional Retry-After), ``slow_rate`` of them take ``slow_latency``.
+    The first ``fail_first`` requests always fail.
+    """
+    outputs = output if isinstance(output, list) else [CANNED_OUTPUT if output is None else output]
+    contents = [f"```json\n{json.dumps(answer)}\n```" for answer in outputs]
+    rng = random.Random(seed)
+
+    async def chat_completions(request: web.Request) -> web.StreamResponse:
+        payload = await request.json()
+        stats.calls += 1
+        if slow_rate and rng.random() < slow_rate:
+            delay = slow_latency
+        else:
+            delay = sample_latency(rng, latency_distribution, latency, latency_spread)
+        if delay:
+            await asyncio.sleep(delay)
+        if stats.calls <= fail_first or (failure_rate and rng.random() < failure_rate):
+            stats.failures += 1
+            headers = {"Retry-After": str(retry_after)} if retry_after is not None else None
+            return web.json_response({"error": {"message": "injected fault"}}, status=failure_status, headers=headers)
+        if responder is not None:
+            content = f"```json\n{json.dumps(responder(payload))}\n```"
+        else:
+            content = contents[0] if len(contents) == 1 else rng.choice(contents)
+        body = completion_body(content, prompt_tokens(payload))
+        stats.prompt_tokens += body["usage"]["prompt_tokens"]
+        stats.completion_tokens += body["usage"]["completion_tokens"]
+        if not payload.get("stream"):
+            return web.Response(text=json.dumps(body), content_type="application/json")
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for start in range(0, len(content), chunk_size):
+            if chunk_delay:
+                await asyncio.sleep(chunk_delay)
+            await response.write(f"data: {json.dumps(chunk_body(content[start : start + chunk_size]))}\n\n".encode())
+        if (payload.get("stream_options") or {}).get("include_usage"):
+            await response.write(f"data: {json.dumps(usage_chunk_body(body['usage']))}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    stats = StubStats()
+    app = web.Application()
+    app[stub_stats_key] = stats
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    return app
+
+
+async def start_stub_upstream(
+    app: web.Application, host: str = "127.0.0.1", port: int = 0
+) -> tuple[web.AppRunner, str]:
+    """Starts the stub on a free port and returns its runner and chat completions URL."""
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]  # type: ignore
+    return runner, f"http://{host}:{bound_port}/v1/chat/completions"
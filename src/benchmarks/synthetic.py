@@ -0,0 +1,104 @@
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+CURRENCY = {"code": "BRL", "symbol": "R$", "name": "Real"}
+ORIGIN = (-16.6869, -49.2648)
+
+
+def _place(
+    index: int, rng: random.Random, latitude: float, longitude: float, reviews: int, pictures: int
+) -> dict[str, Any]:
+    return {
+        "place_id": f"place-{index}",
+        "name": f"Place {index}",
+        "location": {
+            "address": f"Rua {index}, Goiânia - GO, Brasil",
+            "plus_code": None,
+            "coordinates": {"latitude": latitude, "longitude": longitude},
+        },
+        "types": ["tourist_attraction", "park"],
+        "reviews": [
+            {
+                "author": {
+                    "name": f"Author {index}-{review}",
+                    "profile_url": f"https://example.com/profile/{index}/{review}",
+                    "email": f"author{index}.{review}@example.com",
+                },
+                "rating": round(rng.uniform(1, 5), 1),
+                "text": "Great place to visit, " * rng.randint(5, 30),
+                "language": "pt",
+                "publication_time": "2024-09-07T12:15:32.370Z",
+            }
+            for review in range(reviews)
+        ],
+        "pictures": [
+            {
+                "url": f"https://example.com/pictures/{index}/{picture}.jpg",
+                "width": 800,
+                "height": 600,
+                "description": f"Picture {picture} of place {index}",
+            }
+            for picture in range(pictures)
+        ],
+        "ratings_total": rng.randint(0, 20000),
+    }
+
+
+def _cost(amount: float) -> dict[str, Any]:
+    return {
+        "source_urls": ["https://example.com/fuel-prices"],
+        "source_description": "Official Petrobrás website.",
+        "estimated_cost": round(amount, 2),
+        "currency": CURRENCY,
+        "cost_details": {
+            "base_cost": round(amount, 2),
+            "time_cost": 0.0,
+            "traffic_adjustment": 1.0,
+            "fuel_price": 6.0,
+            "fuel_consumption": 0.1,
+        },
+    }
+
+
+def synthetic_request(segments: int, reviews: int = 2, pictures: int = 2, seed: int = 0) -> dict[str, Any]:
+    """Builds a feasible TripValidatorRequest payload: chronological CAR segments between nearby places."""
+    rng = random.Random(seed)
+    latitude, longitude = ORIGIN
+    places = []
+    for index in range(segments + 1):
+        places.append(_place(index, rng, latitude, longitude, reviews, pictures))
+        latitude += rng.uniform(-0.1, 0.1)
+        longitude += rng.uniform(-0.1, 0.1)
+
+    start = datetime(2024, 9, 7, 8, tzinfo=timezone.utc)
+    clock = start
+    trip_segments = []
+    total_cost = 0.0
+    for index in range(segments):
+        cost = rng.uniform(5, 50)
+        total_cost += round(cost, 2)
+        arrival = clock + timedelta(minutes=rng.randint(15, 40))
+        trip_segments.append(
+            {
+                "start_point": places[index],
+                "end_point": places[index + 1],
+                "departure_time": clock.isoformat(),
+                "arrival_time": arrival.isoformat(),
+                "cost_estimate": _cost(cost),
+                "transportation_method": "CAR",
+            }
+        )
+        clock = arrival + timedelta(minutes=rng.randint(30, 120))
+
+    last_arrival = datetime.fromisoformat(trip_segments[-1]["arrival_time"]) if trip_segments else start
+    return {
+        "input_data": {
+            "itinerary": {
+                "segments": trip_segments,
+                "total_cost": _cost(total_cost),
+                "total_duration": round((last_arrival - start).total_seconds() / 3600, 4),
+            },
+            "user_preferences": [{"category": "park", "weight": 0.8}, {"category": "museum", "weight": 0.4}],
+        }
+    }
@@ -0,0 +1,5 @@
+"""Test setup: src/ is the import root (as under uvicorn) and the service never needs a real API key."""
+
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
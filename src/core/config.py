@@ -1,12 +1,269 @@
 import os
+from typing import Annotated, List, Literal, Optional
 
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 dotenv = os.path.join(os.path.dirname(__file__), "..", ".env")
 
 
+class UpstreamBackend(BaseModel):
+    """One OpenAI-compatible chat completions backend the model router can dispatch to."""
+
+    name: Annotated[str, Field(description="Label used in /stats and logs", examples=["openai-primary"])]
+    url: Annotated[str, Field(description="Chat completions endpoint")]
+    api_key: Annotated[Optional[str], Field(default=None, description="Bearer token, OPENAI_API_KEY when omitted")]
+    model: Annotated[Optional[str], Field(default=None, description="Model requested, OPENAI_MODEL when omitted")]
+    max_concurrency: Annotated[int, Field(default=16, gt=0, description="Requests in flight at once")]
+    tokens_per_minute: Annotated[
+        Optional[int], Field(default=None, gt=0, description="Token budget per minute, unlimited when omitted")
+    ]
+    prompt_cost: Annotated[float, Field(default=0.0, ge=0, description="US dollars per 1000 prompt tokens")]
+    completion_cost: Annotated[float, Field(default=0.0, ge=0, description="US dollars per 1000 completion tokens")]
+    max_segments: Annotated[
+        Optional[int], Field(default=None, gt=0, description="Largest itinerary (in segments) sent to this backend")
+    ]
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=dotenv, env_file_encoding="utf-8", extra="allow")
 
+    openai_api_key: Annotated[Optional[str], Field(default=None, description="API key for the OpenAI API")]
+    openai_api_url: Annotated[
+        str,
+        Field(
+            default="https://api.openai.com/v1/chat/completions", description="Chat completions endpoint of the model"
+        ),
+    ]
+    openai_model: Annotated[
+        str, Field(default="gpt-4o-mini", description="Model requested, unless a routed backend names its own")
+    ]
+
+    # Upstream HTTP connection pool
+    http_connection_limit: Annotated[
+        int, Field(default=100, ge=0, description="Maximum simultaneous connections (0 means unlimited)")
+    ]
+    http_connection_limit_per_host: Annotated[
+        int, Field(default=50, ge=0, description="Maximum simultaneous connections per host (0 means unlimited)")
+    ]
+    http_keepalive_timeout: Annotated[
+        float, Field(default=30.0, gt=0, description="Seconds an idle connection is kept open for reuse")
+    ]
+    http_dns_cache_ttl: Annotated[int, Field(default=300, ge=0, description="Seconds DNS lookups are cached")]
+    http_total_timeout: Annotated[
+        float, Field(default=120.0, gt=0, description="Total timeout in seconds for one upstream request")
+    ]
+    http_connect_timeout: Annotated[
+        float, Field(default=10.0, gt=0, description="Timeout in seconds to acquire and open a connection")
+    ]
+    http_read_timeout: Annotated[
+        float, Field(default=60.0, gt=0, description="Timeout in seconds between reads of the upstream response")
+    ]
+
+    # Response cache
+    cache_enabled: Annotated[bool, Field(default=True, description="Serve identical inputs from the response cache")]
+    cache_max_entries: Annotated[
+        int, Field(default=1024, gt=0, description="Maximum entries held by the in-process cache tier")
+    ]
+    cache_ttl: Annotated[float, Field(default=3600.0, gt=0, description="Seconds a cached response stays valid")]
+    cache_backend: Annotated[
+        Literal["none", "sqlite"], Field(default="none", description="Second cache tier consulted on in-process misses")
+    ]
+    cache_sqlite_path: Annotated[
+        str, Field(default="tripvalidator_cache.sqlite3", description="File used by the SQLite cache tier")
+    ]
+    cache_sqlite_max_entries: Annotated[
+        int, Field(default=100000, gt=0, description="Rows kept by the SQLite cache tier after each purge")
+    ]
+    cache_sqlite_purge_interval: Annotated[
+        float, Field(default=300.0, ge=0, description="Seconds between purges of expired SQLite cache rows")
+    ]
+    single_flight_enabled: Annotated[
+        bool, Field(default=True, description="Coalesce concurrent validations of identical inputs into one call")
+    ]
+
+    # Batch validation
+    batch_concurrency: Annotated[
+        int, Field(default=8, gt=0, description="Validations of one batch allowed to run concurrently")
+    ]
+    batch_max_items: Annotated[int, Field(default=500, gt=0, description="Maximum number of requests per batch")]
+
+    # Local pre-validation
+    prevalidation_mode: Annotated[
+        Literal["off", "pre-filter", "local-only"],
+        Field(default="pre-filter", description="Run the local rule engine before, or instead of, the model"),
+    ]
+    prevalidation_duration_tolerance: Annotated[
+        float, Field(default=0.25, ge=0, description="Hours total_duration may differ from the segments span")
+    ]
+    prevalidation_cost_tolerance: Annotated[
+        float, Field(default=0.01, ge=0, description="Absolute difference allowed between total and segment costs")
+    ]
+    prevalidation_cost_relative_tolerance: Annotated[
+        float, Field(default=0.01, ge=0, description="Relative difference allowed between total and segment costs")
+    ]
+
+    # Geographic feasibility
+    feasibility_enabled: Annotated[
+        bool, Field(default=True, description="Check segment distances and implied speeds against per-mode limits")
+    ]
+    feasibility_enrich_prompt: Annotated[
+        bool, Field(default=True, description="Send computed segment distances and speeds along with the prompt")
+    ]
+    feasibility_max_speed_walking: Annotated[float, Field(default=8.0, gt=0, description="Walking limit in km/h")]
+    feasibility_max_speed_bicycle: Annotated[float, Field(default=40.0, gt=0, description="Bicycle limit in km/h")]
+    feasibility_max_speed_public_transport: Annotated[
+        float, Field(default=150.0, gt=0, description="Public transport limit in km/h")
+    ]
+    feasibility_max_speed_car: Annotated[float, Field(default=180.0, gt=0, description="Car limit in km/h")]
+
+    # Upstream resilience
+    upstream_max_attempts: Annotated[int, Field(default=3, ge=1, description="Attempts per upstream call")]
+    upstream_attempt_timeout: Annotated[
+        float, Field(default=30.0, gt=0, description="Deadline in seconds for a single upstream attempt")
+    ]
+    upstream_total_timeout: Annotated[
+        float, Field(default=90.0, gt=0, description="Deadline in seconds for an upstream call, retries included")
+    ]
+    upstream_backoff_base: Annotated[
+        float, Field(default=0.5, gt=0, description="Base delay in seconds of the jittered exponential backoff")
+    ]
+    upstream_backoff_max: Annotated[
+        float, Field(default=8.0, gt=0, description="Maximum delay in seconds between attempts, Retry-After included")
+    ]
+    circuit_breaker_enabled: Annotated[bool, Field(default=True, description="Fail fast while the upstream is down")]
+    circuit_breaker_failure_threshold: Annotated[
+        int, Field(default=5, ge=1, description="Consecutive upstream failures that open the circuit")
+    ]
+    circuit_breaker_reset_timeout: Annotated[
+        float, Field(default=30.0, gt=0, description="Seconds the circuit stays open before a probe is let through")
+    ]
+    circuit_breaker_fallback: Annotated[
+        Literal["fail", "local-only"],
+        Field(default="fail", description="Fail with 503 or validate locally while the circuit is open"),
+    ]
+    upstream_hedging_enabled: Annotated[
+        bool, Field(default=False, description="Send a duplicate request when an attempt outlives the p95 latency")
+    ]
+    upstream_hedge_min_samples: Annotated[
+        int, Field(default=20, ge=1, description="Latency samples required before hedging starts")
+    ]
+
+    # Model routing
+    upstream_backends: Annotated[
+        List[UpstreamBackend],
+        Field(
+            default_factory=list,
+            description="JSON list of backends to route between; OPENAI_API_URL alone is used when empty",
+        ),
+    ]
+    router_latency_window: Annotated[
+        int, Field(default=50, ge=1, description="Recent calls per backend behind its latency and error rate")
+    ]
+    router_cost_weight: Annotated[
+        float, Field(default=1000.0, ge=0, description="Seconds of expected latency worth one US dollar of cost")
+    ]
+    router_completion_tokens: Annotated[
+        int, Field(default=400, ge=0, description="Completion tokens assumed per call for rate limits and cost")
+    ]
+
+    # Prompt compaction
+    prompt_compaction_enabled: Annotated[
+        bool, Field(default=True, description="Send a compact JSON projection of the itinerary instead of a full dump")
+    ]
+    prompt_review_mode: Annotated[
+        Literal["drop", "summary"],
+        Field(default="summary", description="Drop place reviews or summarize them as count and average rating"),
+    ]
+    prompt_stats_enabled: Annotated[
+        bool,
+        Field(default=False, description="Also serialize the full itinerary to report prompt_stats (for benchmarks)"),
+    ]
+
+    # Incremental re-validation
+    segment_cache_enabled: Annotated[
+        bool,
+        Field(default=False, description="Cache findings per segment and send only changed segments to the model"),
+    ]
+    segment_cache_max_entries: Annotated[
+        int, Field(default=16384, gt=0, description="Maximum segment findings held in memory")
+    ]
+    segment_cache_ttl: Annotated[
+        float, Field(default=3600.0, gt=0, description="Seconds a segment finding stays valid")
+    ]
+
+    # Micro-batching
+    micro_batch_enabled: Annotated[
+        bool, Field(default=False, description="Validate concurrent small itineraries together in one prompt")
+    ]
+    micro_batch_max_segments: Annotated[
+        int, Field(default=3, ge=1, description="Largest itinerary, in segments, that is batched")
+    ]
+    micro_batch_window: Annotated[
+        float, Field(default=0.02, gt=0, description="Seconds a batch waits for more itineraries before it is sent")
+    ]
+    micro_batch_max_items: Annotated[int, Field(default=8, ge=2, description="Itineraries per batched prompt")]
+    micro_batch_token_budget: Annotated[
+        int, Field(default=6000, gt=0, description="Estimated itinerary tokens per batched prompt")
+    ]
+
+    # Async jobs
+    jobs_enabled: Annotated[bool, Field(default=False, description="Serve the /jobs API backed by a durable queue")]
+    jobs_sqlite_path: Annotated[
+        str, Field(default="tripvalidator_jobs.sqlite3", description="SQLite file holding the job queue")
+    ]
+    jobs_workers: Annotated[int, Field(default=4, gt=0, description="Jobs validated concurrently by each process")]
+    jobs_max_queued: Annotated[
+        int, Field(default=1000, gt=0, description="Queued jobs beyond which new jobs are refused with 429")
+    ]
+    jobs_max_attempts: Annotated[
+        int, Field(default=3, ge=1, description="Times a job is started before one that keeps crashing is failed")
+    ]
+    jobs_lease_timeout: Annotated[
+        float, Field(default=300.0, gt=0, description="Seconds after which a running job is presumed lost and rerun")
+    ]
+    jobs_retention: Annotated[
+        float, Field(default=86400.0, gt=0, description="Seconds finished jobs are kept for GET /jobs/{id}")
+    ]
+    jobs_webhooks_enabled: Annotated[
+        bool, Field(default=False, description="Accept webhook_url on POST /jobs and post finished jobs to it")
+    ]
+    jobs_webhook_allowed_hosts: Annotated[
+        List[str],
+        Field(
+            default_factory=list,
+            description="JSON list of hosts webhooks may be sent to; an entry starting with a dot allows subdomains",
+        ),
+    ]
+
+    # Multi-process serving
+    shared_state_path: Annotated[
+        Optional[str],
+        Field(
+            default=None,
+            description="SQLite file through which worker processes share single-flight leases and rate limits",
+        ),
+    ]
+    shared_flight_lease: Annotated[
+        float, Field(default=120.0, gt=0, description="Seconds a worker may lead a shared call before others take over")
+    ]
+    shared_flight_poll_interval: Annotated[
+        float, Field(default=0.05, gt=0, description="Seconds between checks of a call led by another worker")
+    ]
+
+    # Request ingestion
+    ingestion_mode: Annotated[
+        Literal["strict", "fast"],
+        Field(
+            default="strict",
+            description="Validate request bodies fully, or defer reviews and pictures and reuse repeated places",
+        ),
+    ]
+
+    # Instrumentation
+    metrics_enabled: Annotated[
+        bool, Field(default=True, description="Record per-stage timings and counters, exposed on /metrics")
+    ]
+
 
 settings = Settings()
@@ -0,0 +1,30 @@
+from typing import Optional
+
+import aiohttp
+from aiohttp.abc import AbstractResolver
+
+from core.config import Settings, settings
+
+
+def create_client_session(
+    config: Settings = settings, resolver: Optional[AbstractResolver] = None
+) -> aiohttp.ClientSession:
+    """Creates a long-lived client session backed by a pooled, keep-alive connector.
+
+    Must be called from within a running event loop. ``resolver`` replaces aiohttp's default DNS resolver.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=config.http_connection_limit,
+        limit_per_host=config.http_connection_limit_per_host,
+        keepalive_timeout=config.http_keepalive_timeout,
+        ttl_dns_cache=config.http_dns_cache_ttl,
+        use_dns_cache=True,
+        resolver=resolver,
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=config.http_total_timeout,
+        sock_connect=config.http_connect_timeout,
+        sock_read=config.http_read_timeout,
+    )
+
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
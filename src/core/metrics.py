@@ -0,0 +1,226 @@
+import re
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Callable, ContextManager, Iterator, Optional
+
+from core.config import settings
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+_INVALID_NAME_CHARACTERS = re.compile(r"[^a-zA-Z0-9_:]")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: defaultdict[tuple[str, ...], float] = defaultdict(float)
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] += amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(self.labelnames, labels)} {value}" for labels, value in self._values.items()]
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            # One slot per bucket, one for +Inf, then sum and count.
+            series = self._series[labels] = [0.0] * (len(self.buckets) + 3)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, series in self._series.items():
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, "+Inf"), series):
+                cumulative += count
+                bucket = 'le="' + str(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, bucket)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {series[-2]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Minimal Prometheus registry; collectors add gauges computed at scrape time."""
+
+    def __init__(self, enabled: bool, prefix: str):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._metrics: list[Counter | Histogram] = []
+        self._collectors: list[tuple[Callable[[], dict[str, Any]], dict[str, str]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        metric = Counter(f"{self.prefix}_{name}", documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Histogram:
+        metric = Histogram(f"{self.prefix}_{name}", documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(
+        self, collector: Callable[[], dict[str, Any]], labels: Optional[dict[str, str]] = None
+    ) -> None:
+        """``labels`` maps the path of a dict keyed by data (such as ``router``) to the label its keys become."""
+        self._collectors.append((collector, labels or {}))
+
+    def unregister_collector(self, collector: Callable[[], dict[str, Any]]) -> None:
+        self._collectors = [entry for entry in self._collectors if entry[0] != collector]
+
+    def _gauges(
+        self, path: str, value: Any, labelled: dict[str, str], labels: tuple[tuple[str, str], ...] = ()
+    ) -> Iterator[tuple[str, str]]:
+        """Yields ``(family, sample)`` for each number in a collected dict."""
+        if isinstance(value, dict):
+            label = labelled.get(path)
+            if label is not None:
+                labelled = {other: name for other, name in labelled.items() if other != path}
+            for key, item in value.items():
+                if label is not None:
+                    yield from self._gauges(path, item, labelled, (*labels, (label, str(key))))
+                else:
+                    key = _INVALID_NAME_CHARACTERS.sub("_", str(key))
+                    yield from self._gauges(f"{path}_{key}" if path else key, item, labelled, labels)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            name = f"{self.prefix}_{path}"
+            names, values = zip(*labels) if labels else ((), ())
+            yield name, f"{name}{_labels(names, values)} {value}"
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines += metric.render()
+        for collector, labelled in self._collectors:
+            families: dict[str, list[str]] = defaultdict(list)
+            for name, sample in self._gauges("", collector(), labelled):
+                families[name].append(sample)
+            for name, samples in families.items():
+                lines += [f"# HELP {name} Gauge collected at scrape time", f"# TYPE {name} gauge", *samples]
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry(enabled=settings.metrics_enabled, prefix="tripvalidator")
+
+REQUEST_SECONDS = metrics.histogram("request_seconds", "End-to-end request latency", ("endpoint",))
+STAGE_SECONDS = metrics.histogram("stage_seconds", "Time spent per request-path stage", ("stage",))
+OUTCOMES = metrics.counter("outcomes_total", "How validations were answered", ("outcome",))
+UPSTREAM_RESPONSES = metrics.counter("upstream_responses_total", "Upstream responses by HTTP status", ("status",))
+UPSTREAM_TOKENS = metrics.counter("upstream_tokens_total", "Tokens reported by the upstream completions", ("kind",))
+
+
+class StageTimer:
+    """Per-request stage breakdown, observed into the stage histogram as it is recorded."""
+
+    def __init__(self, start: Optional[float] = None):
+        self.start = time.perf_counter() if start is None else start
+        self.stages: dict[str, float] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+        STAGE_SECONDS.observe(seconds, name)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+
+current_timer: ContextVar[Optional[StageTimer]] = ContextVar("current_timer", default=None)
+
+_NULL_STAGE = nullcontext()
+
+
+def stage(name: str) -> ContextManager[None]:
+    """Times a block into the current request's StageTimer; a shared no-op when instrumentation is off."""
+    timer = current_timer.get()
+    return _NULL_STAGE if timer is None else timer.stage(name)
+
+
+def record_stage(name: str, seconds: float) -> None:
+    timer = current_timer.get()
+    if timer is not None:
+        timer.record(name, seconds)
+
+
+def count_outcome(outcome: str) -> None:
+    if metrics.enabled:
+        OUTCOMES.inc(outcome)
+
+
+def count_upstream_status(status: int) -> None:
+    if metrics.enabled:
+        UPSTREAM_RESPONSES.inc(str(status))
+
+
+def count_tokens(usage: Optional[dict[str, Any]]) -> None:
+    """Adds the ``usage`` block of a completion payload to the token counters."""
+    if not metrics.enabled or not usage:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        if isinstance(usage.get(kind), int):
+            UPSTREAM_TOKENS.inc(kind.removesuffix("_tokens"), amount=usage[kind])
+
+
+def start_timer(start: Optional[float] = None) -> Optional[StageTimer]:
+    """Starts a StageTimer for the current context when instrumentation is enabled."""
+    if not metrics.enabled:
+        return None
+    timer = StageTimer(start)
+    current_timer.set(timer)
+    return timer
+
+
+class RequestClockMiddleware:
+    """Stamps ``request.state.received_at`` before the body is read, so body validation can be timed."""
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] == "http":
+            scope.setdefault("state", {})["received_at"] = time.perf_counter()
+        await self.app(scope, receive, send)
@@ -1,4 +1,5 @@
-from typing import Annotated, List, Optional
+from datetime import datetime
+from typing import Annotated, Any, Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -41,6 +42,18 @@ class TripValidatorRequest(BaseModel):
     input_data: Annotated[TripValidatorInput, Field(description="Input data for the trip validation request")]
 
 
+class PromptStats(BaseModel):
+    original_bytes: Annotated[int, Field(ge=0, description="Size of the full itinerary payload in bytes")]
+    compact_bytes: Annotated[int, Field(ge=0, description="Size of the compacted payload sent upstream in bytes")]
+    original_tokens: Annotated[int, Field(ge=0, description="Estimated tokens of the full itinerary payload")]
+    compact_tokens: Annotated[int, Field(ge=0, description="Estimated tokens of the compacted payload")]
+
+
+class SegmentReuse(BaseModel):
+    reused: Annotated[int, Field(ge=0, description="Segments whose findings were served from the segment cache")]
+    recomputed: Annotated[int, Field(ge=0, description="Segments sent to the model for validation")]
+
+
 class TripValidatorResponse(BaseModel):
     output_data: Annotated[TripValidatorOutput, Field(description="Output data for the trip validation response")]
     processing_time: Annotated[
@@ -49,3 +62,76 @@ class TripValidatorResponse(BaseModel):
     version: Annotated[
         str, Field(pattern=r"^\d+\.\d+\.\d+$", description="Version of the TripValidator service", examples=["1.0.0"])
     ]
+    cached: Annotated[
+        bool, Field(default=False, description="Indicates whether the output was served from the response cache")
+    ]
+    prompt_stats: Annotated[
+        Optional[PromptStats],
+        Field(default=None, description="Payload size before and after compaction, with PROMPT_STATS_ENABLED"),
+    ]
+    segment_reuse: Annotated[
+        Optional[SegmentReuse],
+        Field(default=None, description="Segments reused from and recomputed for the segment cache, when enabled"),
+    ]
+    stage_timings: Annotated[
+        Optional[Dict[str, float]],
+        Field(
+            default=None,
+            description="Seconds spent in each request-path stage, when instrumentation is enabled",
+            examples=[{"request_validation": 0.002, "prompt_build": 0.001, "upstream_wait": 1.1, "parse": 0.003}],
+        ),
+    ]
+
+
+class TripValidatorBatchError(BaseModel):
+    status_code: Annotated[int, Field(description="HTTP status code of the failed validation", examples=[502])]
+    detail: Annotated[str, Field(description="Reason the validation failed")]
+
+
+class TripValidatorBatchItem(BaseModel):
+    index: Annotated[int, Field(ge=0, description="Position of the request within the submitted batch", examples=[0])]
+    response: Annotated[
+        Optional[TripValidatorResponse], Field(default=None, description="Validation response when it succeeded")
+    ]
+    error: Annotated[
+        Optional[TripValidatorBatchError], Field(default=None, description="Error details when the validation failed")
+    ]
+
+
+class TripValidatorStreamEvent(BaseModel):
+    event: Annotated[
+        Literal["feedback", "suggestion", "result", "error"],
+        Field(description="Kind of event: partial results first, then the final result or an error"),
+    ]
+    feedback: Annotated[Optional[str], Field(default=None, description="Validator feedback, as soon as it is complete")]
+    suggestion: Annotated[
+        Optional[OptimizationSuggestion],
+        Field(default=None, description="One optimization suggestion, validated as in the final result, once complete"),
+    ]
+    response: Annotated[
+        Optional[TripValidatorResponse], Field(default=None, description="Final validation response")
+    ]
+    error: Annotated[
+        Optional[TripValidatorBatchError], Field(default=None, description="Error details when the validation failed")
+    ]
+
+
+JobStatus = Literal["queued", "running", "done", "failed"]
+JobPriority = Literal["high", "normal", "low"]
+
+
+class TripValidatorJob(BaseModel):
+    job_id: Annotated[str, Field(description="Identifier to poll with GET /jobs/{job_id}")]
+    status: Annotated[JobStatus, Field(description="Queued, running, or finished as done or failed")]
+    priority: Annotated[JobPriority, Field(description="Lane the job was queued in")]
+    deduplicated: Annotated[
+        bool, Field(default=False, description="Indicates the submission joined an identical job already pending")
+    ]
+    created_at: Annotated[datetime, Field(description="When the job was first queued")]
+    updated_at: Annotated[datetime, Field(description="When the job last changed status")]
+    response: Annotated[
+        Optional[TripValidatorResponse], Field(default=None, description="Validation response once the job is done")
+    ]
+    error: Annotated[
+        Optional[TripValidatorBatchError], Field(default=None, description="Error details when the job failed")
+    ]
@@ -0,0 +1,200 @@
+from typing import Annotated, Any, Generic, Iterator, List, Literal, Optional, Sequence, TypeVar, Union, overload
+
+from pydantic import (
+    BaseModel,
+    Field,
+    PlainSerializer,
+    PlainValidator,
+    TypeAdapter,
+    ValidationError,
+    ValidationInfo,
+    ValidatorFunctionWrapHandler,
+    model_validator,
+)
+
+from models.place_models import Picture, PlaceDetails, Review
+from models.trip_models import Itinerary, TripSegment
+from models.validator_models import TripValidatorInput, TripValidatorRequest
+
+IngestionMode = Literal["strict", "fast"]
+
+T = TypeVar("T")
+M = TypeVar("M", bound=BaseModel)
+
+
+class BatchTooLargeError(ValueError):
+    """Raised when a batch body holds more requests than allowed, before any of them is validated."""
+
+    def __init__(self, size: int, max_items: int):
+        super().__init__(f"Batch exceeds the limit of {max_items} requests")
+        self.size = size
+        self.max_items = max_items
+
+
+class LazyModelList(Sequence[T], Generic[T]):
+    """List kept as received and validated into models on first access.
+
+    Serializes back to the values as received, so dumps (and cache keys) never trigger validation.
+    """
+
+    __slots__ = ("raw", "_adapter", "_items")
+
+    def __init__(self, adapter: TypeAdapter[List[T]], raw: list[Any]):
+        self.raw = raw
+        self._adapter = adapter
+        self._items: Optional[List[T]] = None
+
+    @property
+    def validated(self) -> bool:
+        return self._items is not None
+
+    @property
+    def items(self) -> List[T]:
+        if self._items is None:
+            self._items = self._adapter.validate_python(self.raw)
+        return self._items
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    @overload
+    def __getitem__(self, index: int) -> T: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[T]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[T, List[T]]:
+        return self.items[index]
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self.items)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, LazyModelList):
+            return self.raw == other.raw
+        if isinstance(other, list):
+            return self.items == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"LazyModelList({self.items!r})" if self.validated else f"LazyModelList(<{len(self.raw)} unvalidated>)"
+
+
+def _lazy(item_type: type[M]) -> Any:
+    adapter = TypeAdapter(List[item_type])  # type: ignore
+
+    def wrap(raw: Any) -> LazyModelList[M]:
+        if isinstance(raw, LazyModelList):
+            return raw
+        if not isinstance(raw, list):
+            raise ValueError("Input should be a valid list")
+        return LazyModelList(adapter, raw)
+
+    return Annotated[Any, PlainValidator(wrap), PlainSerializer(lambda value: value.raw)]
+
+
+class _FastPlaceDetails(PlaceDetails):
+    """PlaceDetails with reviews and pictures validated on first access, reused when repeated verbatim."""
+
+    reviews: Annotated[Optional[_lazy(Review)], Field(default=None)]  # type: ignore
+    pictures: _lazy(Picture)  # type: ignore
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def reuse_repeated_place(cls, data: Any, handler: ValidatorFunctionWrapHandler, info: ValidationInfo) -> Any:
+        places: Optional[dict[str, tuple[Any, "_FastPlaceDetails"]]] = (info.context or {}).get("places")
+        place_id = data.get("place_id") if isinstance(data, dict) else None
+        if places is None or not isinstance(place_id, str):
+            return handler(data)
+
+        seen = places.get(place_id)
+        if seen is not None and seen[0] == data:
+            return seen[1]
+        place = handler(data)
+        places[place_id] = (data, place)
+        return place
+
+
+class _FastTripSegment(TripSegment):
+    start_point: _FastPlaceDetails  # type: ignore
+    end_point: _FastPlaceDetails  # type: ignore
+
+
+class _FastItinerary(Itinerary):
+    segments: List[_FastTripSegment]  # type: ignore
+
+
+class _FastTripValidatorInput(TripValidatorInput):
+    itinerary: _FastItinerary  # type: ignore
+
+
+class _FastTripValidatorRequest(TripValidatorRequest):
+    input_data: _FastTripValidatorInput  # type: ignore
+
+
+class _Rated(BaseModel):
+    rating: Annotated[float, Field(ge=0, le=5)]
+
+
+_REQUEST_ADAPTERS: dict[IngestionMode, TypeAdapter[Any]] = {
+    "strict": TypeAdapter(TripValidatorRequest),
+    "fast": TypeAdapter(_FastTripValidatorRequest),
+}
+_BATCH_ADAPTER = TypeAdapter(List[Any])
+_RATINGS_ADAPTER = TypeAdapter(List[_Rated])
+
+
+def parse_request(body: Union[str, bytes], mode: IngestionMode = "strict") -> TripValidatorRequest:
+    """Validates a raw request body in one pass; raises pydantic's ValidationError."""
+    return _REQUEST_ADAPTERS[mode].validate_json(body, context={"places": {}})
+
+
+def parse_request_batch(
+    body: Union[str, bytes], mode: IngestionMode = "strict", max_items: Optional[int] = None
+) -> List[Union[TripValidatorRequest, ValidationError]]:
+    """Validates a batch body item by item: each item is a request or the ValidationError it raised.
+
+    Raises pydantic's ValidationError only when the body itself is not a JSON array, and BatchTooLargeError
+    when it holds more than ``max_items`` items.
+    """
+    items = _BATCH_ADAPTER.validate_json(body)
+    if max_items is not None and len(items) > max_items:
+        raise BatchTooLargeError(len(items), max_items)
+
+    adapter = _REQUEST_ADAPTERS[mode]
+    context: dict[str, Any] = {"places": {}}
+    requests: List[Union[TripValidatorRequest, ValidationError]] = []
+    for item in items:
+        try:
+            requests.append(adapter.validate_python(item, context=context))
+        except ValidationError as e:
+            requests.append(e)
+    return requests
+
+
+def review_ratings(reviews: Sequence[Review]) -> List[float]:
+    """Ratings of a review list, validating only the rating when the list is still lazy."""
+    if isinstance(reviews, LazyModelList) and not reviews.validated:
+        return [review.rating for review in _RATINGS_ADAPTER.validate_python(reviews.raw)]
+    return [review.rating for review in reviews]
+
+
+def materialize(model: M) -> M:
+    """Plain copy of a fast-ingested segment or place with its lazy lists validated.
+
+    Needed before an ingested object is serialized as its declared type, such as a segment referenced
+    from an optimization suggestion; other models are returned unchanged.
+    """
+    if isinstance(model, _FastTripSegment):
+        return TripSegment.model_construct(  # type: ignore
+            **{**dict(model), "start_point": materialize(model.start_point), "end_point": materialize(model.end_point)}
+        )
+    if isinstance(model, _FastPlaceDetails):
+        return PlaceDetails.model_construct(  # type: ignore
+            **{
+                **dict(model),
+                "reviews": list(model.reviews) if model.reviews is not None else None,
+                "pictures": list(model.pictures),
+            }
+        )
+    return model
@@ -0,0 +1,116 @@
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Literal, Optional
+
+logger = logging.getLogger(__name__)
+
+StreamEventKind = Literal["feedback", "suggestion"]
+
+
+@dataclass
+class _Frame:
+    kind: str
+    key: Optional[str]
+    start: int
+    capture: bool = field(default=False)
+    expecting_key: bool = field(default=True)
+    current_key: Optional[str] = field(default=None)
+
+
+class IncrementalOutputParser:
+    """Scans the model answer as it streams in and surfaces values as soon as they are complete.
+
+    Emits the ``feedback`` string and each object of ``optimization_suggestions`` at whatever depth they
+    appear; a value that turns out not to be valid JSON is skipped. Text before the first ``{`` (such as a
+    code fence) and after the top-level object is ignored. Only the text of the value being read is kept,
+    not the whole answer: the caller parses the complete answer once the stream ends.
+    """
+
+    def __init__(self):
+        self.done = False
+        self._buffer = ""
+        self._stack: list[_Frame] = []
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+
+    def feed(self, delta: str) -> list[tuple[StreamEventKind, Any]]:
+        buffer = self._buffer + delta
+        events: list[tuple[StreamEventKind, Any]] = []
+        for position in range(len(self._buffer), len(buffer)):
+            if self.done:
+                break
+            char = buffer[position]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    self._close_string(buffer[self._string_start : position + 1], events)
+                continue
+
+            if not self._stack:
+                if char == "{":
+                    self._stack.append(_Frame(kind="{", key=None, start=position))
+                continue
+
+            frame = self._stack[-1]
+            if char == '"':
+                self._in_string = True
+                self._string_start = position
+            elif char == "{" or char == "[":
+                key = frame.current_key if frame.kind == "{" else frame.key
+                capture = char == "{" and frame.kind == "[" and frame.key == "optimization_suggestions"
+                self._stack.append(_Frame(kind=char, key=key, start=position, capture=capture))
+            elif char == "}" or char == "]":
+                self._stack.pop()
+                self._close_container(frame, buffer, position + 1, events)
+            elif char == ":":
+                frame.expecting_key = False
+            elif char == "," and frame.kind == "{":
+                frame.expecting_key = True
+                frame.current_key = None
+        self._retain(buffer)
+
+        return events
+
+    def _retain(self, buffer: str) -> None:
+        """Keeps only the text of the string or suggestion still open, shifting the positions that point into it."""
+        keep = self._string_start if self._in_string else len(buffer)
+        for frame in self._stack:
+            if frame.capture:
+                keep = min(keep, frame.start)
+                break
+        self._buffer = buffer[keep:]
+        self._string_start -= keep
+        for frame in self._stack:
+            frame.start -= keep
+
+    def _close_string(self, raw: str, events: list[tuple[StreamEventKind, Any]]) -> None:
+        parent = self._stack[-1]
+        if parent.kind != "{":
+            return
+        if parent.expecting_key:
+            parent.current_key = _decode(raw, "key")
+        elif parent.current_key == "feedback" and (feedback := _decode(raw, "feedback")) is not None:
+            events.append(("feedback", feedback))
+
+    def _close_container(
+        self, frame: _Frame, buffer: str, end: int, events: list[tuple[StreamEventKind, Any]]
+    ) -> None:
+        if not self._stack:
+            self.done = True
+        elif frame.capture and (suggestion := _decode(buffer[frame.start : end], "suggestion")) is not None:
+            events.append(("suggestion", suggestion))
+
+
+def _decode(raw: str, what: str) -> Optional[Any]:
+    """The JSON value of a string or object read from the stream, or None (logged) when it is malformed."""
+    try:
+        return json.loads(raw)
+    except json.JSONDecodeError as e:
+        logger.warning(f"Skipping a streamed {what} that is not valid JSON: {e}")
+        return None
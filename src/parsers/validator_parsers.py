@@ -1,105 +1,283 @@
-import json
 import logging
 from datetime import datetime
-from json import JSONDecodeError
-from typing import Any, Dict, List
-from xml.etree.ElementTree import parse
+from typing import Annotated, Any, List, Optional, Sequence, Union
 
-from pydantic import BaseModel, EmailStr, HttpUrl
-from typing_extensions import Annotated, Optional
+from pydantic import BaseModel, Field, StrictInt, TypeAdapter, ValidationError, ValidationInfo, model_validator
 
-from models.base_models import Currency, Location, TransportationMethod
-from models.cost_models import CostDetails, CostEstimate
-from models.place_models import Picture, PlaceDetails, Review, ReviewAuthor
+from core.metrics import count_tokens
+from models.base_models import TransportationMethod
+from models.place_models import PlaceDetails
 from models.trip_models import TripSegment
-from models.validator_models import (
-    OptimizationSuggestion,
-    TripValidatorOutput,
-    TripValidatorResponse,
-)
+from models.validator_models import OptimizationSuggestion, TripValidatorOutput
+from parsers.request_parsers import materialize
 
 logger = logging.getLogger(__name__)
 
 
+class ModelResponseError(ValueError):
+    """Raised when the model answer cannot be turned into a TripValidatorOutput."""
+
+
+class _Message(BaseModel):
+    content: str
+
+
+class _Choice(BaseModel):
+    message: _Message
+
+
+class _Completion(BaseModel):
+    choices: Annotated[List[_Choice], Field(min_length=1)]
+    usage: Optional[dict[str, Any]] = None
+
+
+class _CompactSegment(BaseModel):
+    """Segment in the compact prompt format, with places referenced by id."""
+
+    start: Annotated[str, Field(alias="from")]
+    end: Annotated[str, Field(alias="to")]
+    departure: datetime
+    arrival: datetime
+    mode: TransportationMethod
+    cost: Annotated[Optional[float], Field(default=None, ge=0)]
+
+
+class _ModelSuggestion(OptimizationSuggestion):
+    """Suggestion as answered by the model: segments may be indices into the input or compact references."""
+
+    original_segment: Annotated[Union[StrictInt, TripSegment], Field(union_mode="left_to_right")]  # type: ignore
+    suggested_segment: Annotated[  # type: ignore
+        Union[StrictInt, _CompactSegment, TripSegment], Field(union_mode="left_to_right")
+    ]
+    estimated_improvement: Annotated[float, Field(default=0.0, ge=0)]
+
+    @model_validator(mode="after")
+    def resolve_references(self, info: ValidationInfo) -> "_ModelSuggestion":
+        context = info.context or {}
+        segments: Sequence[TripSegment] = context.get("segments") or ()
+        places: dict[str, PlaceDetails] = context.get("places") or {}
+
+        if isinstance(self.original_segment, int):
+            if not 0 <= self.original_segment < len(segments):
+                raise ValueError(f"original_segment {self.original_segment} is not a segment of the itinerary")
+            self.original_segment = materialize(segments[self.original_segment])
+
+        suggested = self.suggested_segment
+        if isinstance(suggested, int):
+            if not 0 <= suggested < len(segments):
+                raise ValueError(f"suggested_segment {suggested} is not a segment of the itinerary")
+            self.suggested_segment = materialize(segments[suggested])
+        elif isinstance(suggested, _CompactSegment):
+            if suggested.start not in places or suggested.end not in places:
+                raise ValueError("suggested_segment references a place that is not in the itinerary")
+            cost_estimate = self.original_segment.cost_estimate
+            if suggested.cost is not None:
+                cost_estimate = cost_estimate.model_copy(update={"estimated_cost": suggested.cost})
+            self.suggested_segment = TripSegment.model_construct(
+                start_point=materialize(places[suggested.start]),
+                end_point=materialize(places[suggested.end]),
+                departure_time=suggested.departure,
+                arrival_time=suggested.arrival,
+                cost_estimate=cost_estimate,
+                transportation_method=suggested.mode,
+            )
+        return self
+
+
+class _ModelOutput(TripValidatorOutput):
+    optimization_suggestions: Annotated[  # type: ignore
+        Optional[List[Annotated[Union[_ModelSuggestion, Any], Field(union_mode="left_to_right")]]],
+        Field(default=None),
+    ]
+
+    @model_validator(mode="after")
+    def drop_incomplete_suggestions(self) -> "_ModelOutput":
+        if self.optimization_suggestions:
+            complete = [item for item in self.optimization_suggestions if isinstance(item, _ModelSuggestion)]
+            if len(complete) != len(self.optimization_suggestions):
+                logger.warning(f"Dropped {len(self.optimization_suggestions) - len(complete)} incomplete suggestions")
+            self.optimization_suggestions = complete
+        return self
+
+
+class _WrappedOutput(BaseModel):
+    output_data: _ModelOutput
+
+
+class SegmentFinding(BaseModel):
+    """Findings of the model for one segment, as cached and merged by incremental re-validation."""
+
+    index: Annotated[int, Field(ge=0)]
+    is_valid: bool
+    validation_score: Annotated[float, Field(ge=0, le=1)]
+    feedback: str
+    optimization_suggestions: Annotated[List[OptimizationSuggestion], Field(default_factory=list)]
+
+
+class TripFinding(BaseModel):
+    """Findings of the model about the itinerary as a whole, merged with the segment findings."""
+
+    is_valid: bool
+    validation_score: Annotated[float, Field(ge=0, le=1)]
+    feedback: str
+
+
+class _ModelSegmentFinding(SegmentFinding):
+    """Segment finding as answered by the model: suggestions apply to the finding's own segment."""
+
+    optimization_suggestions: Annotated[  # type: ignore
+        List[Annotated[Union[_ModelSuggestion, Any], Field(union_mode="left_to_right")]], Field(default_factory=list)
+    ]
+
+    @model_validator(mode="before")
+    @classmethod
+    def default_original_segment(cls, data: Any) -> Any:
+        if isinstance(data, dict) and isinstance(data.get("optimization_suggestions"), list):
+            suggestions = [
+                {"original_segment": data.get("index"), **item} if isinstance(item, dict) else item
+                for item in data["optimization_suggestions"]
+            ]
+            data = {**data, "optimization_suggestions": suggestions}
+        return data
+
+    @model_validator(mode="after")
+    def drop_incomplete_suggestions(self) -> "_ModelSegmentFinding":
+        complete = [item for item in self.optimization_suggestions if isinstance(item, _ModelSuggestion)]
+        if len(complete) != len(self.optimization_suggestions):
+            logger.warning(f"Dropped {len(self.optimization_suggestions) - len(complete)} incomplete suggestions")
+        self.optimization_suggestions = complete  # type: ignore
+        return self
+
+
+class _SegmentedOutput(BaseModel):
+    trip: Annotated[Optional[Union[TripFinding, Any]], Field(default=None, union_mode="left_to_right")]
+    segments: List[Annotated[Union[_ModelSegmentFinding, Any], Field(union_mode="left_to_right")]]
+
+
+class _WrappedSegmentedOutput(BaseModel):
+    output_data: _SegmentedOutput
+
+
+class _BatchedOutput(BaseModel):
+    items: List[Any]
+
+
+class _WrappedBatchedOutput(BaseModel):
+    output_data: _BatchedOutput
+
+
+_COMPLETION_ADAPTER = TypeAdapter(_Completion)
+_ANSWER_ADAPTER: TypeAdapter[Union[_WrappedOutput, _ModelOutput]] = TypeAdapter(
+    Annotated[Union[_WrappedOutput, _ModelOutput], Field(union_mode="left_to_right")]
+)
+_SEGMENTED_ADAPTER: TypeAdapter[Union[_WrappedSegmentedOutput, _SegmentedOutput]] = TypeAdapter(
+    Annotated[Union[_WrappedSegmentedOutput, _SegmentedOutput], Field(union_mode="left_to_right")]
+)
+_BATCHED_ADAPTER: TypeAdapter[Union[_WrappedBatchedOutput, _BatchedOutput]] = TypeAdapter(
+    Annotated[Union[_WrappedBatchedOutput, _BatchedOutput], Field(union_mode="left_to_right")]
+)
+
+
+def _strip_fence(content: str) -> str:
+    start = content.find("{")
+    end = content.rfind("}")
+    if start == -1 or end < start:
+        raise ModelResponseError("Model answer does not contain a JSON object")
+    return content[start : end + 1]
+
+
+def _context(segments: Optional[Sequence[TripSegment]]) -> dict[str, Any]:
+    if not segments:
+        return {}
+    places = {}
+    for segment in segments:
+        places[segment.start_point.place_id] = segment.start_point
+        places[segment.end_point.place_id] = segment.end_point
+    return {"segments": segments, "places": places}
+
+
+def _completion_content(response: str) -> str:
+    try:
+        completion = _COMPLETION_ADAPTER.validate_json(response)
+    except ValidationError as e:
+        logger.error(f"Error parsing API response: {e}")
+        raise ModelResponseError(f"Unexpected completion payload: {e}") from e
+
+    count_tokens(completion.usage)
+    return completion.choices[0].message.content
+
+
 class ValidationParser:
     @staticmethod
-    def parse(response: str) -> TripValidatorOutput:
+    def parse(response: str, segments: Optional[Sequence[TripSegment]] = None) -> TripValidatorOutput:
+        """Parses a chat completion body; ``segments`` resolves suggestions that reference the input itinerary."""
+        return ValidationParser.parse_content(_completion_content(response), segments)
+
+    @staticmethod
+    def parse_segments(
+        response: str, segments: Sequence[TripSegment], indices: Sequence[int]
+    ) -> tuple[List[SegmentFinding], Optional[TripFinding]]:
+        """Parses a per-segment answer into the findings for ``indices``, in that order, and the trip finding.
+
+        The trip finding is None, and logged, when the answer has none that is usable.
+        """
         try:
-            json_response = json.loads(response)
-            response_str = json_response["choices"][0]["message"]["content"]
-            formatted_str = "\n".join(response_str.split("\n")[1:-1])
-            parsed_response = json.loads(formatted_str)
-            print(parsed_response)
-
-            # TODO: Fix parsers at model level.
-
-            # optimization_suggestions = [
-            #     ValidationParser.parse_optimization_suggestion(suggestion)
-            #     for suggestion in output_data.get("optimization_suggestions", [])
-            # ]
-
-            # return TripValidatorOutput(
-            #     is_valid=output_data.get("is_valid", False),
-            #     validation_score=output_data.get("validation_score", 0.0),
-            #     feedback=output_data.get("feedback", ""),
-            #     optimization_suggestions=optimization_suggestions,
-            # )
-        except (JSONDecodeError, KeyError) as e:
+            answer = _SEGMENTED_ADAPTER.validate_json(
+                _strip_fence(_completion_content(response)), context=_context(segments)
+            )
+        except ValidationError as e:
             logger.error(f"Error parsing API response: {e}")
-            raise e
-
-    # @staticmethod
-    # def parse_optimization_suggestion(suggestion: Dict[str, Any]) -> OptimizationSuggestion:
-    #     return OptimizationSuggestion(
-    #         original_segment=ValidationParser.parse_trip_segment(suggestion.get("original_segment", {})),
-    #         suggested_segment=ValidationParser.parse_trip_segment(suggestion.get("suggested_segment", {})),
-    #         reason=suggestion.get("reason", ""),
-    #         estimated_improvement=float(suggestion.get("estimated_improvement", 0)),
-    #     )
-
-    # @staticmethod
-    # def parse_trip_segment(segment_data: Dict[str, Any]) -> TripSegment:
-    #     return TripSegment(
-    #         start_point=ValidationParser.parse_place_details(segment_data.get("start_point", {})),
-    #         end_point=ValidationParser.parse_place_details(segment_data.get("end_point", {})),
-    #         departure_time=datetime.fromisoformat(segment_data.get("departure_time", "")),
-    #         arrival_time=datetime.fromisoformat(segment_data.get("arrival_time", "")),
-    #         cost_estimate=ValidationParser.parse_cost_estimate(segment_data.get("cost_estimate", {})),
-    #         transportation_method=segment_data.get("transportation_method", ""),
-    #     )
-
-    # @staticmethod
-    # def parse_place_details(place_data: Dict[str, Any]) -> PlaceDetails:
-    #     return PlaceDetails(
-    #         place_id=place_data.get("place_id", ""),
-    #         name=place_data.get("name", ""),
-    #         location=Location(**place_data.get("location", {})),
-    #         types=place_data.get("types", []),
-    #         reviews=[ValidationParser.parse_review(review) for review in place_data.get("reviews", [])],
-    #         pictures=[ValidationParser.parse_picture(picture) for picture in place_data.get("pictures", [])],
-    #         ratings_total=place_data.get("ratings_total", 0),
-    #     )
-
-    # @staticmethod
-    # def parse_review(review_data: Dict[str, Any]) -> Review:
-    #     return Review(
-    #         author=ReviewAuthor(**review_data.get("author", {})),
-    #         rating=review_data.get("rating", 0.0),
-    #         text=review_data.get("text", ""),
-    #         language=review_data.get("language", ""),
-    #         publication_time=datetime.fromisoformat(review_data.get("publication_time", "")),
-    #     )
-
-    # @staticmethod
-    # def parse_picture(picture_data: Dict[str, Any]) -> Picture:
-    #     return Picture(**picture_data)
-
-    # @staticmethod
-    # def parse_cost_estimate(cost_data: Dict[str, Any]) -> CostEstimate:
-    #     return CostEstimate(
-    #         source_urls=cost_data.get("source_urls", []),
-    #         source_description=cost_data.get("source_description", ""),
-    #         estimated_cost=cost_data.get("estimated_cost", 0.0),
-    #         currency=Currency(**cost_data.get("currency", {})),
-    #         cost_details=CostDetails(**cost_data.get("cost_details", {})),
-    #     )
+            raise ModelResponseError(f"Unexpected model answer: {e}") from e
+
+        output = answer.output_data if isinstance(answer, _WrappedSegmentedOutput) else answer
+        findings = {item.index: item for item in output.segments if isinstance(item, _ModelSegmentFinding)}
+        missing = [index for index in indices if index not in findings]
+        if missing:
+            raise ModelResponseError(f"Model answer has no usable findings for segments {missing}")
+        trip = output.trip if isinstance(output.trip, TripFinding) else None
+        if trip is None:
+            logger.warning("Model answer has no usable trip finding")
+        return [findings[index] for index in indices], trip
+
+    @staticmethod
+    def parse_items(response: str, itineraries: Sequence[Sequence[TripSegment]]) -> List[Optional[TripValidatorOutput]]:
+        """Parses a multi-itinerary answer into one output per itinerary, by item id; None where none is usable."""
+        try:
+            answer = _BATCHED_ADAPTER.validate_json(_strip_fence(_completion_content(response)))
+        except ValidationError as e:
+            logger.error(f"Error parsing API response: {e}")
+            raise ModelResponseError(f"Unexpected model answer: {e}") from e
+
+        outputs: List[Optional[TripValidatorOutput]] = [None] * len(itineraries)
+        items = answer.output_data.items if isinstance(answer, _WrappedBatchedOutput) else answer.items
+        for item in items:
+            item_id = item.get("id") if isinstance(item, dict) else None
+            if not isinstance(item_id, int) or not 0 <= item_id < len(itineraries) or outputs[item_id] is not None:
+                continue
+            try:
+                outputs[item_id] = _ModelOutput.model_validate(item, context=_context(itineraries[item_id]))
+            except ValidationError as e:
+                logger.warning(f"Discarded the answer for item {item_id}: {e}")
+        return outputs
+
+    @staticmethod
+    def parse_suggestion(
+        suggestion: Any, segments: Optional[Sequence[TripSegment]] = None
+    ) -> Optional[OptimizationSuggestion]:
+        """Validates one streamed suggestion as ``parse_content`` does; None when the final parse would drop it."""
+        try:
+            return _ModelSuggestion.model_validate(suggestion, context=_context(segments))
+        except ValidationError as e:
+            logger.warning(f"Dropped an incomplete streamed suggestion: {e}")
+            return None
+
+    @staticmethod
+    def parse_content(content: str, segments: Optional[Sequence[TripSegment]] = None) -> TripValidatorOutput:
+        """Parses the model answer, fenced or not, wrapped in ``output_data`` or not."""
+        try:
+            answer = _ANSWER_ADAPTER.validate_json(_strip_fence(content), context=_context(segments))
+        except ValidationError as e:
+            logger.error(f"Error parsing API response: {e}")
+            raise ModelResponseError(f"Unexpected model answer: {e}") from e
+
+        return answer.output_data if isinstance(answer, _WrappedOutput) else answer
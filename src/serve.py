@@ -0,0 +1,106 @@
+"""Production serving profile: N uvicorn workers forked from one parent that has already loaded the app.
+
+The parent imports the app, builds its OpenAPI document and request schemas once, binds the listening
+socket and forks the workers, which inherit all of it and start serving at once. Workers that die are
+replaced; SIGTERM or SIGINT stops them all gracefully. Unless set otherwise, the workers share the response
+cache (SQLite tier) and, through SHARED_STATE_PATH, single-flight leases and upstream rate-limit buckets.
+
+Fork-based, so POSIX only. Usage (from src/): python serve.py --workers 4 --port 3000
+"""
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import time
+from types import FrameType
+from typing import Optional
+
+SHARED_DEFAULTS = {
+    "CACHE_BACKEND": "sqlite",
+    "SHARED_STATE_PATH": "tripvalidator_shared.sqlite3",
+}
+
+# A worker dying sooner than this after its start is not restarted right away, to avoid a tight crash loop.
+RESTART_BACKOFF = 1.0
+
+logger = logging.getLogger("serve")
+
+
+def bind(host: str, port: int, backlog: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def main(host: str, port: int, workers: int, log_level: str, access_log: bool, backlog: int) -> None:
+    for name, value in SHARED_DEFAULTS.items():
+        os.environ.setdefault(name, value)
+
+    import uvicorn
+
+    from server import app
+
+    app.openapi()
+    sock = bind(host, port, backlog)
+    config = uvicorn.Config(app, log_level=log_level, access_log=access_log, lifespan="on")
+    logging.basicConfig(level=log_level.upper(), format="%(levelname)s:     %(message)s")
+
+    children: dict[int, float] = {}
+    stopping = False
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                uvicorn.Server(config).run(sockets=[sock])
+            finally:
+                os._exit(0)
+        children[pid] = time.monotonic()
+
+    def stop(signum: int, frame: Optional[FrameType]) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+    logger.info(f"Serving on {host}:{port} with {workers} workers (parent {os.getpid()})")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started_at = children.pop(pid, None)
+        if started_at is None or stopping:
+            continue
+        logger.warning(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, restarting it")
+        if time.monotonic() - started_at < RESTART_BACKOFF:
+            time.sleep(RESTART_BACKOFF)
+        spawn()
+    sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--no-access-log", action="store_true")
+    parser.add_argument("--backlog", type=int, default=2048)
+    args = parser.parse_args()
+    main(args.host, args.port, args.workers, args.log_level, not args.no_access_log, args.backlog)
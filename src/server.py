@@ -1,31 +1,216 @@
 import time
-from typing import Annotated
+from contextlib import asynccontextmanager
+from typing import Annotated, Any, AsyncIterator, List, Optional, Union
 
-from fastapi import Body, FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.openapi.utils import get_openapi
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import HttpUrl, ValidationError
+from pydantic.json_schema import models_json_schema
 
-from models.validator_models import TripValidatorRequest, TripValidatorResponse
+from core.config import settings
+from core.metrics import REQUEST_SECONDS, RequestClockMiddleware, metrics, start_timer
+from models.validator_models import (
+    JobPriority,
+    TripValidatorBatchError,
+    TripValidatorBatchItem,
+    TripValidatorInput,
+    TripValidatorJob,
+    TripValidatorRequest,
+    TripValidatorResponse,
+    TripValidatorStreamEvent,
+)
+from parsers.request_parsers import BatchTooLargeError, parse_request, parse_request_batch
+from services.job_queue import JobQueue, create_job_queue
 from services.validation_service import ValidationService
 
-app = FastAPI(title="TripValidator")
 
+# Dicts of /stats keyed by configured names, exposed as labels rather than as parts of the metric name.
+STATS_LABELS = {"router": "backend", "prevalidation_rule_hits": "rule"}
 
-@app.post("/route")
-async def create_itinerary(request: Annotated[TripValidatorRequest, Body()]) -> TripValidatorResponse:
-    start_time = time.time()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     validation_service = ValidationService()
+    await validation_service.start()
+    app.state.validation_service = validation_service
+    metrics.register_collector(validation_service.stats, labels=STATS_LABELS)
+    job_queue = create_job_queue(validation_service)
+    if job_queue is not None:
+        await job_queue.start()
+        metrics.register_collector(job_queue.stats_collector)
+    app.state.job_queue = job_queue
+    try:
+        yield
+    finally:
+        if job_queue is not None:
+            metrics.unregister_collector(job_queue.stats_collector)
+            await job_queue.close()
+        metrics.unregister_collector(validation_service.stats)
+        await validation_service.close()
+
+
+app = FastAPI(title="TripValidator", lifespan=lifespan)
+app.add_middleware(RequestClockMiddleware)
+
+
+def get_validation_service(request: Request) -> ValidationService:
+    return request.app.state.validation_service
+
+
+def get_job_queue(request: Request) -> JobQueue:
+    job_queue: Optional[JobQueue] = request.app.state.job_queue
+    if job_queue is None:
+        raise HTTPException(status_code=503, detail="Async jobs are disabled (JOBS_ENABLED=false)")
+    return job_queue
+
+
+async def read_trip_request(request: Request) -> TripValidatorRequest:
+    """Validates the raw body in one pass, deferring reviews and pictures when INGESTION_MODE=fast."""
+    try:
+        return parse_request(await request.body(), settings.ingestion_mode)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+
+async def read_trip_batch(request: Request) -> List[Union[TripValidatorRequest, ValidationError]]:
+    try:
+        return parse_request_batch(await request.body(), settings.ingestion_mode, settings.batch_max_items)
+    except BatchTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+
+def request_body(schema: dict[str, Any]) -> dict[str, Any]:
+    """OpenAPI request body for routes reading their body through read_trip_request or read_trip_batch."""
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": schema}}}}
+
+
+TRIP_REQUEST_SCHEMA = {"$ref": "#/components/schemas/TripValidatorRequest"}
+
+
+def openapi() -> dict[str, Any]:
+    if app.openapi_schema is None:
+        schema = get_openapi(title=app.title, version=app.version, routes=app.routes)
+        _, definitions = models_json_schema(
+            [(TripValidatorRequest, "validation")], ref_template="#/components/schemas/{model}"
+        )
+        schema.setdefault("components", {}).setdefault("schemas", {}).update(definitions["$defs"])
+        app.openapi_schema = schema
+    return app.openapi_schema
+
+
+app.openapi = openapi  # type: ignore
+
+
+@app.post("/route", response_model=TripValidatorResponse, openapi_extra=request_body(TRIP_REQUEST_SCHEMA))
+async def create_itinerary(
+    http_request: Request,
+    request: Annotated[TripValidatorRequest, Depends(read_trip_request)],
+    validation_service: Annotated[ValidationService, Depends(get_validation_service)],
+) -> Response:
+    start_time = getattr(http_request.state, "received_at", None) or time.perf_counter()
+    timer = start_timer(start_time)
+    if timer is not None:
+        timer.record("request_validation", time.perf_counter() - start_time)
     try:
         response = await validation_service.validate_itinerary(request.input_data)
-        processing_time = time.time() - start_time
-        response.processing_time = processing_time
-        return response
+        response.processing_time = time.perf_counter() - start_time
+        if timer is None:
+            return Response(response.model_dump_json(), media_type="application/json")
+
+        response.stage_timings = dict(timer.stages)
+        with timer.stage("serialization"):
+            body = response.model_dump_json()
+        REQUEST_SECONDS.observe(timer.elapsed(), "/route")
+        return Response(body, media_type="application/json")
     except HTTPException as e:
         raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
 
 
+@app.post("/route/stream", openapi_extra=request_body(TRIP_REQUEST_SCHEMA))
+async def create_itinerary_stream(
+    request: Annotated[TripValidatorRequest, Depends(read_trip_request)],
+    validation_service: Annotated[ValidationService, Depends(get_validation_service)],
+) -> StreamingResponse:
+    async def stream_events() -> AsyncIterator[str]:
+        try:
+            async for event in validation_service.validate_itinerary_stream(request.input_data):
+                yield event.model_dump_json() + "\n"
+        except HTTPException as e:
+            error = TripValidatorBatchError(status_code=e.status_code, detail=str(e.detail))
+            yield TripValidatorStreamEvent(event="error", error=error).model_dump_json() + "\n"
+        except Exception as e:
+            error = TripValidatorBatchError(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
+            yield TripValidatorStreamEvent(event="error", error=error).model_dump_json() + "\n"
+
+    return StreamingResponse(stream_events(), media_type="application/x-ndjson")
+
+
+@app.post("/route/batch", openapi_extra=request_body({"type": "array", "items": TRIP_REQUEST_SCHEMA}))
+async def create_itinerary_batch(
+    requests: Annotated[List[Union[TripValidatorRequest, ValidationError]], Depends(read_trip_batch)],
+    validation_service: Annotated[ValidationService, Depends(get_validation_service)],
+) -> StreamingResponse:
+    async def stream_results() -> AsyncIterator[str]:
+        indices: List[int] = []
+        batch: List[TripValidatorInput] = []
+        for index, request in enumerate(requests):
+            if isinstance(request, ValidationError):
+                error = TripValidatorBatchError(status_code=422, detail=str(request))
+                yield TripValidatorBatchItem(index=index, error=error).model_dump_json() + "\n"
+            else:
+                indices.append(index)
+                batch.append(request.input_data)
+        async for item in validation_service.validate_batch(batch, concurrency=settings.batch_concurrency):
+            item.index = indices[item.index]
+            yield item.model_dump_json() + "\n"
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+@app.post(
+    "/jobs", status_code=202, response_model=TripValidatorJob, openapi_extra=request_body(TRIP_REQUEST_SCHEMA)
+)
+async def create_job(
+    request: Annotated[TripValidatorRequest, Depends(read_trip_request)],
+    job_queue: Annotated[JobQueue, Depends(get_job_queue)],
+    priority: JobPriority = "normal",
+    webhook_url: Optional[HttpUrl] = None,
+) -> TripValidatorJob:
+    """Queues the validation and returns at once; poll GET /jobs/{job_id} or wait for the webhook."""
+    return await job_queue.submit(request, priority, str(webhook_url) if webhook_url is not None else None)
+
+
+@app.get("/jobs/{job_id}", response_model=TripValidatorJob)
+async def get_job(job_id: str, job_queue: Annotated[JobQueue, Depends(get_job_queue)]) -> TripValidatorJob:
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """Prometheus text exposition of the request-path metrics and the /stats counters."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/stats")
+async def get_stats(
+    request: Request,
+    validation_service: Annotated[ValidationService, Depends(get_validation_service)],
+) -> dict[str, Any]:
+    job_queue: Optional[JobQueue] = request.app.state.job_queue
+    if job_queue is None:
+        return validation_service.stats()
+    return {**validation_service.stats(), **job_queue.stats_collector()}
+
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request, exc):
     return JSONResponse(status_code=422, content={"detail": str(exc)})
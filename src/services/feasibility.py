@@ -0,0 +1,130 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional, Sequence
+
+import numpy as np
+
+from core.config import Settings, settings
+from models.base_models import TransportationMethod
+from models.trip_models import Itinerary
+
+EARTH_RADIUS_KM = 6371.0088
+METHODS = list(TransportationMethod)
+METHOD_INDEX = {method: index for index, method in enumerate(METHODS)}
+
+
+def as_utc(moment: datetime) -> datetime:
+    """Aware copy of ``moment``; naive datetimes are taken to be in UTC, never in the host's local time."""
+    return moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment
+
+
+def haversine_km(
+    start_latitude: np.ndarray, start_longitude: np.ndarray, end_latitude: np.ndarray, end_longitude: np.ndarray
+) -> np.ndarray:
+    start_latitude, start_longitude, end_latitude, end_longitude = map(
+        np.radians, (start_latitude, start_longitude, end_latitude, end_longitude)
+    )
+    half_chord = (
+        np.sin((end_latitude - start_latitude) / 2) ** 2
+        + np.cos(start_latitude) * np.cos(end_latitude) * np.sin((end_longitude - start_longitude) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(half_chord, 0.0, 1.0)))
+
+
+@dataclass
+class FeasibilityReport:
+    """Per-segment distances, durations and implied speeds of one itinerary."""
+
+    distances_km: np.ndarray
+    durations_h: np.ndarray
+    speeds_kmh: np.ndarray
+    max_speeds_kmh: np.ndarray
+    methods: list[TransportationMethod]
+    infeasible: np.ndarray
+
+    @property
+    def is_feasible(self) -> bool:
+        return not self.infeasible.any()
+
+    def violation(self) -> Optional[str]:
+        if self.is_feasible:
+            return None
+        return " ".join(
+            f"Segment {index} needs {self.speeds_kmh[index]:.0f} km/h by {self.methods[index].value} "
+            f"(limit {self.max_speeds_kmh[index]:.0f} km/h)."
+            for index in np.flatnonzero(self.infeasible)
+        )
+
+    def summary(self, indices: Optional[Sequence[int]] = None) -> str:
+        """One line per segment (or per segment in ``indices``), suitable for enriching the model prompt."""
+        return "\n".join(
+            f"Segment {index}: {self.distances_km[index]:.2f} km in {self.durations_h[index]:.2f} h "
+            f"({self.speeds_kmh[index]:.1f} km/h by {self.methods[index].value})"
+            for index in (range(len(self.methods)) if indices is None else indices)
+        )
+
+
+class FeasibilityChecker:
+    """Computes segment distances and implied speeds for many itineraries in one vectorized pass."""
+
+    def __init__(self, max_speeds_kmh: dict[TransportationMethod, float]):
+        self.max_speeds_kmh = np.array([max_speeds_kmh[method] for method in METHODS], dtype=np.float64)
+
+    def assess(self, itinerary: Itinerary) -> FeasibilityReport:
+        return self.assess_batch([itinerary])[0]
+
+    def assess_batch(self, itineraries: Sequence[Itinerary]) -> list[FeasibilityReport]:
+        values: list[float] = []
+        methods: list[TransportationMethod] = []
+        for itinerary in itineraries:
+            for segment in itinerary.segments:
+                start = segment.start_point.location.coordinates
+                end = segment.end_point.location.coordinates
+                values += (
+                    start.latitude,
+                    start.longitude,
+                    end.latitude,
+                    end.longitude,
+                    (as_utc(segment.arrival_time) - as_utc(segment.departure_time)).total_seconds(),
+                )
+                methods.append(segment.transportation_method)
+
+        columns = np.array(values, dtype=np.float64).reshape(-1, 5)
+        distances = haversine_km(columns[:, 0], columns[:, 1], columns[:, 2], columns[:, 3])
+        durations = columns[:, 4] / 3600
+        with np.errstate(divide="ignore", invalid="ignore"):
+            speeds = np.where(durations > 0, distances / durations, np.where(distances > 0, np.inf, 0.0))
+        limits = self.max_speeds_kmh[np.fromiter((METHOD_INDEX[method] for method in methods), np.intp, len(methods))]
+        infeasible = speeds > limits
+
+        reports = []
+        offset = 0
+        for itinerary in itineraries:
+            end = offset + len(itinerary.segments)
+            reports.append(
+                FeasibilityReport(
+                    distances_km=distances[offset:end],
+                    durations_h=durations[offset:end],
+                    speeds_kmh=speeds[offset:end],
+                    max_speeds_kmh=limits[offset:end],
+                    methods=methods[offset:end],
+                    infeasible=infeasible[offset:end],
+                )
+            )
+            offset = end
+
+        return reports
+
+
+def create_feasibility_checker(config: Settings = settings) -> Optional[FeasibilityChecker]:
+    if not config.feasibility_enabled:
+        return None
+
+    return FeasibilityChecker(
+        max_speeds_kmh={
+            TransportationMethod.WALKING: config.feasibility_max_speed_walking,
+            TransportationMethod.BICYCLE: config.feasibility_max_speed_bicycle,
+            TransportationMethod.PUBLIC_TRANSPORT: config.feasibility_max_speed_public_transport,
+            TransportationMethod.CAR: config.feasibility_max_speed_car,
+        }
+    )
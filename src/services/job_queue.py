@@ -0,0 +1,572 @@
+import asyncio
+import ipaddress
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Iterator, Optional, Union
+from urllib.parse import urlsplit
+
+import aiohttp
+from aiohttp.abc import AbstractResolver, ResolveResult
+from aiohttp.resolver import DefaultResolver
+from fastapi import HTTPException
+
+from core.config import Settings, settings
+from core.http_client import create_client_session
+from core.metrics import start_timer
+from models.validator_models import (
+    JobPriority,
+    JobStatus,
+    TripValidatorBatchError,
+    TripValidatorJob,
+    TripValidatorRequest,
+    TripValidatorResponse,
+)
+from parsers.request_parsers import parse_request
+from services.response_cache import canonical_key
+from services.validation_service import ValidationService
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES: dict[JobPriority, int] = {"high": 2, "normal": 1, "low": 0}
+PRIORITY_NAMES: dict[int, JobPriority] = {value: name for name, value in PRIORITIES.items()}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    input_key TEXT NOT NULL,
+    webhook_url TEXT,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    request TEXT NOT NULL,
+    response TEXT,
+    error TEXT,
+    owner TEXT,
+    lease_expires_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_lane ON jobs (status, priority DESC, created_at);
+CREATE INDEX IF NOT EXISTS jobs_input ON jobs (input_key, status);
+"""
+
+
+class QueueFullError(HTTPException):
+    def __init__(self, limit: int):
+        super().__init__(
+            status_code=429, detail=f"Job queue is full ({limit} jobs queued)", headers={"Retry-After": "5"}
+        )
+
+
+class JobStoreError(HTTPException):
+    def __init__(self, error: sqlite3.Error):
+        super().__init__(status_code=503, detail=f"Job store unavailable: {error}", headers={"Retry-After": "5"})
+
+
+class WebhookRejectedError(HTTPException):
+    def __init__(self, reason: str):
+        super().__init__(status_code=422, detail=f"webhook_url rejected: {reason}")
+
+
+IPAddress = Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+
+
+def _is_public(address: IPAddress) -> bool:
+    if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped is not None:
+        address = address.ipv4_mapped
+    return address.is_global and not address.is_multicast
+
+
+class WebhookPolicy:
+    """Decides where finished jobs may be posted: allowlisted hosts only, and never a private address.
+
+    An allowed host starting with a dot also allows its subdomains. Literal addresses are checked here, and names are
+    checked once resolved by ``PublicResolver``, so a name pointing at a private network is refused at delivery.
+    """
+
+    def __init__(self, allowed_hosts: list[str]):
+        self.allowed_hosts = [host.lower().rstrip(".") for host in allowed_hosts]
+
+    def check(self, url: str) -> None:
+        parts = urlsplit(url)
+        host = (parts.hostname or "").rstrip(".")
+        if parts.scheme not in ("http", "https") or not host:
+            raise WebhookRejectedError("only http and https URLs with a host are accepted")
+        if not any(
+            host == allowed or (allowed.startswith(".") and host.endswith(allowed)) for allowed in self.allowed_hosts
+        ):
+            raise WebhookRejectedError(f"host {host} is not in JOBS_WEBHOOK_ALLOWED_HOSTS")
+        try:
+            address = ipaddress.ip_address(host)
+        except ValueError:
+            return
+        if not _is_public(address):
+            raise WebhookRejectedError(f"{host} is not a public address")
+
+
+class PublicResolver(AbstractResolver):
+    """DNS resolver that drops private, loopback and link-local addresses, so webhooks cannot reach internal hosts."""
+
+    def __init__(self) -> None:
+        self._resolver = DefaultResolver()
+
+    async def resolve(
+        self, host: str, port: int = 0, family: socket.AddressFamily = socket.AF_INET
+    ) -> list[ResolveResult]:
+        addresses = [
+            address
+            for address in await self._resolver.resolve(host, port, family)
+            if _is_public(ipaddress.ip_address(address["host"]))
+        ]
+        if not addresses:
+            raise OSError(f"{host} resolves to no public address")
+        return addresses
+
+    async def close(self) -> None:
+        await self._resolver.close()
+
+
+@dataclass
+class Job:
+    job_id: str
+    status: JobStatus
+    priority: int
+    request: str
+    webhook_url: Optional[str]
+    response: Optional[str]
+    error: Optional[str]
+    attempts: int
+    created_at: float
+    updated_at: float
+    deduplicated: bool = False
+
+    def view(self) -> TripValidatorJob:
+        return TripValidatorJob(
+            job_id=self.job_id,
+            status=self.status,
+            priority=PRIORITY_NAMES[self.priority],
+            deduplicated=self.deduplicated,
+            created_at=datetime.fromtimestamp(self.created_at, timezone.utc),
+            updated_at=datetime.fromtimestamp(self.updated_at, timezone.utc),
+            response=TripValidatorResponse.model_validate_json(self.response) if self.response else None,
+            error=TripValidatorBatchError.model_validate_json(self.error) if self.error else None,
+        )
+
+
+_COLUMNS = "job_id, status, priority, request, webhook_url, response, error, attempts, created_at, updated_at"
+
+
+class JobStore:
+    """Durable job table in a local SQLite file (WAL), safe to share between processes.
+
+    Running jobs hold a lease in the name of their owner (host and pid), renewed while the job runs. Jobs of owners
+    that died on this host are requeued when a queue starts, and any job whose lease expired can be claimed again.
+    """
+
+    def __init__(self, path: str, lease_timeout: float):
+        self.path = path
+        self.lease_timeout = lease_timeout
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._connection
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+    def enqueue(
+        self, request: str, input_key: str, priority: int, webhook_url: Optional[str], max_queued: int
+    ) -> Job:
+        """Queues a job, or returns the pending job with the same input and webhook, raised to ``priority``."""
+        now = time.time()
+        with self._transaction() as connection:
+            row = connection.execute(
+                f"SELECT {_COLUMNS} FROM jobs WHERE input_key = ? AND webhook_url IS ? "
+                "AND status IN ('queued', 'running') LIMIT 1",
+                (input_key, webhook_url),
+            ).fetchone()
+            if row is not None:
+                job = Job(*row, deduplicated=True)
+                if priority > job.priority:
+                    connection.execute("UPDATE jobs SET priority = ? WHERE job_id = ?", (priority, job.job_id))
+                    job.priority = priority
+                return job
+
+            (queued,) = connection.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()
+            if queued >= max_queued:
+                raise QueueFullError(max_queued)
+            job = Job(uuid.uuid4().hex, "queued", priority, request, webhook_url, None, None, 0, now, now)
+            connection.execute(
+                "INSERT INTO jobs (job_id, input_key, webhook_url, priority, status, request, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (job.job_id, input_key, webhook_url, priority, request, now, now),
+            )
+            return job
+
+    def claim(self, owner: str) -> Optional[Job]:
+        """Leases the highest-priority, oldest queued job (or one whose lease expired) to ``owner``."""
+        now = time.time()
+        with self._transaction() as connection:
+            row = connection.execute(
+                f"SELECT {_COLUMNS} FROM jobs WHERE status = 'queued' "
+                "OR (status = 'running' AND lease_expires_at < ?) ORDER BY priority DESC, created_at LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            job = Job(*row)
+            job.status, job.attempts, job.updated_at = "running", job.attempts + 1, now
+            connection.execute(
+                "UPDATE jobs SET status = 'running', owner = ?, lease_expires_at = ?, attempts = ?, updated_at = ? "
+                "WHERE job_id = ?",
+                (owner, now + self.lease_timeout, job.attempts, now, job.job_id),
+            )
+            return job
+
+    def renew(self, job_id: str, owner: str) -> bool:
+        """Extends the lease ``owner`` holds on a running job; False once the job is finished or leased to another."""
+        with self._transaction() as connection:
+            return (
+                connection.execute(
+                    "UPDATE jobs SET lease_expires_at = ? WHERE job_id = ? AND owner = ? AND status = 'running'",
+                    (time.time() + self.lease_timeout, job_id, owner),
+                ).rowcount
+                > 0
+            )
+
+    def finish(
+        self, job_id: str, status: JobStatus, response: Optional[str] = None, error: Optional[str] = None
+    ) -> None:
+        with self._transaction() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, response = ?, error = ?, owner = NULL, lease_expires_at = NULL, "
+                "updated_at = ? WHERE job_id = ?",
+                (status, response, error, time.time(), job_id),
+            )
+
+    def release(self, owner: str) -> int:
+        """Puts the running jobs of ``owner`` back in the queue."""
+        with self._transaction() as connection:
+            return connection.execute(
+                "UPDATE jobs SET status = 'queued', owner = NULL, lease_expires_at = NULL, updated_at = ? "
+                "WHERE status = 'running' AND owner = ?",
+                (time.time(), owner),
+            ).rowcount
+
+    def recover(self, hostname: str) -> int:
+        """Requeues running jobs whose owner process on ``hostname`` no longer exists."""
+        with self._transaction() as connection:
+            owners = [row[0] for row in connection.execute("SELECT DISTINCT owner FROM jobs WHERE status = 'running'")]
+            dead = [owner for owner in owners if owner and _is_dead(owner, hostname)]
+            recovered = 0
+            for owner in dead:
+                recovered += connection.execute(
+                    "UPDATE jobs SET status = 'queued', owner = NULL, lease_expires_at = NULL "
+                    "WHERE status = 'running' AND owner = ?",
+                    (owner,),
+                ).rowcount
+            return recovered
+
+    def purge(self, older_than: float) -> int:
+        with self._transaction() as connection:
+            return connection.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?", (older_than,)
+            ).rowcount
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._connection.execute(f"SELECT {_COLUMNS} FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return Job(*row) if row is not None else None
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+def _is_dead(owner: str, hostname: str) -> bool:
+    host, _, pid = owner.rpartition(":")
+    if host != hostname or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        return False
+    return False
+
+
+@dataclass
+class JobQueueStats:
+    submitted: int = 0
+    deduplicated: int = 0
+    rejected: int = 0
+    recovered: int = 0
+    done: int = 0
+    failed: int = 0
+    abandoned: int = 0
+    webhooks_sent: int = 0
+    webhooks_failed: int = 0
+    webhooks_rejected: int = 0
+
+
+class JobQueue:
+    """Runs queued validations on a pool of asyncio workers and notifies optional webhooks."""
+
+    def __init__(
+        self,
+        store: JobStore,
+        validation_service: ValidationService,
+        workers: int,
+        max_queued: int,
+        max_attempts: int,
+        retention: float,
+        poll_interval: float = 1.0,
+        webhook_policy: Optional[WebhookPolicy] = None,
+    ):
+        self.store = store
+        self.validation_service = validation_service
+        self.workers = workers
+        self.max_queued = max_queued
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self.poll_interval = poll_interval
+        self.webhook_policy = webhook_policy
+        self.hostname = socket.gethostname()
+        self.owner = f"{self.hostname}:{os.getpid()}"
+        self.stats = JobQueueStats()
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task[None]] = []
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._purged_at = 0.0
+
+    async def start(self) -> None:
+        try:
+            self.stats.recovered += await asyncio.to_thread(self.store.recover, self.hostname)
+        except sqlite3.Error as e:
+            logger.error(f"Could not requeue jobs left running by a crashed process: {e}")
+        if self.stats.recovered:
+            logger.warning(f"Requeued {self.stats.recovered} jobs left running by a crashed process")
+        self._session = create_client_session(resolver=PublicResolver())
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        try:
+            await asyncio.to_thread(self.store.release, self.owner)
+        except sqlite3.Error as e:
+            logger.error(f"Could not release running jobs, they are requeued once their lease expires: {e}")
+        if self._session is not None:
+            await self._session.close()
+        self.store.close()
+
+    async def submit(
+        self, request: TripValidatorRequest, priority: JobPriority = "normal", webhook_url: Optional[str] = None
+    ) -> TripValidatorJob:
+        if webhook_url is not None:
+            if self.webhook_policy is None:
+                raise WebhookRejectedError("webhooks are disabled (JOBS_WEBHOOKS_ENABLED=false)")
+            self.webhook_policy.check(webhook_url)
+        try:
+            job = await asyncio.to_thread(
+                self.store.enqueue,
+                request.model_dump_json(),
+                canonical_key(request.input_data),
+                PRIORITIES[priority],
+                webhook_url,
+                self.max_queued,
+            )
+        except QueueFullError:
+            self.stats.rejected += 1
+            raise
+        except sqlite3.Error as e:
+            logger.error(f"Could not queue a job: {e}")
+            raise JobStoreError(e) from e
+        if job.deduplicated:
+            self.stats.deduplicated += 1
+        else:
+            self.stats.submitted += 1
+            self._wakeup.set()
+        return job.view()
+
+    async def get(self, job_id: str) -> Optional[TripValidatorJob]:
+        try:
+            job = await asyncio.to_thread(self.store.get, job_id)
+        except sqlite3.Error as e:
+            logger.error(f"Could not read job {job_id}: {e}")
+            raise JobStoreError(e) from e
+        return job.view() if job is not None else None
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                await self._work()
+            except Exception as e:
+                # The worker must outlive any one job: a job left running is requeued once its lease expires.
+                logger.error(f"Job worker iteration failed: {e!r}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _work(self) -> None:
+        self._wakeup.clear()
+        try:
+            job = await asyncio.to_thread(self.store.claim, self.owner)
+        except sqlite3.Error as e:
+            logger.error(f"Could not claim a job: {e}")
+            job = None
+        if job is None:
+            await self._purge()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            return
+        await self._run(job)
+
+    async def _run(self, job: Job) -> None:
+        if job.attempts > self.max_attempts:
+            self.stats.abandoned += 1
+            error = TripValidatorBatchError(
+                status_code=500, detail=f"Job abandoned after {self.max_attempts} interrupted attempts"
+            )
+            await self._finish(job, "failed", error=error)
+            return
+
+        lease = asyncio.create_task(self._hold_lease(job))
+        try:
+            await self._validate(job)
+        finally:
+            lease.cancel()
+
+    async def _hold_lease(self, job: Job) -> None:
+        """Renews the lease every third of its timeout, so a validation that outlasts it is not rerun elsewhere."""
+        while True:
+            await asyncio.sleep(self.store.lease_timeout / 3)
+            try:
+                held = await asyncio.to_thread(self.store.renew, job.job_id, self.owner)
+            except sqlite3.Error as e:
+                logger.error(f"Could not renew the lease of job {job.job_id}: {e}")
+                continue
+            if not held:
+                logger.warning(f"Lost the lease of job {job.job_id}, another worker may run it again")
+                return
+
+    async def _validate(self, job: Job) -> None:
+        start_time = time.perf_counter()
+        timer = start_timer(start_time)
+        try:
+            request = parse_request(job.request, settings.ingestion_mode)
+            response = await self.validation_service.validate_itinerary(request.input_data)
+        except HTTPException as e:
+            error = TripValidatorBatchError(status_code=e.status_code, detail=str(e.detail))
+            await self._finish(job, "failed", error=error)
+            return
+        except Exception as e:
+            logger.error(f"Job {job.job_id} failed: {e}")
+            error = TripValidatorBatchError(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
+            await self._finish(job, "failed", error=error)
+            return
+
+        response.processing_time = time.perf_counter() - start_time
+        if timer is not None:
+            response.stage_timings = dict(timer.stages)
+        await self._finish(job, "done", response=response)
+
+    async def _finish(
+        self,
+        job: Job,
+        status: JobStatus,
+        response: Optional[TripValidatorResponse] = None,
+        error: Optional[TripValidatorBatchError] = None,
+    ) -> None:
+        job.status = status
+        job.response = response.model_dump_json() if response is not None else None
+        job.error = error.model_dump_json() if error is not None else None
+        await asyncio.to_thread(self.store.finish, job.job_id, status, job.response, job.error)
+        if status == "done":
+            self.stats.done += 1
+        else:
+            self.stats.failed += 1
+        if job.webhook_url:
+            await self._notify(job)
+
+    async def _notify(self, job: Job) -> None:
+        """Posts the finished job to its webhook; delivery is best effort, the job stays available to poll.
+
+        The URL is checked again, as the policy may have changed since the job was queued, and redirects are not
+        followed so a webhook cannot bounce the request to a host outside the allowlist.
+        """
+        assert self._session is not None and job.webhook_url is not None
+        try:
+            if self.webhook_policy is None:
+                raise WebhookRejectedError("webhooks are disabled (JOBS_WEBHOOKS_ENABLED=false)")
+            self.webhook_policy.check(job.webhook_url)
+        except WebhookRejectedError as e:
+            self.stats.webhooks_rejected += 1
+            logger.warning(f"Webhook for job {job.job_id} not sent: {e.detail}")
+            return
+        job.updated_at = time.time()
+        try:
+            async with self._session.post(
+                job.webhook_url,
+                data=job.view().model_dump_json(),
+                headers={"Content-Type": "application/json"},
+                allow_redirects=False,
+            ) as response:
+                if response.status >= 300:
+                    raise aiohttp.ClientResponseError(
+                        response.request_info, response.history, status=response.status
+                    )
+            self.stats.webhooks_sent += 1
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.stats.webhooks_failed += 1
+            logger.error(f"Webhook for job {job.job_id} failed: {e}")
+
+    async def _purge(self) -> None:
+        now = time.time()
+        if now - self._purged_at < 60:
+            return
+        self._purged_at = now
+        try:
+            await asyncio.to_thread(self.store.purge, now - self.retention)
+        except sqlite3.Error as e:
+            logger.error(f"Could not purge finished jobs: {e}")
+
+    def snapshot(self) -> dict[str, Any]:
+        return {**asdict(self.stats), "workers": len(self._tasks)}
+
+    def stats_collector(self) -> dict[str, Any]:
+        return {"jobs": self.snapshot()}
+
+
+def create_job_queue(validation_service: ValidationService, config: Settings = settings) -> Optional[JobQueue]:
+    if not config.jobs_enabled:
+        return None
+
+    return JobQueue(
+        store=JobStore(config.jobs_sqlite_path, lease_timeout=config.jobs_lease_timeout),
+        validation_service=validation_service,
+        workers=config.jobs_workers,
+        max_queued=config.jobs_max_queued,
+        max_attempts=config.jobs_max_attempts,
+        retention=config.jobs_retention,
+        webhook_policy=WebhookPolicy(config.jobs_webhook_allowed_hosts) if config.jobs_webhooks_enabled else None,
+    )
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Generic, List, Optional, Sequence, TypeVar
+
+from core.config import Settings, settings
+from parsers.validator_parsers import ModelResponseError
+
+logger = logging.getLogger(__name__)
+
+I = TypeVar("I")
+T = TypeVar("T")
+
+# Weight of the latest gap between submissions in the moving average that decides whether waiting is worth it.
+ARRIVAL_SMOOTHING = 0.2
+# Gaps are capped at this many windows so that a burst after an idle period starts batching within a few items.
+MAX_GAP_WINDOWS = 4
+
+
+@dataclass
+class MicroBatchStats:
+    batches: int = 0
+    batched_items: int = 0
+    singles: int = 0
+    fallbacks: int = 0
+    batch_failures: int = 0
+
+
+@dataclass
+class _Pending(Generic[I, T]):
+    item: I
+    tokens: int
+    future: "asyncio.Future[T]"
+
+
+class MicroBatcher(Generic[I, T]):
+    """Gathers concurrent items for up to ``window`` seconds and sends them in one call.
+
+    A batch is flushed when its window elapses, when it holds ``max_items`` items or when its items reach
+    ``token_budget`` tokens. While submissions arrive further apart than the window, items are sent alone
+    at once instead of waiting for company that is not coming. ``flush`` answers a batch with one result per
+    item, None for an item it could not answer; those items, a lone item and every item of a batch whose
+    answer was malformed go through ``single``. Other errors of a batch call reach all of its waiters.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[Sequence[I]], Awaitable[Sequence[Optional[T]]]],
+        single: Callable[[I], Awaitable[T]],
+        window: float,
+        max_items: int,
+        token_budget: int,
+    ):
+        self.flush = flush
+        self.single = single
+        self.window = window
+        self.max_items = max_items
+        self.token_budget = token_budget
+        self.stats = MicroBatchStats()
+        self._pending: List[_Pending[I, T]] = []
+        self._tokens = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._last_arrival: Optional[float] = None
+        self._arrival_gap: Optional[float] = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def submit(self, item: I, tokens: int) -> T:
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if self._last_arrival is not None:
+            gap = min(now - self._last_arrival, MAX_GAP_WINDOWS * self.window)
+            self._arrival_gap = gap if self._arrival_gap is None else self._arrival_gap + ARRIVAL_SMOOTHING * (
+                gap - self._arrival_gap
+            )
+        self._last_arrival = now
+
+        if not self._pending and (self._arrival_gap is None or self._arrival_gap > self.window):
+            self.stats.singles += 1
+            return await self.single(item)
+
+        if self._pending and self._tokens + tokens > self.token_budget:
+            self._flush()
+        pending: _Pending[I, T] = _Pending(item, tokens, loop.create_future())
+        self._pending.append(pending)
+        self._tokens += tokens
+        if len(self._pending) >= self.max_items or self._tokens >= self.token_budget:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await asyncio.shield(pending.future)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._tokens = self._pending, [], 0
+        if batch:
+            task = asyncio.ensure_future(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: List[_Pending[I, T]]) -> None:
+        if len(batch) == 1:
+            self.stats.singles += 1
+            await self._resolve(batch[0], self.single(batch[0].item))
+            return
+
+        self.stats.batches += 1
+        self.stats.batched_items += len(batch)
+        try:
+            results: Sequence[Optional[T]] = await self.flush([pending.item for pending in batch])
+        except ModelResponseError as e:
+            logger.warning(f"Malformed answer for a batch of {len(batch)}, validating its items one by one: {e}")
+            self.stats.batch_failures += 1
+            results = [None] * len(batch)
+        except Exception as e:
+            self.stats.batch_failures += 1
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+            return
+
+        retries = []
+        for pending, result in zip(batch, results):
+            if result is None:
+                self.stats.fallbacks += 1
+                retries.append(self._resolve(pending, self.single(pending.item)))
+            elif not pending.future.done():
+                pending.future.set_result(result)
+        await asyncio.gather(*retries)
+
+    async def _resolve(self, pending: _Pending[I, T], call: Awaitable[T]) -> None:
+        try:
+            result = await call
+        except Exception as e:
+            if not pending.future.done():
+                pending.future.set_exception(e)
+            return
+        if not pending.future.done():
+            pending.future.set_result(result)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {**asdict(self.stats), "pending": len(self._pending), "arrival_gap": self._arrival_gap}
+
+
+def create_micro_batcher(
+    flush: Callable[[Sequence[I]], Awaitable[Sequence[Optional[T]]]],
+    single: Callable[[I], Awaitable[T]],
+    config: Settings = settings,
+) -> Optional[MicroBatcher[I, T]]:
+    if not config.micro_batch_enabled:
+        return None
+
+    return MicroBatcher(
+        flush,
+        single,
+        window=config.micro_batch_window,
+        max_items=config.micro_batch_max_items,
+        token_budget=config.micro_batch_token_budget,
+    )
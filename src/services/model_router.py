@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, List, Optional, Sequence, Union
+
+from fastapi import HTTPException
+
+from core.config import Settings, UpstreamBackend, settings
+from services.shared_state import SharedStateStore, SharedTokenBucket
+from services.upstream_policy import CircuitBreaker, CircuitOpenError, is_retryable, retry_after_seconds
+
+logger = logging.getLogger(__name__)
+
+# Error rates are capped so that a backend that failed every recent call still gets the odd probe.
+MAX_ERROR_RATE = 0.95
+
+
+class TokenBucket:
+    """Tokens-per-minute budget refilled continuously; a call larger than the whole budget waits for a full bucket."""
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60
+        self.tokens = self.capacity
+        self._updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def wait_time(self, tokens: int) -> float:
+        self._refill()
+        return max(0.0, min(tokens, self.capacity) - self.tokens) / self.rate
+
+    async def acquire(self, tokens: int) -> None:
+        needed = min(tokens, self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= needed:
+                self.tokens -= needed
+                return
+            await asyncio.sleep((needed - self.tokens) / self.rate)
+
+
+@dataclass
+class BackendStats:
+    calls: int = 0
+    failures: int = 0
+    rate_limited: int = 0
+    tokens: int = 0
+    cost: float = 0.0
+
+
+class Backend:
+    """Live state of one upstream: rolling latency and errors, in-flight calls, rate limits and circuit."""
+
+    def __init__(
+        self,
+        config: UpstreamBackend,
+        api_key: Optional[str],
+        latency_window: int,
+        breaker: Optional[CircuitBreaker] = None,
+        bucket: Optional[Union[TokenBucket, SharedTokenBucket]] = None,
+    ):
+        self.config = config
+        self.name = config.name
+        self.url = config.url
+        self.model = config.model
+        self.api_key = api_key
+        self.breaker = breaker
+        if bucket is None and config.tokens_per_minute:
+            bucket = TokenBucket(config.tokens_per_minute)
+        self.bucket = bucket
+        self.semaphore = asyncio.Semaphore(config.max_concurrency)
+        self.in_flight = 0
+        self.latency: Optional[float] = None
+        self.cooldown_until = 0.0
+        self.stats = BackendStats()
+        self._alpha = 2 / (latency_window + 1)
+        self._outcomes: deque[bool] = deque(maxlen=latency_window)
+
+    @property
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return min(MAX_ERROR_RATE, self._outcomes.count(False) / len(self._outcomes))
+
+    def cost(self, prompt_tokens: int, completion_tokens: int) -> float:
+        return (prompt_tokens * self.config.prompt_cost + completion_tokens * self.config.completion_cost) / 1000
+
+    def fits(self, size: int) -> bool:
+        return self.config.max_segments is None or size <= self.config.max_segments
+
+    def available(self) -> bool:
+        return self.breaker is None or self.breaker.allow()
+
+    def expected_seconds(self, tokens: int) -> float:
+        """Latency, stretched by the queue ahead of the call and by retries, plus any wait for rate-limit tokens."""
+        latency = self.latency or 0.0
+        queued = self.in_flight / self.config.max_concurrency
+        wait = self.bucket.wait_time(tokens) if self.bucket is not None else 0.0
+        return latency * (1 + queued) / (1 - self.error_rate) + wait
+
+    def observe(self, seconds: float) -> None:
+        self.latency = seconds if self.latency is None else self.latency + self._alpha * (seconds - self.latency)
+
+    def record_success(self, seconds: float) -> None:
+        self.observe(seconds)
+        self._outcomes.append(True)
+        if self.breaker is not None:
+            self.breaker.record_success()
+
+    def record_failure(self, error: BaseException) -> None:
+        self.stats.failures += 1
+        self._outcomes.append(False)
+        if self.breaker is not None:
+            self.breaker.record_failure()
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            self.stats.rate_limited += 1
+            self.cooldown_until = max(self.cooldown_until, time.monotonic() + retry_after)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            **asdict(self.stats),
+            "model": self.model,
+            "in_flight": self.in_flight,
+            "latency": self.latency,
+            "error_rate": self.error_rate,
+            "tokens_available": self.bucket.tokens if self.bucket is not None else None,
+            "circuit_state": self.breaker.state if self.breaker is not None else None,
+        }
+
+
+class ModelRouter:
+    """Picks the backend with the lowest expected latency plus weighted cost for each upstream attempt.
+
+    Backends that cannot take the itinerary (``max_segments``), whose circuit is open or that asked us to back
+    off with Retry-After are skipped while any other backend is left. A rate-limited backend's Retry-After
+    is kept as its cooldown and not passed on, so the retry goes to another backend without waiting.
+    """
+
+    def __init__(self, backends: Sequence[Backend], cost_weight: float, completion_tokens: int):
+        if not backends:
+            raise ValueError("The model router needs at least one backend")
+        self.backends = list(backends)
+        self.cost_weight = cost_weight
+        self.completion_tokens = completion_tokens
+
+    def score(self, backend: Backend, prompt_tokens: int) -> float:
+        tokens = prompt_tokens + self.completion_tokens
+        return backend.expected_seconds(tokens) + self.cost_weight * backend.cost(prompt_tokens, self.completion_tokens)
+
+    def select(self, prompt_tokens: int, size: int) -> Backend:
+        candidates = [backend for backend in self.backends if backend.fits(size)] or self.backends
+        now = time.monotonic()
+        ready = [backend for backend in candidates if backend.cooldown_until <= now]
+        candidates = ready or sorted(candidates, key=lambda backend: backend.cooldown_until)[:1]
+        # Circuit probes are only taken for the backend that is actually used.
+        for backend in sorted(candidates, key=lambda backend: self.score(backend, prompt_tokens)):
+            if backend.available():
+                return backend
+        raise CircuitOpenError()
+
+    @asynccontextmanager
+    async def route(self, prompt_tokens: int, size: int) -> AsyncIterator[Backend]:
+        """Holds a concurrency slot and the rate-limit tokens of the chosen backend for one attempt."""
+        backend = self.select(prompt_tokens, size)
+        # select() took the circuit probe if the backend was half-open: it is released if the attempt ends
+        # without an outcome (cancelled, or failed before the call was made).
+        probing = backend.breaker is not None and backend.breaker.state == "half-open"
+        tokens = prompt_tokens + self.completion_tokens
+        backend.in_flight += 1
+        try:
+            async with backend.semaphore:
+                if backend.bucket is not None:
+                    await backend.bucket.acquire(tokens)
+                backend.stats.calls += 1
+                backend.stats.tokens += tokens
+                backend.stats.cost += backend.cost(prompt_tokens, self.completion_tokens)
+                start = time.monotonic()
+                try:
+                    yield backend
+                except Exception as e:
+                    if not is_retryable(e):
+                        # The backend answered; the error is about the request, as in UpstreamPolicy.call.
+                        backend.record_success(time.monotonic() - start)
+                        raise e
+                    backend.record_failure(e)
+                    if isinstance(e, HTTPException) and e.headers and len(self.backends) > 1:
+                        raise HTTPException(status_code=e.status_code, detail=e.detail) from e
+                    raise e
+                except BaseException:
+                    # Hedged, timed out or abandoned by the client: the backend was at least this slow.
+                    backend.observe(time.monotonic() - start)
+                    raise
+                else:
+                    backend.record_success(time.monotonic() - start)
+        except BaseException:
+            if probing:
+                backend.breaker.release()  # type: ignore
+            raise
+        finally:
+            backend.in_flight -= 1
+
+    def snapshot(self) -> dict[str, Any]:
+        return {backend.name: backend.snapshot() for backend in self.backends}
+
+
+def create_model_router(
+    store: Optional[SharedStateStore] = None, config: Settings = settings
+) -> Optional[ModelRouter]:
+    """Router over UPSTREAM_BACKENDS; with a shared ``store``, token buckets are shared by all worker processes."""
+    if not config.upstream_backends:
+        return None
+
+    backends: List[Backend] = []
+    for backend in config.upstream_backends:
+        breaker = None
+        if config.circuit_breaker_enabled:
+            breaker = CircuitBreaker(
+                failure_threshold=config.circuit_breaker_failure_threshold,
+                reset_timeout=config.circuit_breaker_reset_timeout,
+            )
+        bucket = None
+        if store is not None and backend.tokens_per_minute:
+            bucket = SharedTokenBucket(store, backend.name, backend.tokens_per_minute)
+        api_key = backend.api_key if backend.api_key is not None else config.openai_api_key
+        if backend.model is None:
+            backend = backend.model_copy(update={"model": config.openai_model})
+        backends.append(
+            Backend(backend, api_key, latency_window=config.router_latency_window, breaker=breaker, bucket=bucket)
+        )
+
+    return ModelRouter(
+        backends, cost_weight=config.router_cost_weight, completion_tokens=config.router_completion_tokens
+    )
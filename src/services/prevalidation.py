@@ -0,0 +1,172 @@
+import logging
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Literal, Optional
+
+from core.config import Settings, settings
+from models.trip_models import Itinerary
+from models.validator_models import TripValidatorInput, TripValidatorOutput
+from services.feasibility import FeasibilityReport, as_utc
+
+logger = logging.getLogger(__name__)
+
+PreValidationMode = Literal["off", "pre-filter", "local-only"]
+
+
+@dataclass(frozen=True)
+class RuleViolation:
+    rule: str
+    message: str
+
+
+@dataclass(frozen=True)
+class Tolerances:
+    duration_hours: float
+    cost_absolute: float
+    cost_relative: float
+
+
+Rule = Callable[[Itinerary, Tolerances], Optional[str]]
+
+
+def arrival_before_departure(itinerary: Itinerary, tolerances: Tolerances) -> Optional[str]:
+    for index, segment in enumerate(itinerary.segments):
+        if as_utc(segment.arrival_time) < as_utc(segment.departure_time):
+            return f"Segment {index} arrives before it departs."
+    return None
+
+
+def non_chronological_segments(itinerary: Itinerary, tolerances: Tolerances) -> Optional[str]:
+    segments = itinerary.segments
+    for index in range(1, len(segments)):
+        if as_utc(segments[index].departure_time) < as_utc(segments[index - 1].arrival_time):
+            return f"Segment {index} departs before segment {index - 1} arrives."
+    return None
+
+
+def total_duration_mismatch(itinerary: Itinerary, tolerances: Tolerances) -> Optional[str]:
+    segments = itinerary.segments
+    if not segments:
+        return None
+    span = (as_utc(segments[-1].arrival_time) - as_utc(segments[0].departure_time)).total_seconds() / 3600
+    if abs(span - itinerary.total_duration) > tolerances.duration_hours:
+        return f"Total duration is {itinerary.total_duration:g}h but the segments span {span:.2f}h."
+    return None
+
+
+def total_cost_mismatch(itinerary: Itinerary, tolerances: Tolerances) -> Optional[str]:
+    segments_cost = sum(segment.cost_estimate.estimated_cost for segment in itinerary.segments)
+    total_cost = itinerary.total_cost.estimated_cost
+    allowed = max(tolerances.cost_absolute, tolerances.cost_relative * max(total_cost, segments_cost))
+    if abs(segments_cost - total_cost) > allowed:
+        return f"Total cost is {total_cost:.2f} but the segments add up to {segments_cost:.2f}."
+    return None
+
+
+def mixed_currencies(itinerary: Itinerary, tolerances: Tolerances) -> Optional[str]:
+    codes = {itinerary.total_cost.currency.code}
+    codes.update(segment.cost_estimate.currency.code for segment in itinerary.segments)
+    if len(codes) > 1:
+        return f"Costs mix currencies: {', '.join(sorted(codes))}."
+    return None
+
+
+RULES: dict[str, Rule] = {
+    "arrival_before_departure": arrival_before_departure,
+    "non_chronological_segments": non_chronological_segments,
+    "total_duration_mismatch": total_duration_mismatch,
+    "total_cost_mismatch": total_cost_mismatch,
+    "mixed_currencies": mixed_currencies,
+}
+
+
+class PreValidator:
+    """Deterministic structural checks that reject infeasible itineraries without contacting the model."""
+
+    def __init__(self, mode: PreValidationMode, tolerances: Tolerances, rules: Optional[dict[str, Rule]] = None):
+        self.mode = mode
+        self.tolerances = tolerances
+        self.rules = RULES if rules is None else rules
+        self.rule_hits: Counter[str] = Counter()
+        self.checked = 0
+        self.short_circuited = 0
+
+    def check(
+        self, client_data: TripValidatorInput, feasibility: Optional[FeasibilityReport] = None
+    ) -> list[RuleViolation]:
+        itinerary = client_data.itinerary
+        violations = []
+        for name, rule in self.rules.items():
+            message = rule(itinerary, self.tolerances)
+            if message is not None:
+                violations.append(RuleViolation(rule=name, message=message))
+                self.rule_hits[name] += 1
+        if feasibility is not None and (message := feasibility.violation()) is not None:
+            violations.append(RuleViolation(rule="implausible_speed", message=message))
+            self.rule_hits["implausible_speed"] += 1
+        self.checked += 1
+
+        return violations
+
+    def validate(
+        self,
+        client_data: TripValidatorInput,
+        feasibility: Optional[FeasibilityReport] = None,
+        mode: Optional[PreValidationMode] = None,
+    ) -> Optional[TripValidatorOutput]:
+        """Returns a rule-derived output when the model call can be skipped, otherwise None."""
+        mode = self.mode if mode is None else mode
+        if mode == "off":
+            return None
+
+        output = self._output(self.check(client_data, feasibility), feasibility, local_only=mode == "local-only")
+        if output is not None:
+            self.short_circuited += 1
+        return output
+
+    def fallback(
+        self, client_data: TripValidatorInput, feasibility: Optional[FeasibilityReport] = None
+    ) -> TripValidatorOutput:
+        """Local-only output for an input ``validate`` already let through, used while the model is unavailable.
+
+        In pre-filter mode the input already passed every rule, so the rules are not run (nor counted) again.
+        """
+        violations = [] if self.mode == "pre-filter" else self.check(client_data, feasibility)
+        return self._output(violations, feasibility, local_only=True)  # type: ignore
+
+    def _output(
+        self, violations: list[RuleViolation], feasibility: Optional[FeasibilityReport], local_only: bool
+    ) -> Optional[TripValidatorOutput]:
+        if violations:
+            checks = len(self.rules) + (feasibility is not None)
+            return TripValidatorOutput(
+                is_valid=False,
+                validation_score=1 - len(violations) / checks,
+                feedback=" ".join(violation.message for violation in violations),
+            )
+        if local_only:
+            return TripValidatorOutput(
+                is_valid=True,
+                validation_score=1.0,
+                feedback="No structural issues found by the local checks.",
+            )
+
+        return None
+
+    def snapshot(self) -> dict[str, object]:
+        return {
+            "mode": self.mode,
+            "checked": self.checked,
+            "short_circuited": self.short_circuited,
+            "rule_hits": dict(self.rule_hits),
+        }
+
+
+def create_pre_validator(config: Settings = settings) -> PreValidator:
+    tolerances = Tolerances(
+        duration_hours=config.prevalidation_duration_tolerance,
+        cost_absolute=config.prevalidation_cost_tolerance,
+        cost_relative=config.prevalidation_cost_relative_tolerance,
+    )
+
+    return PreValidator(mode=config.prevalidation_mode, tolerances=tolerances)
@@ -0,0 +1,130 @@
+import json
+import math
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Literal, Optional, Sequence
+
+from core.config import Settings, settings
+from models.place_models import PlaceDetails
+from models.validator_models import PromptStats, TripValidatorInput
+from parsers.request_parsers import review_ratings
+
+ReviewMode = Literal["drop", "summary"]
+
+COORDINATE_DIGITS = 5
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a prompt, in line with the ~4 characters per token of OpenAI tokenizers."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _timestamp(moment: datetime) -> str:
+    return moment.replace(microsecond=0).isoformat()
+
+
+@dataclass
+class CompactionStats:
+    requests: int = 0
+    original_bytes: int = 0
+    compact_bytes: int = 0
+
+
+class PromptCompactor:
+    """Projects an itinerary onto the minimal JSON view the model needs.
+
+    Places are emitted once and referenced by id from the segments; reviews are dropped or summarized,
+    pictures and cost sources are dropped. With ``measure``, each render also serializes the full input
+    to report what compaction saved.
+    """
+
+    def __init__(self, review_mode: ReviewMode, measure: bool = False):
+        self.review_mode = review_mode
+        self.measure = measure
+        self.stats = CompactionStats()
+
+    def _place(self, place: PlaceDetails) -> dict[str, Any]:
+        coordinates = place.location.coordinates
+        projected: dict[str, Any] = {
+            "name": place.name,
+            "lat": round(coordinates.latitude, COORDINATE_DIGITS),
+            "lon": round(coordinates.longitude, COORDINATE_DIGITS),
+            "types": place.types,
+            "ratings_total": place.ratings_total,
+        }
+        if self.review_mode == "summary" and place.reviews:
+            ratings = review_ratings(place.reviews)
+            projected["reviews"] = len(ratings)
+            projected["avg_rating"] = round(sum(ratings) / len(ratings), 2)
+        return projected
+
+    def project(self, input_data: TripValidatorInput, indices: Optional[Sequence[int]] = None) -> dict[str, Any]:
+        """Compact view of the itinerary; with ``indices``, only those segments, each tagged with its index."""
+        itinerary = input_data.itinerary
+        currency = itinerary.total_cost.currency.code
+        places: dict[str, dict[str, Any]] = {}
+        segments = []
+        for index in range(len(itinerary.segments)) if indices is None else indices:
+            segment = itinerary.segments[index]
+            for place in (segment.start_point, segment.end_point):
+                if place.place_id not in places:
+                    places[place.place_id] = self._place(place)
+            projected: dict[str, Any] = {
+                "from": segment.start_point.place_id,
+                "to": segment.end_point.place_id,
+                "departure": _timestamp(segment.departure_time),
+                "arrival": _timestamp(segment.arrival_time),
+                "mode": segment.transportation_method.value,
+                "cost": segment.cost_estimate.estimated_cost,
+            }
+            if segment.cost_estimate.currency.code != currency:
+                projected["currency"] = segment.cost_estimate.currency.code
+            if indices is not None:
+                projected = {"index": index, **projected}
+            segments.append(projected)
+
+        return {
+            "places": places,
+            "segments": segments,
+            "total_cost": itinerary.total_cost.estimated_cost,
+            "currency": currency,
+            "total_duration_hours": itinerary.total_duration,
+            "preferences": {preference.category: preference.weight for preference in input_data.user_preferences},
+        }
+
+    def render(
+        self, input_data: TripValidatorInput, indices: Optional[Sequence[int]] = None
+    ) -> tuple[str, Optional[PromptStats]]:
+        compact = json.dumps(self.project(input_data, indices), separators=(",", ":"), ensure_ascii=False)
+        compact_bytes = len(compact.encode("utf-8"))
+        self.stats.requests += 1
+        self.stats.compact_bytes += compact_bytes
+        if not self.measure:
+            return compact, None
+
+        original = input_data.model_dump_json()
+        original_bytes = len(original.encode("utf-8"))
+        self.stats.original_bytes += original_bytes
+
+        return compact, PromptStats(
+            original_bytes=original_bytes,
+            compact_bytes=compact_bytes,
+            original_tokens=estimate_tokens(original),
+            compact_tokens=estimate_tokens(compact),
+        )
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "review_mode": self.review_mode,
+            "requests": self.stats.requests,
+            "original_bytes": self.stats.original_bytes if self.measure else None,
+            "compact_bytes": self.stats.compact_bytes,
+        }
+
+
+def create_prompt_compactor(config: Settings = settings) -> Optional[PromptCompactor]:
+    if not config.prompt_compaction_enabled:
+        return None
+
+    return PromptCompactor(review_mode=config.prompt_review_mode, measure=config.prompt_stats_enabled)
@@ -0,0 +1,236 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Generic, Optional, Protocol, TypeVar
+
+from pydantic import BaseModel
+
+from core.config import Settings, settings
+from models.validator_models import TripValidatorOutput
+
+logger = logging.getLogger(__name__)
+
+FLOAT_PRECISION = 9
+
+V = TypeVar("V")
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return str(value)
+        rounded = round(value, FLOAT_PRECISION)
+        return int(rounded) if rounded.is_integer() else rounded
+    if isinstance(value, dict):
+        return {str(key): _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    return value
+
+
+def canonical_key(model: BaseModel) -> str:
+    """Stable content hash of a model: sorted keys, compact separators and normalized floats."""
+    canonical = json.dumps(
+        _normalize(model.model_dump(mode="json")), sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    memory_hits: int = 0
+    backend_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+
+class CacheBackend(Protocol):
+    """Second cache tier, consulted on in-process misses. Values are serialized TripValidatorOutput JSON."""
+
+    async def get(self, key: str) -> Optional[str]: ...
+
+    async def set(self, key: str, value: str, ttl: float) -> None: ...
+
+    async def close(self) -> None: ...
+
+    def snapshot(self) -> dict[str, int]: ...
+
+
+class MemoryCacheTier(Generic[V]):
+    """Bounded in-process LRU with per-entry TTL."""
+
+    def __init__(self, max_entries: int, ttl: float, stats: CacheStats):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = stats
+        self._entries: OrderedDict[str, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[V]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.stats.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: V) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+
+class SQLiteCacheBackend:
+    """On-disk cache tier in a local SQLite file, shared across restarts.
+
+    Expired rows are purged every ``purge_interval`` seconds from the write path, which also evicts the rows
+    closest to expiry while the table holds more than ``max_entries``.
+    """
+
+    def __init__(self, path: str, max_entries: int, purge_interval: float):
+        self.path = path
+        self.max_entries = max_entries
+        self.purge_interval = purge_interval
+        self.evictions = 0
+        self.expirations = 0
+        self._purged_at = 0.0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS response_cache_expires_at ON response_cache (expires_at)")
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < time.time():
+                self._connection.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+                self.expirations += 1
+                return None
+            return row[0]
+
+    def _set(self, key: str, value: str, ttl: float) -> None:
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl),
+            )
+            if time.monotonic() - self._purged_at >= self.purge_interval:
+                self._purge()
+
+    def _purge(self) -> None:
+        self._purged_at = time.monotonic()
+        self.expirations += self._connection.execute(
+            "DELETE FROM response_cache WHERE expires_at < ?", (time.time(),)
+        ).rowcount
+        excess = self._connection.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self.evictions += self._connection.execute(
+                "DELETE FROM response_cache WHERE key IN (SELECT key FROM response_cache ORDER BY expires_at LIMIT ?)",
+                (excess,),
+            ).rowcount
+
+    async def get(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        await asyncio.to_thread(self._set, key, value, ttl)
+
+    async def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def snapshot(self) -> dict[str, int]:
+        return {"evictions": self.evictions, "expirations": self.expirations}
+
+
+class ResponseCache:
+    """Two-tier cache of parsed validation outputs keyed by the canonical hash of the input."""
+
+    def __init__(self, max_entries: int, ttl: float, backend: Optional[CacheBackend] = None):
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self.memory: MemoryCacheTier[TripValidatorOutput] = MemoryCacheTier(
+            max_entries=max_entries, ttl=ttl, stats=self.stats
+        )
+        self.backend = backend
+
+    async def get(self, key: str) -> Optional[TripValidatorOutput]:
+        value = self.memory.get(key)
+        if value is not None:
+            self.stats.hits += 1
+            self.stats.memory_hits += 1
+            return value
+
+        if self.backend is not None:
+            try:
+                raw = await self.backend.get(key)
+            except Exception as e:
+                logger.error(f"Cache backend read failed: {e}")
+                raw = None
+            if raw is not None:
+                value = TripValidatorOutput.model_validate_json(raw)
+                self.memory.set(key, value)
+                self.stats.hits += 1
+                self.stats.backend_hits += 1
+                return value
+
+        self.stats.misses += 1
+        return None
+
+    async def set(self, key: str, value: TripValidatorOutput) -> None:
+        self.memory.set(key, value)
+        if self.backend is not None:
+            try:
+                await self.backend.set(key, value.model_dump_json(), self.ttl)
+            except Exception as e:
+                logger.error(f"Cache backend write failed: {e}")
+
+    async def close(self) -> None:
+        if self.backend is not None:
+            await self.backend.close()
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            **asdict(self.stats),
+            "size": len(self.memory),
+            "backend": self.backend.snapshot() if self.backend is not None else None,
+        }
+
+
+def create_response_cache(config: Settings = settings) -> Optional[ResponseCache]:
+    if not config.cache_enabled:
+        return None
+    backend: Optional[CacheBackend] = None
+    if config.cache_backend == "sqlite":
+        backend = SQLiteCacheBackend(
+            config.cache_sqlite_path,
+            max_entries=config.cache_sqlite_max_entries,
+            purge_interval=config.cache_sqlite_purge_interval,
+        )
+
+    return ResponseCache(max_entries=config.cache_max_entries, ttl=config.cache_ttl, backend=backend)
@@ -0,0 +1,95 @@
+import hashlib
+from dataclasses import asdict
+from typing import Any, List, Optional, Sequence
+
+from core.config import Settings, settings
+from models.validator_models import TripValidatorInput, TripValidatorOutput
+from parsers.validator_parsers import SegmentFinding, TripFinding
+from services.response_cache import CacheStats, MemoryCacheTier, canonical_key
+
+# Part of every key: bump it when the per-segment prompt changes so findings from the old prompt are not reused.
+KEY_VERSION = "2"
+
+
+def segment_keys(input_data: TripValidatorInput) -> List[str]:
+    """One key per segment, hashing the segment, both neighbours, the trip currency and the user preferences."""
+    itinerary = input_data.itinerary
+    digests = [canonical_key(segment) for segment in itinerary.segments]
+    preferences = [canonical_key(item) for item in input_data.user_preferences]
+    shared = ":".join([KEY_VERSION, itinerary.total_cost.currency.code, *preferences])
+    keys = []
+    for index, digest in enumerate(digests):
+        previous = digests[index - 1] if index > 0 else ""
+        following = digests[index + 1] if index + 1 < len(digests) else ""
+        keys.append(hashlib.sha256(f"{shared}|{previous}|{digest}|{following}".encode("utf-8")).hexdigest())
+    return keys
+
+
+def context_indices(indices: Sequence[int], size: int) -> List[int]:
+    """The given segments plus their neighbours, whose transitions the model needs to see."""
+    neighbours = {neighbour for index in indices for neighbour in (index - 1, index, index + 1)}
+    return sorted(neighbour for neighbour in neighbours if 0 <= neighbour < size)
+
+
+def trip_outline(input_data: TripValidatorInput) -> List[dict[str, Any]]:
+    """Times, mode and cost of every segment: enough for the model to judge the trip totals and pacing."""
+    return [
+        {
+            "index": index,
+            "departure": segment.departure_time.isoformat(),
+            "arrival": segment.arrival_time.isoformat(),
+            "mode": segment.transportation_method.value,
+            "cost": segment.cost_estimate.estimated_cost,
+        }
+        for index, segment in enumerate(input_data.itinerary.segments)
+    ]
+
+
+def merge_findings(findings: Sequence[SegmentFinding], trip: Optional[TripFinding] = None) -> TripValidatorOutput:
+    """Whole-trip output from per-segment findings and the trip finding.
+
+    Valid when every segment and the trip are, scored by the segments' mean capped by the trip score.
+    """
+    suggestions = [suggestion for finding in findings for suggestion in finding.optimization_suggestions]
+    feedback = [f"Segment {index}: {finding.feedback}" for index, finding in enumerate(findings)]
+    score = sum(finding.validation_score for finding in findings) / len(findings)
+    if trip is not None:
+        feedback.insert(0, f"Trip: {trip.feedback}")
+        score = min(score, trip.validation_score)
+    return TripValidatorOutput(
+        is_valid=all(finding.is_valid for finding in findings) and (trip is None or trip.is_valid),
+        validation_score=score,
+        feedback="\n".join(feedback),
+        optimization_suggestions=suggestions or None,
+    )
+
+
+class SegmentCache:
+    """In-process LRU of per-segment findings keyed by ``segment_keys``."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.stats = CacheStats()
+        self.memory: MemoryCacheTier[SegmentFinding] = MemoryCacheTier(
+            max_entries=max_entries, ttl=ttl, stats=self.stats
+        )
+
+    def lookup(self, keys: Sequence[str]) -> List[Optional[SegmentFinding]]:
+        findings = [self.memory.get(key) for key in keys]
+        hits = sum(finding is not None for finding in findings)
+        self.stats.hits += hits
+        self.stats.memory_hits += hits
+        self.stats.misses += len(keys) - hits
+        return findings
+
+    def store(self, key: str, finding: SegmentFinding) -> None:
+        self.memory.set(key, finding)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {**asdict(self.stats), "size": len(self.memory)}
+
+
+def create_segment_cache(config: Settings = settings) -> Optional[SegmentCache]:
+    if not config.segment_cache_enabled:
+        return None
+
+    return SegmentCache(max_entries=config.segment_cache_max_entries, ttl=config.segment_cache_ttl)
@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Generic, Iterator, Optional, TypeVar
+
+from core.config import Settings, settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS flights (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL);
+"""
+
+
+class SharedStateStore:
+    """Local SQLite file (WAL) through which the worker processes of one host share state.
+
+    Holds the single-flight leases and the rate-limit token buckets; the response cache shares the same way
+    through its SQLite tier.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._connection
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+    def try_lead(self, key: str, owner: str, lease: float) -> bool:
+        """Takes the lease on ``key`` unless another owner holds one that has not expired."""
+        now = time.time()
+        with self._transaction() as connection:
+            row = connection.execute("SELECT owner, expires_at FROM flights WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[0] != owner and row[1] > now:
+                return False
+            connection.execute(
+                "INSERT OR REPLACE INTO flights (key, owner, expires_at) VALUES (?, ?, ?)", (key, owner, now + lease)
+            )
+            return True
+
+    def release(self, key: str, owner: str) -> None:
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM flights WHERE key = ? AND owner = ?", (key, owner))
+
+    def is_led(self, key: str) -> bool:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT 1 FROM flights WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row is not None
+
+    def _level(self, row: Optional[tuple[float, float]], rate: float, capacity: float, now: float) -> float:
+        if row is None:
+            return capacity
+        tokens, updated_at = row
+        return min(capacity, tokens + max(0.0, now - updated_at) * rate)
+
+    def peek_tokens(self, name: str, rate: float, capacity: float) -> float:
+        with self._lock:
+            row = self._connection.execute("SELECT tokens, updated_at FROM buckets WHERE name = ?", (name,)).fetchone()
+        return self._level(row, rate, capacity, time.time())
+
+    def take_tokens(self, name: str, tokens: float, rate: float, capacity: float) -> tuple[float, float]:
+        """Takes ``tokens`` from the bucket if it holds them and returns 0, or returns the seconds until it will.
+
+        Also returns the tokens left in the bucket.
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            row = connection.execute("SELECT tokens, updated_at FROM buckets WHERE name = ?", (name,)).fetchone()
+            level = self._level(row, rate, capacity, now)
+            wait = 0.0
+            if level >= tokens:
+                level -= tokens
+            else:
+                wait = (tokens - level) / rate
+            connection.execute(
+                "INSERT OR REPLACE INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?)", (name, level, now)
+            )
+            return wait, level
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class SharedTokenBucket:
+    """Tokens-per-minute budget kept in the shared store, so that all workers together stay within it.
+
+    ``tokens`` and ``wait_time`` run on the event loop (the router scores every pick with them), so they never
+    touch SQLite: they refill the last level this process saw, which ``acquire`` updates and a worker thread
+    re-reads from the store once it is ``refresh_interval`` seconds old.
+    """
+
+    def __init__(self, store: SharedStateStore, name: str, tokens_per_minute: int, refresh_interval: float = 1.0):
+        self.store = store
+        self.name = name
+        self.capacity = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60
+        self.refresh_interval = refresh_interval
+        self._level = self.capacity
+        self._observed_at = float("-inf")
+        self._refresh: Optional[asyncio.Task[None]] = None
+
+    @property
+    def tokens(self) -> float:
+        now = time.monotonic()
+        if now - self._observed_at >= self.refresh_interval:
+            self._schedule_refresh()
+        return min(self.capacity, self._level + (now - self._observed_at) * self.rate)
+
+    def wait_time(self, tokens: int) -> float:
+        return max(0.0, min(tokens, self.capacity) - self.tokens) / self.rate
+
+    async def acquire(self, tokens: int) -> None:
+        needed = min(tokens, self.capacity)
+        while True:
+            wait, level = await asyncio.to_thread(self.store.take_tokens, self.name, needed, self.rate, self.capacity)
+            self._observe(level)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def _observe(self, level: float) -> None:
+        self._level = level
+        self._observed_at = time.monotonic()
+
+    def _schedule_refresh(self) -> None:
+        if self._refresh is not None and not self._refresh.done():
+            return
+        try:
+            self._refresh = asyncio.get_running_loop().create_task(self._read())
+        except RuntimeError:
+            pass
+
+    async def _read(self) -> None:
+        try:
+            self._observe(await asyncio.to_thread(self.store.peek_tokens, self.name, self.rate, self.capacity))
+        except sqlite3.Error as e:
+            logger.error(f"Could not read the shared token bucket {self.name}: {e}")
+
+
+@dataclass
+class SharedFlightStats:
+    leaders: int = 0
+    followers: int = 0
+    shared_results: int = 0
+
+
+class SharedFlight(Generic[T]):
+    """Single-flight across worker processes, on top of the in-process one.
+
+    The process holding the lease on a key calls upstream; the others wait for the lease to go away and then
+    read the result the leader published (in practice, the shared response cache). When no result is found,
+    because the leader failed or its lease expired, a waiter takes the lease and calls upstream itself.
+    """
+
+    def __init__(self, store: SharedStateStore, lease: float, poll_interval: float):
+        self.store = store
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.owner = str(os.getpid())
+        self.stats = SharedFlightStats()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]], lookup: Callable[[], Awaitable[Optional[T]]]) -> T:
+        while True:
+            if await asyncio.to_thread(self.store.try_lead, key, self.owner, self.lease):
+                self.stats.leaders += 1
+                try:
+                    return await fn()
+                finally:
+                    await asyncio.to_thread(self.store.release, key, self.owner)
+
+            self.stats.followers += 1
+            while await asyncio.to_thread(self.store.is_led, key):
+                await asyncio.sleep(self.poll_interval)
+            result = await lookup()
+            if result is not None:
+                self.stats.shared_results += 1
+                return result
+
+    def snapshot(self) -> dict[str, Any]:
+        return asdict(self.stats)
+
+
+def create_shared_state(config: Settings = settings) -> Optional[SharedStateStore]:
+    if not config.shared_state_path:
+        return None
+
+    return SharedStateStore(config.shared_state_path)
+
+
+def create_shared_flight(store: Optional[SharedStateStore], config: Settings = settings) -> Optional[SharedFlight]:
+    """Cross-process single-flight, which needs a response cache tier the workers share to hand results over."""
+    if store is None or not config.single_flight_enabled or not config.cache_enabled or config.cache_backend == "none":
+        return None
+
+    return SharedFlight(store, lease=config.shared_flight_lease, poll_interval=config.shared_flight_poll_interval)
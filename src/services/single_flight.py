@@ -0,0 +1,53 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class SingleFlightStats:
+    leaders: int = 0
+    coalesced: int = 0
+
+
+class SingleFlight(Generic[T]):
+    """Coalesces concurrent calls sharing a key onto one shared task.
+
+    The shared task is shielded: cancelling one waiter never cancels the call the others are waiting on,
+    and its result or exception is delivered to every waiter.
+    """
+
+    def __init__(self):
+        self.stats = SingleFlightStats()
+        self._in_flight: dict[str, asyncio.Task[T]] = {}
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._in_flight
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.stats.leaders += 1
+        else:
+            self.stats.coalesced += 1
+
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task[T]) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Shared call for key {key} failed: {task.exception()}")
+
+    def snapshot(self) -> dict[str, int]:
+        return {"leaders": self.stats.leaders, "coalesced": self.stats.coalesced, "in_flight": len(self)}
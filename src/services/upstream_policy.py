@@ -0,0 +1,297 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Awaitable, Callable, Literal, Optional
+
+from aiohttp import ClientError
+from fastapi import HTTPException
+
+from core.config import Settings, settings
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+CircuitState = Literal["closed", "open", "half-open"]
+
+
+class CircuitOpenError(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=503, detail="Upstream model unavailable: circuit breaker is open")
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, CircuitOpenError):
+        # Raised before any upstream call was made, such as by a router whose backends are all open.
+        return False
+    if isinstance(error, HTTPException):
+        return error.status_code in RETRYABLE_STATUSES
+    return isinstance(error, (ClientError, asyncio.TimeoutError))
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Reads the Retry-After hint (delta-seconds or HTTP date) carried by an upstream HTTPException."""
+    headers = getattr(error, "headers", None) or {}
+    value = headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """Opens after consecutive upstream failures and lets a single probe through once the reset timeout elapses."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state: CircuitState = "closed"
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = "half-open"
+            self._probe_in_flight = False
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def release(self) -> None:
+        """Gives back the probe of a call that ended without an outcome (cancelled), so the next call probes."""
+        if self.state == "half-open":
+            self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == "half-open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning(f"Circuit breaker opened after {self.failures} consecutive upstream failures")
+            self.state = "open"
+            self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+
+@dataclass
+class PolicyStats:
+    calls: int = 0
+    attempts: int = 0
+    retries: int = 0
+    failures: int = 0
+    rejected: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+    deadline_exceeded: int = 0
+
+
+class UpstreamPolicy:
+    """Deadlines, jittered exponential backoff, circuit breaking and hedging around one upstream call."""
+
+    def __init__(
+        self,
+        max_attempts: int,
+        attempt_timeout: float,
+        total_timeout: float,
+        backoff_base: float,
+        backoff_max: float,
+        breaker: Optional[CircuitBreaker] = None,
+        hedging_enabled: bool = False,
+        hedge_min_samples: int = 20,
+        latency_window: int = 200,
+    ):
+        self.max_attempts = max_attempts
+        self.attempt_timeout = attempt_timeout
+        self.total_timeout = total_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker
+        self.hedging_enabled = hedging_enabled
+        self.hedge_min_samples = hedge_min_samples
+        self.stats = PolicyStats()
+        self._latencies: deque[float] = deque(maxlen=latency_window)
+
+    def backoff(self, attempt: int, error: BaseException) -> float:
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def hedge_delay(self) -> Optional[float]:
+        if not self.hedging_enabled or len(self._latencies) < self.hedge_min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    async def call(self, attempt: Callable[[], Awaitable[str]]) -> str:
+        self.stats.calls += 1
+        deadline = time.monotonic() + self.total_timeout
+        breaker = self.breaker
+        for attempt_number in range(self.max_attempts):
+            if breaker is not None and not breaker.allow():
+                self.stats.rejected += 1
+                raise CircuitOpenError()
+            probing = breaker is not None and breaker.state == "half-open"
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                if probing:
+                    breaker.release()
+                self.stats.deadline_exceeded += 1
+                raise HTTPException(status_code=504, detail="Upstream model timed out")
+            try:
+                result = await self._attempt(attempt, min(self.attempt_timeout, remaining))
+            except (asyncio.CancelledError, CircuitOpenError) as e:
+                # Cancelled, or rejected before reaching the upstream: neither says anything about its health.
+                if probing:
+                    breaker.release()
+                if isinstance(e, CircuitOpenError):
+                    self.stats.rejected += 1
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    if breaker is not None:
+                        breaker.record_success()
+                    raise e
+                self.stats.failures += 1
+                if breaker is not None:
+                    breaker.record_failure()
+                delay = self.backoff(attempt_number, e)
+                if attempt_number + 1 >= self.max_attempts or time.monotonic() + delay >= deadline:
+                    if isinstance(e, asyncio.TimeoutError):
+                        self.stats.deadline_exceeded += 1
+                        raise HTTPException(status_code=504, detail="Upstream model timed out")
+                    raise e
+                logger.warning(f"Upstream attempt {attempt_number + 1} failed ({e!r}), retrying in {delay:.2f}s")
+                self.stats.retries += 1
+                await asyncio.sleep(delay)
+                continue
+
+            if breaker is not None:
+                breaker.record_success()
+            return result
+
+        raise HTTPException(status_code=502, detail="Upstream model failed")
+
+    @asynccontextmanager
+    async def guard(self) -> AsyncIterator[None]:
+        """Circuit breaking for one call made outside ``call``, such as a stream, settling the breaker however it ends.
+
+        Errors count as in ``call``: retryable ones as failures, others as a sign that the upstream answered.
+        """
+        if self.breaker is None:
+            yield
+            return
+        if not self.breaker.allow():
+            self.stats.rejected += 1
+            raise CircuitOpenError()
+        probing = self.breaker.state == "half-open"
+        try:
+            yield
+        except CircuitOpenError:
+            if probing:
+                self.breaker.release()
+            raise
+        except Exception as e:
+            if is_retryable(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise e
+        except BaseException:
+            if probing:
+                self.breaker.release()
+            raise
+        else:
+            self.breaker.record_success()
+
+    async def _attempt(self, attempt: Callable[[], Awaitable[str]], timeout: float) -> str:
+        hedge_delay = self.hedge_delay()
+        if hedge_delay is None or hedge_delay >= timeout:
+            return await asyncio.wait_for(self._timed(attempt), timeout)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        primary = asyncio.ensure_future(self._timed(attempt))
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedge_delay)
+            if not done:
+                self.stats.hedged += 1
+                pending.add(asyncio.ensure_future(self._timed(attempt)))
+            error: Optional[BaseException] = None
+            while True:
+                winner = None
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                    else:
+                        error = task.exception()
+                if winner is not None:
+                    if winner is not primary:
+                        self.stats.hedge_wins += 1
+                    return winner.result()
+                if not pending:
+                    raise error  # type: ignore
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _timed(self, attempt: Callable[[], Awaitable[str]]) -> str:
+        self.stats.attempts += 1
+        start = time.monotonic()
+        result = await attempt()
+        self._latencies.append(time.monotonic() - start)
+        return result
+
+    def snapshot(self) -> dict[str, object]:
+        return {
+            **asdict(self.stats),
+            "circuit_state": self.breaker.state if self.breaker is not None else None,
+            "hedge_delay": self.hedge_delay(),
+        }
+
+
+def create_upstream_policy(config: Settings = settings) -> UpstreamPolicy:
+    breaker = None
+    if config.circuit_breaker_enabled:
+        breaker = CircuitBreaker(
+            failure_threshold=config.circuit_breaker_failure_threshold,
+            reset_timeout=config.circuit_breaker_reset_timeout,
+        )
+
+    return UpstreamPolicy(
+        max_attempts=config.upstream_max_attempts,
+        attempt_timeout=config.upstream_attempt_timeout,
+        total_timeout=config.upstream_total_timeout,
+        backoff_base=config.upstream_backoff_base,
+        backoff_max=config.upstream_backoff_max,
+        breaker=breaker,
+        hedging_enabled=config.upstream_hedging_enabled,
+        hedge_min_samples=config.upstream_hedge_min_samples,
+    )
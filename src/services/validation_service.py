@@ -1,44 +1,188 @@
+import asyncio
+import json
 import logging
 import time
 from ast import parse
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Annotated, Any, List
+from typing import Annotated, Any, AsyncIterator, Awaitable, Callable, List, Optional, Sequence
 
 import aiohttp
 from aiohttp import ClientConnectionError
 from fastapi import HTTPException
 from pydantic import BaseModel, Field, ValidationError
 
-from core.config import settings
+from core.config import Settings, settings
+from core.http_client import create_client_session
+from core.metrics import (
+    count_outcome,
+    count_tokens,
+    count_upstream_status,
+    record_stage,
+    stage,
+    start_timer,
+)
 from models.base_models import TransportationMethod
 from models.cost_models import CostEstimate
 from models.place_models import PlaceDetails
 from models.validator_models import (
     OptimizationSuggestion,
+    PromptStats,
+    SegmentReuse,
+    TripValidatorBatchError,
+    TripValidatorBatchItem,
     TripValidatorInput,
     TripValidatorOutput,
     TripValidatorRequest,
     TripValidatorResponse,
+    TripValidatorStreamEvent,
+)
+from parsers.stream_parsers import IncrementalOutputParser
+from parsers.validator_parsers import ModelResponseError, ValidationParser
+from services.feasibility import FeasibilityChecker, FeasibilityReport, create_feasibility_checker
+from services.prevalidation import PreValidator, create_pre_validator
+from services.micro_batcher import MicroBatcher, create_micro_batcher
+from services.model_router import ModelRouter, create_model_router
+from services.prompt_compaction import PromptCompactor, create_prompt_compactor, estimate_tokens
+from services.response_cache import ResponseCache, canonical_key, create_response_cache
+from services.segment_cache import (
+    SegmentCache,
+    context_indices,
+    create_segment_cache,
+    merge_findings,
+    segment_keys,
+    trip_outline,
 )
-from parsers.validator_parsers import ValidationParser
+from services.shared_state import SharedFlight, SharedStateStore, create_shared_flight, create_shared_state
+from services.single_flight import SingleFlight
+from services.upstream_policy import CircuitOpenError, UpstreamPolicy, create_upstream_policy
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class UpstreamResult:
+    output: TripValidatorOutput
+    prompt_stats: Optional[PromptStats] = None
+    segment_reuse: Optional[SegmentReuse] = None
+
+
+@dataclass
+class BatchEntry:
+    client_data: TripValidatorInput
+    feasibility: Optional[FeasibilityReport]
+    itinerary_data: str
+
+
 class ValidationService:
-    def __init__(self):
-        self.openai_api_key = settings.openai_api_key  # type: ignore
-        if not self.openai_api_key:
+    def __init__(self, config: Settings = settings):
+        self.config = config
+        self.openai_api_key = config.openai_api_key
+        self.shared_state: Optional[SharedStateStore] = create_shared_state(config)
+        self.model_router: Optional[ModelRouter] = create_model_router(self.shared_state, config)
+        if not self.openai_api_key and self.model_router is None:
             raise ValueError("OpenAI API key not configured correctly.")
-        self.openai_api_url = "https://api.openai.com/v1/chat/completions"
+        self.openai_api_url = config.openai_api_url
         self.ai_results_parser = ValidationParser()
+        self.pre_validator: PreValidator = create_pre_validator(config)
+        self.feasibility_checker: Optional[FeasibilityChecker] = create_feasibility_checker(config)
+        self.prompt_compactor: Optional[PromptCompactor] = create_prompt_compactor(config)
+        self.response_cache: Optional[ResponseCache] = create_response_cache(config)
+        self.segment_cache: Optional[SegmentCache] = create_segment_cache(config)
+        self.single_flight: Optional[SingleFlight[UpstreamResult]] = (
+            SingleFlight() if config.single_flight_enabled else None
+        )
+        self.shared_flight: Optional[SharedFlight[UpstreamResult]] = create_shared_flight(self.shared_state, config)
+        self.upstream_policy: UpstreamPolicy = create_upstream_policy(config)
+        self.micro_batcher: Optional[MicroBatcher[BatchEntry, TripValidatorOutput]] = create_micro_batcher(
+            self._validate_entries, self._validate_entry, config
+        )
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def start(self) -> None:
+        """Opens the shared upstream session. Called once from the application lifespan."""
+        if self._session is None or self._session.closed:
+            self._session = create_client_session(self.config)
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self.response_cache is not None:
+            await self.response_cache.close()
+        if self.shared_state is not None:
+            self.shared_state.close()
 
-    async def validate_itinerary(self, client_data: TripValidatorInput) -> TripValidatorResponse:
+    def stats(self) -> dict[str, Any]:
+        return {
+            "prevalidation": self.pre_validator.snapshot(),
+            "prompt_compaction": self.prompt_compactor.snapshot() if self.prompt_compactor is not None else None,
+            "cache": self.response_cache.snapshot() if self.response_cache is not None else None,
+            "segment_cache": self.segment_cache.snapshot() if self.segment_cache is not None else None,
+            "single_flight": self.single_flight.snapshot() if self.single_flight is not None else None,
+            "shared_flight": self.shared_flight.snapshot() if self.shared_flight is not None else None,
+            "micro_batch": self.micro_batcher.snapshot() if self.micro_batcher is not None else None,
+            "upstream": self.upstream_policy.snapshot(),
+            "router": self.model_router.snapshot() if self.model_router is not None else None,
+        }
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            await self.start()
+        return self._session  # type: ignore
+
+    async def validate_itinerary(
+        self, client_data: TripValidatorInput, feasibility: Optional[FeasibilityReport] = None
+    ) -> TripValidatorResponse:
         try:
-            ai_prompt_data_request = self._build_ai_request(client_data)
-            ai_validation_results = await self._ai_request_validation(ai_prompt_data_request)
-            parsed_results = self.ai_results_parser.parse(ai_validation_results)
-            processed_results = self._process_ai_results(parsed_results=parsed_results)
+            with stage("prevalidation"):
+                if feasibility is None and self.feasibility_checker is not None:
+                    feasibility = self.feasibility_checker.assess(client_data.itinerary)
+                local_results = self.pre_validator.validate(client_data, feasibility)
+            if local_results is not None:
+                count_outcome("short_circuit")
+                return self._process_ai_results(parsed_results=local_results)
+
+            cache_key = None
+            with stage("cache_lookup"):
+                if self.response_cache is not None or self.single_flight is not None:
+                    cache_key = canonical_key(client_data)
+                cached_results = None
+                if self.response_cache is not None and cache_key is not None:
+                    cached_results = await self.response_cache.get(cache_key)
+            if cached_results is not None:
+                count_outcome("cache_hit")
+                return self._process_ai_results(parsed_results=cached_results, cached=True)
+
+            size = len(client_data.itinerary.segments)
+            validate_upstream = self._validate_upstream
+            if self.micro_batcher is not None and 0 < size <= self.config.micro_batch_max_segments:
+                validate_upstream = self._validate_batched
+            elif self.segment_cache is not None and size:
+                validate_upstream = self._validate_incremental
+            try:
+                if self.single_flight is not None and cache_key is not None:
+                    count_outcome("coalesced" if cache_key in self.single_flight else "upstream")
+                    upstream_result = await self.single_flight.do(
+                        cache_key, lambda: self._lead(validate_upstream, client_data, cache_key, feasibility)
+                    )
+                else:
+                    count_outcome("upstream")
+                    upstream_result = await validate_upstream(client_data, cache_key, feasibility)
+            except CircuitOpenError as e:
+                if self.config.circuit_breaker_fallback != "local-only":
+                    raise e
+                logger.warning("Circuit breaker open, falling back to local-only validation")
+                count_outcome("fallback")
+                local_results = self.pre_validator.fallback(client_data, feasibility)
+                return self._process_ai_results(parsed_results=local_results)
+            processed_results = self._process_ai_results(
+                parsed_results=upstream_result.output,
+                prompt_stats=upstream_result.prompt_stats,
+                segment_reuse=upstream_result.segment_reuse,
+            )
+        except ModelResponseError as e:
+            raise HTTPException(status_code=502, detail=f"Invalid model response: {str(e)}")
         except ValidationError as e:
             raise HTTPException(status_code=400, detail=f"Invalid input data: {str(e)}")
         except Exception as e:
@@ -46,54 +190,448 @@ class ValidationService:
 
         return processed_results
 
-    def _build_ai_request(self, input_data: TripValidatorInput) -> dict[str, Any]:
+    async def validate_itinerary_stream(
+        self, client_data: TripValidatorInput
+    ) -> AsyncIterator[TripValidatorStreamEvent]:
+        """Validates with a streamed completion, yielding feedback and suggestions as soon as each is complete."""
+        start_time = time.perf_counter()
+        timer = start_timer(start_time)
+        try:
+            with stage("prevalidation"):
+                feasibility = None
+                if self.feasibility_checker is not None:
+                    feasibility = self.feasibility_checker.assess(client_data.itinerary)
+                parsed_results = self.pre_validator.validate(client_data, feasibility)
+            cached = False
+            prompt_stats = None
+            if parsed_results is not None:
+                count_outcome("short_circuit")
+
+            with stage("cache_lookup"):
+                cache_key = canonical_key(client_data) if self.response_cache is not None else None
+                if parsed_results is None and self.response_cache is not None and cache_key is not None:
+                    parsed_results = await self.response_cache.get(cache_key)
+                    cached = parsed_results is not None
+            if cached:
+                count_outcome("cache_hit")
+
+            if parsed_results is None:
+                count_outcome("upstream")
+                with stage("prompt_build"):
+                    ai_prompt_data_request, prompt_stats = self._build_ai_request(client_data, feasibility)
+                stream_parser = IncrementalOutputParser()
+                content = []
+                segments = client_data.itinerary.segments
+                try:
+                    async for delta in self._ai_request_validation_stream(ai_prompt_data_request, len(segments)):
+                        content.append(delta)
+                        for kind, value in stream_parser.feed(delta):
+                            if kind == "feedback":
+                                yield TripValidatorStreamEvent(event="feedback", feedback=value)
+                            elif (suggestion := self.ai_results_parser.parse_suggestion(value, segments)) is not None:
+                                yield TripValidatorStreamEvent(event="suggestion", suggestion=suggestion)
+                except CircuitOpenError as e:
+                    if self.config.circuit_breaker_fallback != "local-only":
+                        raise e
+                    logger.warning("Circuit breaker open, falling back to local-only validation")
+                    count_outcome("fallback")
+                    parsed_results = self.pre_validator.fallback(client_data, feasibility)
+                    prompt_stats = None
+                else:
+                    with stage("parse"):
+                        parsed_results = self.ai_results_parser.parse_content("".join(content), segments)
+                    if self.response_cache is not None and cache_key is not None:
+                        await self.response_cache.set(cache_key, parsed_results)
+
+            response = self._process_ai_results(parsed_results=parsed_results, cached=cached, prompt_stats=prompt_stats)
+        except ModelResponseError as e:
+            raise HTTPException(status_code=502, detail=f"Invalid model response: {str(e)}")
+        except ValidationError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid input data: {str(e)}")
+
+        response.processing_time = time.perf_counter() - start_time
+        if timer is not None:
+            response.stage_timings = dict(timer.stages)
+        yield TripValidatorStreamEvent(event="result", response=response)
+
+    async def validate_batch(
+        self, batch: List[TripValidatorInput], concurrency: int
+    ) -> AsyncIterator[TripValidatorBatchItem]:
+        """Validates a batch concurrently, yielding each item as soon as it completes."""
+        semaphore = asyncio.Semaphore(concurrency)
+        reports: List[Optional[FeasibilityReport]] = [None] * len(batch)
+        if self.feasibility_checker is not None:
+            reports = list(self.feasibility_checker.assess_batch([client_data.itinerary for client_data in batch]))
+
+        async def validate_item(index: int, client_data: TripValidatorInput) -> TripValidatorBatchItem:
+            async with semaphore:
+                start_time = time.perf_counter()
+                timer = start_timer(start_time)
+                try:
+                    response = await self.validate_itinerary(client_data, reports[index])
+                except HTTPException as e:
+                    error = TripValidatorBatchError(status_code=e.status_code, detail=str(e.detail))
+                    return TripValidatorBatchItem(index=index, error=error)
+                except Exception as e:
+                    logger.error(f"Batch item {index} failed: {e}")
+                    error = TripValidatorBatchError(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
+                    return TripValidatorBatchItem(index=index, error=error)
+                response.processing_time = time.perf_counter() - start_time
+                if timer is not None:
+                    response.stage_timings = dict(timer.stages)
+                return TripValidatorBatchItem(index=index, response=response)
+
+        tasks = [asyncio.create_task(validate_item(index, client_data)) for index, client_data in enumerate(batch)]
+        try:
+            for next_item in asyncio.as_completed(tasks):
+                yield await next_item
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _lead(
+        self,
+        validate_upstream: Callable[..., Awaitable[UpstreamResult]],
+        client_data: TripValidatorInput,
+        cache_key: str,
+        feasibility: Optional[FeasibilityReport],
+    ) -> UpstreamResult:
+        """Runs the call this process leads, waiting instead for another worker that already leads the same key."""
+        if self.shared_flight is None:
+            return await validate_upstream(client_data, cache_key, feasibility)
+        return await self.shared_flight.do(
+            cache_key,
+            lambda: validate_upstream(client_data, cache_key, feasibility),
+            lambda: self._shared_result(cache_key),
+        )
+
+    async def _shared_result(self, cache_key: str) -> Optional[UpstreamResult]:
+        assert self.response_cache is not None
+        output = await self.response_cache.get(cache_key)
+        return UpstreamResult(output=output) if output is not None else None
+
+    async def _validate_upstream(
+        self, client_data: TripValidatorInput, cache_key: Optional[str], feasibility: Optional[FeasibilityReport]
+    ) -> UpstreamResult:
+        with stage("prompt_build"):
+            ai_prompt_data_request, prompt_stats = self._build_ai_request(client_data, feasibility)
+        ai_validation_results = await self._ai_request_validation(
+            ai_prompt_data_request, len(client_data.itinerary.segments)
+        )
+        with stage("parse"):
+            parsed_results = self.ai_results_parser.parse(ai_validation_results, client_data.itinerary.segments)
+        if self.response_cache is not None and cache_key is not None:
+            await self.response_cache.set(cache_key, parsed_results)
+
+        return UpstreamResult(output=parsed_results, prompt_stats=prompt_stats)
+
+    async def _validate_incremental(
+        self, client_data: TripValidatorInput, cache_key: Optional[str], feasibility: Optional[FeasibilityReport]
+    ) -> UpstreamResult:
+        """Validates only the segments without cached findings, then merges fresh and cached findings.
+
+        The trip as a whole is judged on every call, from an outline of all segments.
+        """
+        assert self.segment_cache is not None
+        segments = client_data.itinerary.segments
+        keys = segment_keys(client_data)
+        findings = self.segment_cache.lookup(keys)
+        changed = [index for index, finding in enumerate(findings) if finding is None]
+        # Always called, if only for the trip finding: totals and pacing span the segments that were cached.
+        with stage("prompt_build"):
+            ai_prompt_data_request, prompt_stats = self._build_segment_request(client_data, changed, feasibility)
+        ai_validation_results = await self._ai_request_validation(ai_prompt_data_request, len(changed))
+        with stage("parse"):
+            fresh, trip = self.ai_results_parser.parse_segments(ai_validation_results, segments, changed)
+        for index, finding in zip(changed, fresh):
+            findings[index] = finding
+            self.segment_cache.store(keys[index], finding)
+
+        parsed_results = merge_findings(findings, trip)  # type: ignore
+        if self.response_cache is not None and cache_key is not None:
+            await self.response_cache.set(cache_key, parsed_results)
+
+        segment_reuse = SegmentReuse(reused=len(segments) - len(changed), recomputed=len(changed))
+        return UpstreamResult(output=parsed_results, prompt_stats=prompt_stats, segment_reuse=segment_reuse)
+
+    async def _validate_batched(
+        self, client_data: TripValidatorInput, cache_key: Optional[str], feasibility: Optional[FeasibilityReport]
+    ) -> UpstreamResult:
+        """Validates a small itinerary together with the other small ones arriving within the batching window."""
+        assert self.micro_batcher is not None
+        with stage("prompt_build"):
+            prompt_stats = None
+            if self.prompt_compactor is not None:
+                itinerary_data, prompt_stats = self.prompt_compactor.render(client_data)
+            else:
+                itinerary_data = str(client_data.model_dump())
+        entry = BatchEntry(client_data=client_data, feasibility=feasibility, itinerary_data=itinerary_data)
+        parsed_results = await self.micro_batcher.submit(entry, estimate_tokens(itinerary_data))
+        if self.response_cache is not None and cache_key is not None:
+            await self.response_cache.set(cache_key, parsed_results)
+
+        return UpstreamResult(output=parsed_results, prompt_stats=prompt_stats)
+
+    async def _validate_entries(self, entries: Sequence[BatchEntry]) -> List[Optional[TripValidatorOutput]]:
+        with stage("prompt_build"):
+            ai_prompt_data_request = self._build_multi_request(entries)
+        size = sum(len(entry.client_data.itinerary.segments) for entry in entries)
+        ai_validation_results = await self._ai_request_validation(ai_prompt_data_request, size)
+        with stage("parse"):
+            return self.ai_results_parser.parse_items(
+                ai_validation_results, [entry.client_data.itinerary.segments for entry in entries]
+            )
+
+    async def _validate_entry(self, entry: BatchEntry) -> TripValidatorOutput:
+        upstream_result = await self._validate_upstream(entry.client_data, None, entry.feasibility)
+        return upstream_result.output
+
+    def _build_ai_request(
+        self, input_data: TripValidatorInput, feasibility: Optional[FeasibilityReport] = None
+    ) -> tuple[dict[str, Any], Optional[PromptStats]]:
         """Builds input data and prompt for requesting to the AI model."""
 
+        prompt_stats = None
+        if self.prompt_compactor is not None:
+            itinerary_data, prompt_stats = self.prompt_compactor.render(input_data)
+            itinerary_data += '\nPlaces are listed once under "places" and referenced by id from each segment.'
+        else:
+            itinerary_data = str(input_data.model_dump())
+
         prompt = f"""
-        Validate the following travel itinerary and provide suggestions: {input_data.model_dump()}
+        Validate the following travel itinerary and provide suggestions: {itinerary_data}
         Give the response in the following json format:
         
         "output_data":
+            "is_valid": bool,
+            "validation_score": float between 0 and 1,
             "feedback": str,
             "optimization_suggestions": [
-                "original_segment":
+                "original_segment": int,
                 "suggested_segment":
-                "reason":
-                "estimated_improvement":
+                "reason": str,
+                "estimated_improvement": float,
+            ],
+
+        In original_segment, put the index (starting at 0) of the segment in the itinerary, in suggested_segment,
+        put the suggested segment in the same format as the itinerary segments.
+        """
+        if feasibility is not None and self.config.feasibility_enrich_prompt:
+            prompt += f"Computed distance and implied speed of each segment:\n{feasibility.summary()}\n"
+
+        return self._completion_request(prompt), prompt_stats
+
+    def _build_segment_request(
+        self, input_data: TripValidatorInput, indices: List[int], feasibility: Optional[FeasibilityReport] = None
+    ) -> tuple[dict[str, Any], Optional[PromptStats]]:
+        """Builds a prompt asking for per-segment findings on ``indices`` and for a finding on the whole trip.
+
+        The neighbours of ``indices`` are sent as context, and every segment as a line of the trip outline.
+        """
+
+        segments = input_data.itinerary.segments
+        context = context_indices(indices, len(segments))
+        prompt_stats = None
+        if self.prompt_compactor is not None:
+            itinerary_data, prompt_stats = self.prompt_compactor.render(input_data, context)
+            itinerary_data += '\nPlaces are listed once under "places" and referenced by id from each segment.'
+        else:
+            itinerary_data = str(
+                {
+                    **input_data.model_dump(exclude={"itinerary": {"segments"}}),
+                    "segments": {index: segments[index].model_dump() for index in context},
+                }
+            )
+        outline = json.dumps(trip_outline(input_data), separators=(",", ":"))
+
+        prompt = f"""
+        Validate the segments of the following travel itinerary whose index is in {indices}: {itinerary_data}
+        Other segments are only given as context, to check the transitions into and out of those segments.
+        Also validate the itinerary as a whole (total cost and duration, pacing, user preferences), using this
+        outline of every segment: {outline}
+        Give the response in the following json format:
+
+        "output_data":
+            "trip":
+                "is_valid": bool,
+                "validation_score": float between 0 and 1,
+                "feedback": str,
+            "segments": [
+                "index": int,
+                "is_valid": bool,
+                "validation_score": float between 0 and 1,
+                "feedback": str,
+                "optimization_suggestions": [
+                    "suggested_segment":
+                    "reason": str,
+                    "estimated_improvement": float,
+                ],
+            ],
+
+        Give exactly one entry in segments per index to validate, and keep issues of a single segment out of
+        trip. In suggested_segment, put the suggested replacement of that segment in the same format as the
+        itinerary segments.
+        """
+        if feasibility is not None and self.config.feasibility_enrich_prompt:
+            prompt += f"Computed distance and implied speed of each segment:\n{feasibility.summary(context)}\n"
+
+        return self._completion_request(prompt), prompt_stats
+
+    def _build_multi_request(self, entries: Sequence[BatchEntry]) -> dict[str, Any]:
+        """Builds one prompt validating several itineraries, each answered under its id."""
+
+        itineraries = "\n".join(f"Itinerary {index}: {entry.itinerary_data}" for index, entry in enumerate(entries))
+        if self.prompt_compactor is not None:
+            itineraries += '\nIn each itinerary, places are listed once under "places" and referenced by id.'
+
+        prompt = f"""
+        Validate each of the following travel itineraries on its own and provide suggestions:
+        {itineraries}
+        Give the response in the following json format:
+
+        "output_data":
+            "items": [
+                "id": int,
+                "is_valid": bool,
+                "validation_score": float between 0 and 1,
+                "feedback": str,
+                "optimization_suggestions": [
+                    "original_segment": int,
+                    "suggested_segment":
+                    "reason": str,
+                    "estimated_improvement": float,
+                ],
             ],
 
-        In original_segment, put the original itinerary, in suggested_segment, put the suggestions.       
+        Give exactly one entry per itinerary, with the itinerary number as id. In original_segment, put the index
+        (starting at 0) of the segment within that itinerary, in suggested_segment, put the suggested segment in
+        the same format as the itinerary segments.
         """
-        data = {
-            "model": "gpt-4o-mini",
+        if self.config.feasibility_enrich_prompt:
+            for index, entry in enumerate(entries):
+                if entry.feasibility is not None:
+                    prompt += f"Computed distance and implied speed of each segment of itinerary {index}:\n"
+                    prompt += f"{entry.feasibility.summary()}\n"
+
+        return self._completion_request(prompt)
+
+    def _completion_request(self, prompt: str) -> dict[str, Any]:
+        return {
+            "model": self.config.openai_model,
             "messages": [
                 {"role": "system", "content": "You are a travel assistant specialized in validating itineraries."},
                 {"role": "user", "content": prompt},
             ],
         }
 
-        return data
+    async def _ai_request_validation(self, data: dict[str, Any], size: int = 0) -> str:
+        """Calls the model for an itinerary (or part of one) of ``size`` segments, through the router if configured."""
+        if self.model_router is None:
+            return await self.upstream_policy.call(lambda: self._ai_request_attempt(data))
+
+        prompt_tokens = sum(estimate_tokens(message["content"]) for message in data["messages"])
+        return await self.upstream_policy.call(lambda: self._routed_attempt(data, prompt_tokens, size))
+
+    async def _routed_attempt(self, data: dict[str, Any], prompt_tokens: int, size: int) -> str:
+        assert self.model_router is not None
+        async with self.model_router.route(prompt_tokens, size) as backend:
+            return await self._ai_request_attempt({**data, "model": backend.model}, backend.url, backend.api_key)
+
+    async def _ai_request_attempt(
+        self, data: dict[str, Any], endpoint: Optional[str] = None, api_key: Optional[str] = None
+    ) -> str:
+        endpoint = endpoint or self.openai_api_url
+        api_key = api_key if api_key is not None else self.openai_api_key
+        headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+        session = await self._get_session()
+        try:
+            sent_at = time.perf_counter()
+            async with session.post(endpoint, headers=headers, json=data) as response:
+                headers_at = time.perf_counter()
+                record_stage("upstream_wait", headers_at - sent_at)
+                count_upstream_status(response.status)
+                if response.status == 200:
+                    result = await response.text()
+                    record_stage("upstream_read", time.perf_counter() - headers_at)
+                    return result
+                logger.error(msg := f"{__name__} raised for status: {response.status}")
+                retry_after = response.headers.get("Retry-After")
+                raise HTTPException(
+                    status_code=response.status,
+                    detail=msg,
+                    headers={"Retry-After": retry_after} if retry_after is not None else None,
+                )
+        except (ClientConnectionError, HTTPException) as e:
+            logger.error(f"Request error for URL {endpoint}: {e}")
+            raise e
+
+    async def _ai_request_validation_stream(self, data: dict[str, Any], size: int = 0) -> AsyncIterator[str]:
+        """Requests a streamed (SSE) completion and yields the content deltas as they arrive."""
+        if self.model_router is None:
+            async for delta in self._ai_request_stream(data, self.openai_api_url, self.openai_api_key):
+                yield delta
+            return
+
+        prompt_tokens = sum(estimate_tokens(message["content"]) for message in data["messages"])
+        async with self.model_router.route(prompt_tokens, size) as backend:
+            async for delta in self._ai_request_stream({**data, "model": backend.model}, backend.url, backend.api_key):
+                yield delta
 
-    async def _ai_request_validation(self, data: dict[str, Any]) -> str:
-        headers = {"Authorization": f"Bearer {self.openai_api_key}", "Content-Type": "application/json"}
-        async with aiohttp.ClientSession() as session:
-            endpoint = self.openai_api_url
+    async def _ai_request_stream(
+        self, data: dict[str, Any], endpoint: str, api_key: Optional[str]
+    ) -> AsyncIterator[str]:
+        headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+        session = await self._get_session()
+        async with self.upstream_policy.guard():
             try:
-                async with session.post(self.openai_api_url, headers=headers, json=data) as response:
-                    if response.status == 200:
-                        result = await response.text()
-                        return result
-                    logger.error(msg := f"{__name__} raised for status: {response.status}")
-                    raise HTTPException(status_code=response.status, detail=msg)
+                sent_at = time.perf_counter()
+                # OpenAI only reports usage on streams that ask for it, in a last chunk without choices.
+                body = {**data, "stream": True, "stream_options": {"include_usage": True}}
+                async with session.post(endpoint, headers=headers, json=body) as response:
+                    headers_at = time.perf_counter()
+                    record_stage("upstream_wait", headers_at - sent_at)
+                    count_upstream_status(response.status)
+                    if response.status != 200:
+                        logger.error(msg := f"{__name__} raised for status: {response.status}")
+                        retry_after = response.headers.get("Retry-After")
+                        raise HTTPException(
+                            status_code=response.status,
+                            detail=msg,
+                            headers={"Retry-After": retry_after} if retry_after is not None else None,
+                        )
+                    if self.upstream_policy.breaker is not None:
+                        # Close the circuit as soon as the upstream answers, not when the stream ends.
+                        self.upstream_policy.breaker.record_success()
+                    async for line in response.content:
+                        if not line.startswith(b"data:"):
+                            continue
+                        payload = line[5:].strip()
+                        if payload == b"[DONE]":
+                            break
+                        chunk = json.loads(payload)
+                        count_tokens(chunk.get("usage"))
+                        choices = chunk.get("choices")
+                        if choices and (delta := choices[0].get("delta", {}).get("content")):
+                            yield delta
+                    record_stage("upstream_read", time.perf_counter() - headers_at)
             except (ClientConnectionError, HTTPException) as e:
                 logger.error(f"Request error for URL {endpoint}: {e}")
                 raise e
 
-    def _process_ai_results(self, parsed_results: TripValidatorOutput) -> TripValidatorResponse:
+    def _process_ai_results(
+        self,
+        parsed_results: TripValidatorOutput,
+        cached: bool = False,
+        prompt_stats: Optional[PromptStats] = None,
+        segment_reuse: Optional[SegmentReuse] = None,
+    ) -> TripValidatorResponse:
         processed_results = TripValidatorResponse(
             output_data=parsed_results,
-            processing_time=0,  # TODO: Calculate total processing time
+            processing_time=0,  # Set by the caller, which owns the request clock
             version="1.0.0",  # TODO: Give a version to this revision based on id (future implementation)
+            cached=cached,
+            prompt_stats=prompt_stats,
+            segment_reuse=segment_reuse,
         )
 
         return processed_results
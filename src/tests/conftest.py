@@ -0,0 +1,54 @@
+from contextlib import asynccontextmanager
+from typing import Any, AsyncContextManager, AsyncIterator, Callable, Optional
+
+import pytest
+
+from benchmarks.stub_upstream import StubStats, create_stub_app, start_stub_upstream, stub_stats_key
+from core.config import Settings
+from services.upstream_policy import UpstreamPolicy
+from services.validation_service import ValidationService
+
+
+class ExplicitSettings(Settings):
+    """Settings read from keyword arguments only, so neither src/.env nor the environment changes test outcomes."""
+
+    @classmethod
+    def settings_customise_sources(cls, settings_cls, init_settings, *args, **kwargs):
+        return (init_settings,)
+
+
+def service_settings(**overrides: Any) -> Settings:
+    """Defaults for tests talking to the stub upstream: no response cache, so every validation reaches it."""
+    return ExplicitSettings(**{"openai_api_key": "test", "cache_enabled": False, **overrides})
+
+
+StubService = Callable[..., AsyncContextManager[tuple[ValidationService, StubStats]]]
+
+
+@pytest.fixture
+def stub_service() -> StubService:
+    """Starts a fault-injecting stub upstream and a ValidationService pointed at it.
+
+    ``async with stub_service(upstream_policy, overrides, **stub_options) as (service, stats)``: the service is built
+    from ``service_settings(**overrides)`` and ``stats.calls`` counts the requests the stub received.
+    """
+
+    @asynccontextmanager
+    async def start(
+        upstream_policy: Optional[UpstreamPolicy] = None,
+        overrides: Optional[dict[str, Any]] = None,
+        **stub_options: Any,
+    ) -> AsyncIterator[tuple[ValidationService, StubStats]]:
+        stub = create_stub_app(**stub_options)
+        runner, url = await start_stub_upstream(stub)
+        service = ValidationService(service_settings(**{**(overrides or {}), "openai_api_url": url}))
+        if upstream_policy is not None:
+            service.upstream_policy = upstream_policy
+        await service.start()
+        try:
+            yield service, stub[stub_stats_key]
+        finally:
+            await service.close()
+            await runner.cleanup()
+
+    return start
@@ -0,0 +1,54 @@
+import asyncio
+import json
+
+import pytest
+from pydantic import TypeAdapter, ValidationError
+
+from benchmarks.synthetic import synthetic_request
+from parsers.request_parsers import BatchTooLargeError, parse_request_batch
+from server import create_itinerary_batch
+
+
+def batch_body() -> str:
+    malformed = synthetic_request(segments=2)
+    del malformed["input_data"]["itinerary"]["segments"][0]["start_point"]
+    return json.dumps([synthetic_request(segments=2), malformed, synthetic_request(segments=3)])
+
+
+@pytest.mark.parametrize("mode", ["strict", "fast"])
+def test_malformed_item_does_not_fail_the_batch(mode):
+    requests = parse_request_batch(batch_body(), mode)
+
+    assert len(requests) == 3
+    assert isinstance(requests[1], ValidationError)
+    assert not isinstance(requests[0], ValidationError) and not isinstance(requests[2], ValidationError)
+
+
+def test_body_that_is_not_a_list_is_rejected():
+    with pytest.raises(ValidationError):
+        parse_request_batch(json.dumps(synthetic_request(segments=2)))
+
+
+def test_oversized_batch_is_rejected_before_its_items_are_validated(monkeypatch):
+    validated = []
+    monkeypatch.setattr(TypeAdapter, "validate_python", lambda self, *args, **kwargs: validated.append(args))
+
+    with pytest.raises(BatchTooLargeError) as too_large:
+        parse_request_batch(batch_body(), max_items=2)
+
+    assert too_large.value.size == 3
+    assert validated == []
+
+
+def test_batch_streams_an_error_item_per_malformed_request(stub_service):
+    async def scenario() -> list[dict]:
+        async with stub_service() as (service, _):
+            response = await create_itinerary_batch(parse_request_batch(batch_body()), service)
+            return [json.loads(line) async for line in response.body_iterator]
+
+    items = {item["index"]: item for item in asyncio.run(scenario())}
+
+    assert sorted(items) == [0, 1, 2]
+    assert items[1]["error"]["status_code"] == 422
+    assert items[1]["response"] is None
+    assert items[0]["response"] is not None and items[2]["response"] is not None
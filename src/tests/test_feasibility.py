@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from benchmarks.synthetic import synthetic_request
+from models.base_models import TransportationMethod
+from models.validator_models import TripValidatorRequest
+from services.feasibility import FeasibilityChecker
+from services.prevalidation import PreValidator, Tolerances
+
+CHECKER = FeasibilityChecker(
+    max_speeds_kmh={
+        TransportationMethod.WALKING: 8.0,
+        TransportationMethod.BICYCLE: 40.0,
+        TransportationMethod.PUBLIC_TRANSPORT: 150.0,
+        TransportationMethod.CAR: 180.0,
+    }
+)
+# One degree of longitude on the equator.
+DEGREE_KM = 111.195
+
+
+def trip(method: str = "CAR", departure: str = "2024-09-07T08:00:00Z", arrival: str = "2024-09-07T09:00:00Z"):
+    payload = synthetic_request(segments=1)
+    segment = payload["input_data"]["itinerary"]["segments"][0]
+    segment["start_point"]["location"]["coordinates"] = {"latitude": 0.0, "longitude": 0.0}
+    segment["end_point"]["location"]["coordinates"] = {"latitude": 0.0, "longitude": 1.0}
+    segment.update(transportation_method=method, departure_time=departure, arrival_time=arrival)
+    payload["input_data"]["itinerary"]["total_duration"] = 1.0
+    return TripValidatorRequest.model_validate(payload).input_data
+
+
+@pytest.fixture
+def host_not_on_utc(monkeypatch):
+    monkeypatch.setenv("TZ", "America/Sao_Paulo")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.mark.parametrize("method, feasible", [("CAR", True), ("PUBLIC_TRANSPORT", True), ("BICYCLE", False)])
+def test_speed_verdict_follows_the_mode_limit(method, feasible):
+    report = CHECKER.assess(trip(method).itinerary)
+
+    assert report.distances_km[0] == pytest.approx(DEGREE_KM, rel=1e-3)
+    assert report.durations_h[0] == pytest.approx(1.0)
+    assert report.speeds_kmh[0] == pytest.approx(DEGREE_KM, rel=1e-3)
+    assert report.is_feasible is feasible
+    assert (report.violation() is None) is feasible
+
+
+def test_zero_travel_time_over_a_distance_is_infeasible():
+    report = CHECKER.assess(trip(arrival="2024-09-07T08:00:00Z").itinerary)
+
+    assert report.durations_h[0] == 0
+    assert not report.is_feasible
+
+
+@pytest.mark.parametrize(
+    "departure, arrival",
+    [
+        ("2024-09-07T08:00:00", "2024-09-07T09:00:00"),
+        ("2024-09-07T08:00:00", "2024-09-07T09:00:00+00:00"),
+        ("2024-09-07T05:00:00-03:00", "2024-09-07T09:00:00"),
+    ],
+)
+def test_naive_times_are_read_as_utc(host_not_on_utc, departure, arrival):
+    client_data = trip(departure=departure, arrival=arrival)
+    pre_validator = PreValidator(
+        mode="pre-filter", tolerances=Tolerances(duration_hours=0.25, cost_absolute=0.01, cost_relative=0.01)
+    )
+
+    [report] = CHECKER.assess_batch([client_data.itinerary])
+
+    assert report.durations_h[0] == pytest.approx(1.0)
+    assert pre_validator.check(client_data, report) == []
+
+
+def test_batch_reports_each_itinerary_separately():
+    reports = CHECKER.assess_batch([trip(method).itinerary for method in ("CAR", "WALKING", "CAR")])
+
+    assert [report.is_feasible for report in reports] == [True, False, True]
+    assert all(len(report.methods) == 1 for report in reports)
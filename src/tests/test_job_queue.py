@@ -0,0 +1,176 @@
+import asyncio
+import sqlite3
+
+import pytest
+from aiohttp import web
+
+from benchmarks.synthetic import synthetic_request
+from models.validator_models import TripValidatorOutput, TripValidatorRequest, TripValidatorResponse
+from services.job_queue import JobQueue, JobStore, WebhookPolicy, WebhookRejectedError
+
+
+class FakeValidationService:
+    async def validate_itinerary(self, client_data) -> TripValidatorResponse:
+        output = TripValidatorOutput(is_valid=True, validation_score=1.0, feedback="ok")
+        return TripValidatorResponse(output_data=output, processing_time=0, version="1.0.0")
+
+
+def test_worker_survives_a_store_error(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"), lease_timeout=60)
+    finish = store.finish
+    failures = []
+
+    def flaky_finish(*args, **kwargs):
+        if not failures:
+            failures.append(args)
+            raise sqlite3.OperationalError("database is locked")
+        return finish(*args, **kwargs)
+
+    store.finish = flaky_finish  # type: ignore
+    queue = JobQueue(
+        store, FakeValidationService(), workers=1, max_queued=10, max_attempts=3, retention=60, poll_interval=0.01
+    )
+
+    async def scenario():
+        await queue.start()
+        try:
+            requests = [TripValidatorRequest.model_validate(synthetic_request(segments=n)) for n in (2, 3)]
+            jobs = [await queue.submit(request) for request in requests]
+            for _ in range(200):
+                views = [await queue.get(job.job_id) for job in jobs]
+                if views[1].status == "done":
+                    return views, [task.done() for task in queue._tasks]
+                await asyncio.sleep(0.01)
+            raise AssertionError("the second job never finished")
+        finally:
+            await queue.close()
+
+    views, workers_done = asyncio.run(scenario())
+
+    assert len(failures) == 1
+    assert views[0].status == "running"
+    assert workers_done == [False]
+
+
+class SlowValidationService(FakeValidationService):
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    async def validate_itinerary(self, client_data) -> TripValidatorResponse:
+        await asyncio.sleep(self.delay)
+        return await super().validate_itinerary(client_data)
+
+
+def test_lease_is_renewed_while_the_job_runs(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    store = JobStore(path, lease_timeout=0.6)
+    other = JobStore(path, lease_timeout=0.6)
+    queue = JobQueue(
+        store, SlowValidationService(1.5), workers=1, max_queued=10, max_attempts=3, retention=60, poll_interval=0.01
+    )
+
+    async def scenario():
+        await queue.start()
+        try:
+            job = await queue.submit(TripValidatorRequest.model_validate(synthetic_request(segments=2)))
+            stolen = []
+            for _ in range(200):
+                view = await queue.get(job.job_id)
+                if view.status == "done":
+                    return view, stolen
+                if view.status == "running" and (claimed := await asyncio.to_thread(other.claim, "elsewhere:1")):
+                    stolen.append(claimed)
+                await asyncio.sleep(0.02)
+            raise AssertionError("the job never finished")
+        finally:
+            await queue.close()
+            other.close()
+
+    view, stolen = asyncio.run(scenario())
+
+    assert stolen == []
+    assert view.status == "done"
+
+
+@pytest.mark.parametrize(
+    "url, reason",
+    [
+        ("https://hooks.example.com/done", None),
+        ("https://a.tenants.example.com/done", None),
+        ("https://evil.example.org/done", "not in JOBS_WEBHOOK_ALLOWED_HOSTS"),
+        ("ftp://hooks.example.com/done", "only http and https"),
+        ("http://169.254.169.254/latest/meta-data", "not a public address"),
+        ("http://10.0.0.5/done", "not a public address"),
+        ("http://[::ffff:127.0.0.1]/done", "not a public address"),
+    ],
+)
+def test_webhook_policy(url, reason):
+    allowed_hosts = ["hooks.example.com", ".tenants.example.com", "169.254.169.254", "10.0.0.5", "::ffff:127.0.0.1"]
+    policy = WebhookPolicy(allowed_hosts)
+
+    if reason is None:
+        policy.check(url)
+    else:
+        with pytest.raises(WebhookRejectedError, match=reason):
+            policy.check(url)
+
+
+def test_webhooks_are_refused_unless_enabled(tmp_path):
+    queue = JobQueue(
+        JobStore(str(tmp_path / "jobs.sqlite3"), lease_timeout=60),
+        FakeValidationService(),
+        workers=1,
+        max_queued=10,
+        max_attempts=3,
+        retention=60,
+    )
+    request = TripValidatorRequest.model_validate(synthetic_request(segments=2))
+
+    with pytest.raises(WebhookRejectedError, match="disabled"):
+        asyncio.run(queue.submit(request, webhook_url="https://hooks.example.com/done"))
+    queue.store.close()
+
+
+def test_webhook_to_a_name_resolving_to_loopback_is_not_sent(tmp_path):
+    received = []
+
+    async def hook(request: web.Request) -> web.Response:
+        received.append(await request.json())
+        return web.Response()
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_post("/done", hook)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        queue = JobQueue(
+            JobStore(str(tmp_path / "jobs.sqlite3"), lease_timeout=60),
+            FakeValidationService(),
+            workers=1,
+            max_queued=10,
+            max_attempts=3,
+            retention=60,
+            poll_interval=0.01,
+            webhook_policy=WebhookPolicy(["localhost"]),
+        )
+        await queue.start()
+        try:
+            request = TripValidatorRequest.model_validate(synthetic_request(segments=2))
+            await queue.submit(request, webhook_url=f"http://localhost:{port}/done")
+            for _ in range(200):
+                if queue.stats.webhooks_failed:
+                    return queue.stats
+                await asyncio.sleep(0.01)
+            raise AssertionError("the webhook was never attempted")
+        finally:
+            await queue.close()
+            await runner.cleanup()
+
+    stats = asyncio.run(scenario())
+
+    assert stats.done == 1
+    assert stats.webhooks_sent == 0
+    assert received == []
@@ -0,0 +1,48 @@
+import asyncio
+import re
+
+from benchmarks.synthetic import synthetic_request
+from core.metrics import UPSTREAM_TOKENS, MetricsRegistry
+from models.validator_models import TripValidatorRequest
+
+SAMPLE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_][a-zA-Z0-9_]*="([^"\\]|\\.)*",?)*\})? \S+$')
+
+
+def test_collector_keys_become_labels_or_valid_names():
+    registry = MetricsRegistry(enabled=True, prefix="tripvalidator")
+    registry.register_collector(
+        lambda: {
+            "router": {"openai-primary": {"calls": 1, "model": "gpt-4o-mini"}, 'local "gpu"': {"calls": 2}},
+            "prevalidation": {"checked": 3, "rule_hits": {"total-cost": 1}},
+        },
+        labels={"router": "backend"},
+    )
+
+    lines = registry.render().splitlines()
+
+    assert 'tripvalidator_router_calls{backend="openai-primary"} 1' in lines
+    assert 'tripvalidator_router_calls{backend="local \\"gpu\\""} 2' in lines
+    assert "tripvalidator_prevalidation_rule_hits_total_cost 1" in lines
+    assert all(SAMPLE.match(line) for line in lines if not line.startswith("#"))
+    assert lines.count("# TYPE tripvalidator_router_calls gauge") == 1
+    assert lines.index("# TYPE tripvalidator_router_calls gauge") < lines.index(
+        'tripvalidator_router_calls{backend="openai-primary"} 1'
+    )
+    assert "# TYPE tripvalidator_prevalidation_checked gauge" in lines
+
+
+
+def test_streamed_completions_count_tokens(stub_service):
+    def streamed_tokens() -> float:
+        return sum(UPSTREAM_TOKENS._values.values())
+
+    async def scenario():
+        async with stub_service() as (service, stats):
+            client_data = TripValidatorRequest.model_validate(synthetic_request(segments=3)).input_data
+            [event async for event in service.validate_itinerary_stream(client_data)]
+            return stats
+
+    before = streamed_tokens()
+    stats = asyncio.run(scenario())
+
+    assert streamed_tokens() - before == stats.prompt_tokens + stats.completion_tokens > 0
@@ -0,0 +1,108 @@
+import asyncio
+from typing import Optional, Sequence
+
+from parsers.validator_parsers import ModelResponseError
+from services.micro_batcher import MicroBatcher
+
+
+class Upstream:
+    """Records the batches and single calls a MicroBatcher makes; ``answer`` decides each batched item's result."""
+
+    def __init__(self, answer=lambda item: f"batch:{item}", error: Optional[Exception] = None):
+        self.answer = answer
+        self.error = error
+        self.batches: list[list[int]] = []
+        self.singles: list[int] = []
+
+    async def flush(self, items: Sequence[int]) -> list[Optional[str]]:
+        self.batches.append(list(items))
+        if self.error is not None:
+            raise self.error
+        return [self.answer(item) for item in items]
+
+    async def single(self, item: int) -> str:
+        self.singles.append(item)
+        return f"single:{item}"
+
+
+def batcher(upstream: Upstream, window: float = 10, max_items: int = 8, token_budget: int = 1000) -> MicroBatcher:
+    return MicroBatcher(upstream.flush, upstream.single, window=window, max_items=max_items, token_budget=token_budget)
+
+
+async def submit_all(micro_batcher: MicroBatcher, items: Sequence[int], tokens: int = 1) -> list:
+    """Submits the items together; the first goes alone, as no arrival gap is known yet."""
+    calls = [micro_batcher.submit(item, tokens) for item in items]
+    return await asyncio.wait_for(asyncio.gather(*calls, return_exceptions=True), 1)
+
+
+def test_batch_is_flushed_when_the_window_elapses():
+    upstream = Upstream()
+
+    results = asyncio.run(submit_all(batcher(upstream, window=0.05), range(4)))
+
+    assert upstream.singles == [0]
+    assert upstream.batches == [[1, 2, 3]]
+    assert results == ["single:0", "batch:1", "batch:2", "batch:3"]
+
+
+def test_full_batch_is_flushed_without_waiting():
+    upstream = Upstream()
+
+    asyncio.run(submit_all(batcher(upstream, max_items=2), range(5)))
+
+    assert upstream.batches == [[1, 2], [3, 4]]
+
+
+def test_batch_is_flushed_at_the_token_budget():
+    upstream = Upstream()
+
+    asyncio.run(submit_all(batcher(upstream, token_budget=10), range(5), tokens=5))
+
+    assert upstream.batches == [[1, 2], [3, 4]]
+
+
+def test_items_left_out_of_the_answer_are_validated_alone():
+    upstream = Upstream(answer=lambda item: None if item % 2 else f"batch:{item}")
+    micro_batcher = batcher(upstream, max_items=4)
+
+    results = asyncio.run(submit_all(micro_batcher, range(5)))
+
+    assert upstream.batches == [[1, 2, 3, 4]]
+    assert upstream.singles == [0, 1, 3]
+    assert results == ["single:0", "single:1", "batch:2", "single:3", "batch:4"]
+    assert micro_batcher.stats.fallbacks == 2
+
+
+def test_malformed_answer_splits_the_batch():
+    upstream = Upstream(error=ModelResponseError("no items"))
+    micro_batcher = batcher(upstream, max_items=3)
+
+    results = asyncio.run(submit_all(micro_batcher, range(4)))
+
+    assert results == [f"single:{item}" for item in range(4)]
+    assert micro_batcher.stats.batch_failures == 1
+
+
+def test_other_batch_errors_reach_every_waiter():
+    error = RuntimeError("upstream down")
+    upstream = Upstream(error=error)
+
+    results = asyncio.run(submit_all(batcher(upstream, max_items=3), range(4)))
+
+    assert results == ["single:0", error, error, error]
+    assert upstream.singles == [0]
+
+
+def test_items_arriving_further_apart_than_the_window_go_alone():
+    upstream = Upstream()
+    micro_batcher = batcher(upstream, window=0.02, max_items=2)
+
+    async def scenario():
+        for item in range(3):
+            await micro_batcher.submit(item, 1)
+            await asyncio.sleep(0.1)
+
+    asyncio.run(scenario())
+
+    assert upstream.batches == []
+    assert upstream.singles == [0, 1, 2]
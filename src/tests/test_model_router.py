@@ -0,0 +1,139 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from core.config import UpstreamBackend
+from services.model_router import Backend, ModelRouter
+from services.upstream_policy import CircuitBreaker, CircuitOpenError, UpstreamPolicy
+
+RESET_TIMEOUT = 0.05
+
+
+def backend(name: str = "openai-primary", reset_timeout: float = RESET_TIMEOUT, **backend_options) -> Backend:
+    config = UpstreamBackend(name=name, url="http://127.0.0.1:9/v1/chat/completions", **backend_options)
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=reset_timeout)
+    return Backend(config, "key", latency_window=10, breaker=breaker)
+
+
+def router(**backend_options) -> ModelRouter:
+    return ModelRouter([backend(**backend_options)], cost_weight=0, completion_tokens=0)
+
+
+async def half_open(model_router: ModelRouter) -> CircuitBreaker:
+    breaker = model_router.backends[0].breaker
+    assert breaker is not None
+    breaker.record_failure()
+    await asyncio.sleep(RESET_TIMEOUT + 0.05)
+    return breaker
+
+
+async def routed(model_router: ModelRouter, attempt) -> str:
+    async with model_router.route(prompt_tokens=10, size=1):
+        return await attempt()
+
+
+async def rejected() -> str:
+    raise HTTPException(status_code=400)
+
+
+def test_timed_out_probe_is_released():
+    model_router = router()
+    policy = UpstreamPolicy(max_attempts=1, attempt_timeout=0.05, total_timeout=1, backoff_base=0, backoff_max=0)
+
+    async def scenario():
+        breaker = await half_open(model_router)
+        with pytest.raises(HTTPException) as timed_out:
+            await policy.call(lambda: routed(model_router, lambda: asyncio.sleep(10, "late")))
+        assert timed_out.value.status_code == 504
+        result = await policy.call(lambda: routed(model_router, lambda: asyncio.sleep(0, "ok")))
+        return result, breaker.state
+
+    assert asyncio.run(scenario()) == ("ok", "closed")
+
+
+def test_probe_with_non_retryable_error_closes_the_circuit():
+    model_router = router()
+
+    async def scenario():
+        breaker = await half_open(model_router)
+        with pytest.raises(HTTPException):
+            await routed(model_router, rejected)
+        return breaker.state
+
+    assert asyncio.run(scenario()) == "closed"
+
+
+def test_probe_cancelled_while_queued_is_released():
+    model_router = router(max_concurrency=1)
+
+    async def scenario():
+        busy = asyncio.ensure_future(routed(model_router, lambda: asyncio.sleep(10, "busy")))
+        await asyncio.sleep(0.01)
+        breaker = await half_open(model_router)
+        queued = asyncio.ensure_future(routed(model_router, lambda: asyncio.sleep(0, "queued")))
+        await asyncio.sleep(0.01)
+        with pytest.raises(CircuitOpenError):
+            model_router.select(prompt_tokens=10, size=1)
+        queued.cancel()
+        busy.cancel()
+        await asyncio.gather(queued, busy, return_exceptions=True)
+        return breaker.allow()
+
+    assert asyncio.run(scenario())
+
+
+def test_every_circuit_open_is_not_an_upstream_failure():
+    model_router = ModelRouter(
+        [backend("openai-primary", reset_timeout=60), backend("openai-secondary", reset_timeout=60)],
+        cost_weight=0,
+        completion_tokens=0,
+    )
+    for open_backend in model_router.backends:
+        open_backend.breaker.record_failure()  # type: ignore
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    policy = UpstreamPolicy(
+        max_attempts=3, attempt_timeout=1, total_timeout=1, backoff_base=0, backoff_max=0, breaker=breaker
+    )
+    sent = []
+
+    async def scenario():
+        with pytest.raises(CircuitOpenError):
+            await policy.call(lambda: routed(model_router, lambda: sent.append(1) or asyncio.sleep(0, "ok")))
+
+    asyncio.run(scenario())
+
+    assert sent == []
+    assert (policy.stats.attempts, policy.stats.retries, policy.stats.failures) == (1, 0, 0)
+    assert breaker.state == "closed"
+
+
+def sized_router() -> ModelRouter:
+    """A cheap backend limited to small itineraries and a pricier one that takes any size."""
+    return ModelRouter(
+        [backend("small", max_segments=3), backend("large", prompt_cost=1.0)], cost_weight=1000, completion_tokens=0
+    )
+
+
+@pytest.mark.parametrize("size, chosen", [(1, "small"), (3, "small"), (4, "large"), (20, "large")])
+def test_itinerary_goes_to_the_cheapest_backend_that_fits(size, chosen):
+    assert sized_router().select(prompt_tokens=1000, size=size).name == chosen
+
+
+def test_oversized_itinerary_waits_for_a_backend_that_fits():
+    model_router = sized_router()
+    model_router.backends[1].cooldown_until = time.monotonic() + 60
+
+    assert model_router.select(prompt_tokens=1000, size=1).name == "small"
+    assert model_router.select(prompt_tokens=1000, size=10).name == "large"
+
+
+def test_itinerary_larger_than_every_limit_uses_any_backend():
+    model_router = ModelRouter(
+        [backend("small", max_segments=3), backend("medium", max_segments=6, prompt_cost=1.0)],
+        cost_weight=1000,
+        completion_tokens=0,
+    )
+
+    assert model_router.select(prompt_tokens=1000, size=10).name == "small"
@@ -0,0 +1,31 @@
+from benchmarks.synthetic import synthetic_request
+from models.validator_models import TripValidatorRequest
+from services.prevalidation import PreValidator, Tolerances
+
+TOLERANCES = Tolerances(duration_hours=0.25, cost_absolute=0.01, cost_relative=0.01)
+
+
+def client_data():
+    return TripValidatorRequest.model_validate(synthetic_request(segments=3)).input_data
+
+
+def test_fallback_after_pre_filter_does_not_check_again():
+    pre_validator = PreValidator(mode="pre-filter", tolerances=TOLERANCES)
+    data = client_data()
+
+    assert pre_validator.validate(data) is None
+    output = pre_validator.fallback(data)
+
+    assert output.is_valid
+    assert pre_validator.checked == 1
+
+
+def test_fallback_checks_once_when_pre_filtering_is_off():
+    pre_validator = PreValidator(mode="off", tolerances=TOLERANCES)
+    data = client_data()
+
+    assert pre_validator.validate(data) is None
+    output = pre_validator.fallback(data)
+
+    assert output.is_valid
+    assert pre_validator.checked == 1
@@ -0,0 +1,33 @@
+import json
+
+from benchmarks.synthetic import synthetic_request
+from models.validator_models import TripValidatorInput, TripValidatorRequest
+from services.prompt_compaction import PromptCompactor
+
+
+def client_data():
+    return TripValidatorRequest.model_validate(synthetic_request(segments=3)).input_data
+
+
+def test_render_skips_the_full_dump_unless_measuring(monkeypatch):
+    dumps = []
+    monkeypatch.setattr(TripValidatorInput, "model_dump_json", lambda self, **kwargs: dumps.append(self) or "{}")
+    compactor = PromptCompactor(review_mode="summary")
+
+    compact, prompt_stats = compactor.render(client_data())
+
+    assert prompt_stats is None
+    assert dumps == []
+    assert len(json.loads(compact)["segments"]) == 3
+    assert compactor.snapshot()["original_bytes"] is None
+
+
+def test_measured_render_reports_the_savings():
+    compactor = PromptCompactor(review_mode="summary", measure=True)
+
+    compact, prompt_stats = compactor.render(client_data())
+
+    assert prompt_stats is not None
+    assert prompt_stats.compact_bytes == len(compact.encode("utf-8"))
+    assert prompt_stats.compact_bytes < prompt_stats.original_bytes
+    assert compactor.snapshot()["original_bytes"] == prompt_stats.original_bytes
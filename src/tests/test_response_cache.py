@@ -0,0 +1,42 @@
+import asyncio
+import sqlite3
+
+from services.response_cache import SQLiteCacheBackend
+
+
+def rows(path: str) -> int:
+    with sqlite3.connect(path) as connection:
+        return connection.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+
+def test_sqlite_purge_deletes_expired_rows(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    backend = SQLiteCacheBackend(path, max_entries=100, purge_interval=0)
+
+    async def scenario() -> None:
+        for index in range(10):
+            await backend.set(f"stale-{index}", "{}", ttl=-1)
+        await backend.set("fresh", "{}", ttl=60)
+        await backend.close()
+
+    asyncio.run(scenario())
+
+    assert rows(path) == 1
+    assert backend.snapshot()["expirations"] == 10
+
+
+def test_sqlite_purge_evicts_rows_closest_to_expiry(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    backend = SQLiteCacheBackend(path, max_entries=3, purge_interval=0)
+
+    async def scenario() -> list:
+        for index in range(5):
+            await backend.set(f"key-{index}", "{}", ttl=60 + index)
+        values = [await backend.get(f"key-{index}") for index in range(5)]
+        await backend.close()
+        return values
+
+    values = asyncio.run(scenario())
+
+    assert values == [None, None, "{}", "{}", "{}"]
+    assert backend.snapshot()["evictions"] == 2
@@ -0,0 +1,79 @@
+import asyncio
+import copy
+import re
+from typing import Any
+
+from benchmarks.synthetic import synthetic_request
+from models.validator_models import TripValidatorRequest
+from parsers.validator_parsers import SegmentFinding, TripFinding
+from services.segment_cache import merge_findings
+
+INDICES = re.compile(r"whose index is in \[([\d, ]*)\]")
+SEGMENTS = 5
+
+
+def finding(index: int, score: float = 0.9) -> SegmentFinding:
+    return SegmentFinding(index=index, is_valid=True, validation_score=score, feedback=f"Segment {index} is fine.")
+
+
+def responder(trip_valid: bool):
+    def respond(payload: dict[str, Any]) -> dict[str, Any]:
+        match = INDICES.search(payload["messages"][-1]["content"])
+        assert match is not None
+        indices = [int(index) for index in match.group(1).split(",") if index.strip()]
+        trip = {"is_valid": trip_valid, "validation_score": 0.4, "feedback": "Over budget."}
+        return {"output_data": {"trip": trip, "segments": [finding(index).model_dump() for index in indices]}}
+
+    return respond
+
+
+def edit_segment(request: dict[str, Any], index: int) -> dict[str, Any]:
+    request = copy.deepcopy(request)
+    segment = request["input_data"]["itinerary"]["segments"][index]
+    segment["cost_estimate"]["source_description"] = "Revised estimate"
+    return request
+
+
+def edit_total(request: dict[str, Any]) -> dict[str, Any]:
+    request = copy.deepcopy(request)
+    request["input_data"]["itinerary"]["total_cost"]["estimated_cost"] += 100
+    return request
+
+
+def test_merge_keeps_the_trip_finding():
+    trip = TripFinding(is_valid=False, validation_score=0.3, feedback="Total cost does not add up.")
+
+    output = merge_findings([finding(0, 0.8), finding(1, 1.0)], trip)
+
+    assert not output.is_valid
+    assert output.validation_score == 0.3
+    assert output.feedback.splitlines()[0] == "Trip: Total cost does not add up."
+
+
+def test_merge_without_a_trip_finding_averages_the_segments():
+    output = merge_findings([finding(0, 0.8), finding(1, 1.0)])
+
+    assert output.is_valid
+    assert output.validation_score == 0.9
+    assert len(output.feedback.splitlines()) == 2
+
+
+def test_edits_recompute_only_the_changed_segments_and_the_trip(stub_service):
+    base = synthetic_request(segments=SEGMENTS)
+    edits = [base, edit_segment(base, 2), edit_total(edit_segment(base, 2))]
+
+    async def scenario():
+        overrides = {"segment_cache_enabled": True, "prevalidation_mode": "off", "single_flight_enabled": False}
+        async with stub_service(None, overrides, responder=responder(trip_valid=False)) as (service, stats):
+            responses = []
+            for request in edits:
+                client_data = TripValidatorRequest.model_validate(request).input_data
+                responses.append(await service.validate_itinerary(client_data))
+            return responses, stats.calls
+
+    responses, calls = asyncio.run(scenario())
+
+    assert calls == len(edits)
+    assert [(r.segment_reuse.reused, r.segment_reuse.recomputed) for r in responses] == [(0, 5), (2, 3), (5, 0)]
+    assert all(not response.output_data.is_valid for response in responses)
+    assert all(response.output_data.feedback.startswith("Trip: Over budget.") for response in responses)
@@ -0,0 +1,103 @@
+import asyncio
+import sqlite3
+import time
+
+from services.shared_state import SharedStateStore, SharedTokenBucket
+
+
+def test_bucket_level_is_read_without_blocking_the_event_loop(tmp_path):
+    store = SharedStateStore(str(tmp_path / "shared.sqlite3"))
+    bucket = SharedTokenBucket(store, "openai-primary", tokens_per_minute=6000, refresh_interval=0)
+    other_worker = SharedTokenBucket(store, "openai-primary", tokens_per_minute=6000)
+
+    async def scenario():
+        await other_worker.acquire(5000)
+        with store._lock:
+            # Another thread holds the store, as take_tokens does while SQLite waits on a busy database.
+            start = time.monotonic()
+            stale = bucket.tokens
+            elapsed = time.monotonic() - start
+        await asyncio.sleep(0.05)
+        return stale, elapsed, bucket.tokens
+
+    stale, elapsed, refreshed = asyncio.run(scenario())
+    store.close()
+
+    assert elapsed < 0.01
+    assert stale == 6000
+    assert 1000 <= refreshed < 1100
+
+
+def test_acquire_updates_the_level_seen_on_the_event_loop(tmp_path):
+    store = SharedStateStore(str(tmp_path / "shared.sqlite3"))
+    bucket = SharedTokenBucket(store, "openai-primary", tokens_per_minute=6000, refresh_interval=60)
+
+    async def scenario():
+        await bucket.acquire(4000)
+        return bucket.tokens, bucket.wait_time(3000)
+
+    level, wait = asyncio.run(scenario())
+    store.close()
+
+    assert 2000 <= level < 2010
+    assert 9.8 < wait <= 10
+
+
+def test_level_refills_locally_between_refreshes(tmp_path):
+    store = SharedStateStore(str(tmp_path / "shared.sqlite3"))
+    bucket = SharedTokenBucket(store, "openai-primary", tokens_per_minute=60000, refresh_interval=60)
+    other_worker = SharedTokenBucket(store, "openai-primary", tokens_per_minute=60000)
+
+    async def scenario():
+        await bucket.acquire(60000)
+        await other_worker.acquire(50)
+        await asyncio.sleep(0.2)
+        return bucket.tokens
+
+    level = asyncio.run(scenario())
+    store.close()
+
+    # Refilled at 1000 tokens a second, and the other worker's take is not seen until the next refresh.
+    assert 200 <= level < 1000
+
+
+def test_stale_level_is_refreshed_from_the_store(tmp_path):
+    store = SharedStateStore(str(tmp_path / "shared.sqlite3"))
+    bucket = SharedTokenBucket(store, "openai-primary", tokens_per_minute=6000, refresh_interval=0.1)
+    other_worker = SharedTokenBucket(store, "openai-primary", tokens_per_minute=6000)
+
+    async def scenario():
+        await bucket.acquire(1000)
+        await other_worker.acquire(3000)
+        fresh = bucket.tokens
+        await asyncio.sleep(0.15)
+        stale = bucket.tokens
+        await asyncio.sleep(0.05)
+        return fresh, stale, bucket.tokens
+
+    fresh, stale, refreshed = asyncio.run(scenario())
+    store.close()
+
+    assert 5000 <= fresh < 5010
+    assert 5000 <= stale < 5500
+    assert 2000 <= refreshed < 2500
+
+
+def test_failed_refresh_keeps_the_local_level(tmp_path, monkeypatch):
+    store = SharedStateStore(str(tmp_path / "shared.sqlite3"))
+    bucket = SharedTokenBucket(store, "openai-primary", tokens_per_minute=6000, refresh_interval=0)
+
+    def locked(*args):
+        raise sqlite3.OperationalError("database is locked")
+
+    async def scenario():
+        await bucket.acquire(3000)
+        monkeypatch.setattr(store, "peek_tokens", locked)
+        assert bucket.tokens >= 3000  # schedules a refresh, which fails
+        await asyncio.sleep(0.05)
+        return bucket.tokens
+
+    level = asyncio.run(scenario())
+    store.close()
+
+    assert 3000 <= level < 3010
@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from benchmarks.synthetic import synthetic_request
+from models.validator_models import TripValidatorRequest
+
+DUPLICATES = 20
+
+
+async def validate_duplicates(stub_service, cancel_leader: bool = False, **stub_options):
+    async with stub_service(**stub_options) as (service, stats):
+        client_data = TripValidatorRequest.model_validate(synthetic_request(segments=3)).input_data
+        tasks = [asyncio.create_task(service.validate_itinerary(client_data)) for _ in range(DUPLICATES)]
+        await asyncio.sleep(0.05)
+        if cancel_leader:
+            tasks[0].cancel()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+    return results, stats.calls, service.stats()["single_flight"]
+
+
+def test_duplicates_cost_one_upstream_call(stub_service):
+    results, calls, single_flight = asyncio.run(validate_duplicates(stub_service, latency=0.1))
+
+    assert calls == 1
+    assert single_flight == {"leaders": 1, "coalesced": DUPLICATES - 1, "in_flight": 0}
+    assert all(result.output_data.is_valid for result in results)
+
+
+def test_cancelling_the_leader_still_resolves_the_others(stub_service):
+    results, calls, _ = asyncio.run(validate_duplicates(stub_service, cancel_leader=True, latency=0.1))
+
+    assert calls == 1
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert all(result.output_data.is_valid for result in results[1:])
+
+
+@pytest.mark.parametrize("status", [400, 503])
+def test_upstream_error_reaches_every_waiter(stub_service, status):
+    results, _, single_flight = asyncio.run(
+        validate_duplicates(stub_service, latency=0.1, failure_rate=1.0, failure_status=status)
+    )
+
+    assert single_flight["leaders"] == 1
+    assert all(isinstance(result, HTTPException) and result.status_code == status for result in results)
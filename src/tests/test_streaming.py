@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+import pytest
+
+from benchmarks.synthetic import synthetic_request
+from models.validator_models import OptimizationSuggestion, TripValidatorRequest
+from parsers.stream_parsers import IncrementalOutputParser
+
+ANSWER = {
+    "is_valid": True,
+    "validation_score": 0.8,
+    "feedback": "Leave earlier to avoid traffic.",
+    "optimization_suggestions": [
+        {"original_segment": 1, "suggested_segment": 1, "reason": "Leave earlier.", "estimated_improvement": 10.0},
+        {"original_segment": 9, "suggested_segment": 1, "reason": "Out of range.", "estimated_improvement": 5.0},
+    ],
+}
+
+
+async def stream_events(stub_service, **stub_options):
+    async with stub_service(**stub_options) as (service, _):
+        client_data = TripValidatorRequest.model_validate(synthetic_request(segments=3)).input_data
+        return client_data, [event async for event in service.validate_itinerary_stream(client_data)]
+
+
+def test_streamed_suggestions_match_the_final_result(stub_service):
+    client_data, events = asyncio.run(stream_events(stub_service, output=ANSWER, chunk_size=8))
+
+    suggestions = [event.suggestion for event in events if event.event == "suggestion"]
+    result = events[-1].response.output_data
+
+    assert len(suggestions) == 1
+    assert isinstance(suggestions[0], OptimizationSuggestion)
+    assert suggestions[0].original_segment == client_data.itinerary.segments[1]
+    assert suggestions == result.optimization_suggestions
+
+
+def feed(parser: IncrementalOutputParser, text: str, chunk_size: int) -> list:
+    events = []
+    for start in range(0, len(text), chunk_size):
+        events += parser.feed(text[start : start + chunk_size])
+    return events
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000])
+def test_parser_emits_values_whatever_the_chunking(chunk_size):
+    parser = IncrementalOutputParser()
+
+    events = feed(parser, "```json\n" + json.dumps(ANSWER) + "\n```", chunk_size)
+
+    assert events == [
+        ("feedback", ANSWER["feedback"]),
+        *(("suggestion", suggestion) for suggestion in ANSWER["optimization_suggestions"]),
+    ]
+    assert parser.done
+
+
+def test_parser_skips_a_malformed_suggestion():
+    answer = json.dumps(ANSWER).replace('"estimated_improvement": 10.0}', '"estimated_improvement": 10.0,}')
+    parser = IncrementalOutputParser()
+
+    events = feed(parser, answer, 5)
+
+    assert events == [("feedback", ANSWER["feedback"]), ("suggestion", ANSWER["optimization_suggestions"][1])]
+    assert parser.done
+
+
+def test_parser_keeps_only_the_value_being_read():
+    parser = IncrementalOutputParser()
+    answer = json.dumps({**ANSWER, "feedback": "x" * 10000})
+    middle_of_first_suggestion = answer.index('"reason"')
+
+    events = feed(parser, answer[:middle_of_first_suggestion], 100)
+
+    assert [kind for kind, _ in events] == ["feedback"]
+    assert parser._buffer == answer[answer.index('{"original_segment"') : middle_of_first_suggestion]
@@ -0,0 +1,203 @@
+import asyncio
+import time
+from typing import Optional
+
+import pytest
+from fastapi import HTTPException
+
+from benchmarks.synthetic import synthetic_request
+from models.validator_models import TripValidatorRequest
+from services.upstream_policy import CircuitBreaker, UpstreamPolicy
+
+PAYLOAD = {"model": "stub", "messages": [{"role": "user", "content": "ping"}]}
+
+
+def policy(
+    max_attempts: int = 3,
+    attempt_timeout: float = 5.0,
+    total_timeout: float = 10.0,
+    breaker: Optional[CircuitBreaker] = None,
+) -> UpstreamPolicy:
+    return UpstreamPolicy(
+        max_attempts=max_attempts,
+        attempt_timeout=attempt_timeout,
+        total_timeout=total_timeout,
+        backoff_base=5.0,
+        backoff_max=10.0,
+        breaker=breaker,
+    )
+
+
+async def with_stub(stub_service, upstream_policy: UpstreamPolicy, scenario, overrides=None, **stub_options):
+    """Runs ``scenario(service)`` against a fault-injecting stub; returns its result and the stub's call count."""
+    async with stub_service(upstream_policy, overrides, **stub_options) as (service, stats):
+        return await scenario(service), stats.calls
+
+
+async def outcome(call):
+    try:
+        return await call
+    except HTTPException as e:
+        return e.status_code
+
+
+def client_data():
+    return TripValidatorRequest.model_validate(synthetic_request(segments=3)).input_data
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_retries_honour_retry_after(stub_service, status):
+    upstream_policy = policy()
+
+    async def scenario(service):
+        start = time.monotonic()
+        await service._ai_request_validation(PAYLOAD)
+        return time.monotonic() - start
+
+    elapsed, calls = asyncio.run(
+        with_stub(stub_service, upstream_policy, scenario, fail_first=2, failure_status=status, retry_after=0.05)
+    )
+
+    assert calls == 3
+    assert upstream_policy.stats.retries == 2
+    # Backoff without Retry-After would be drawn from up to 5s and 10s.
+    assert 0.1 <= elapsed < 1.0
+
+
+def test_total_deadline_gives_504(stub_service):
+    upstream_policy = policy(attempt_timeout=0.2, total_timeout=0.3)
+
+    async def scenario(service):
+        start = time.monotonic()
+        status = await outcome(service._ai_request_validation(PAYLOAD))
+        return status, time.monotonic() - start
+
+    (status, elapsed), _ = asyncio.run(with_stub(stub_service, upstream_policy, scenario, latency=1.0))
+
+    assert status == 504
+    assert elapsed < 0.6
+    assert upstream_policy.stats.deadline_exceeded == 1
+
+
+def test_breaker_opens_probes_and_closes(stub_service):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+
+    async def scenario(service):
+        states = []
+        for _ in range(3):
+            states.append((await outcome(service._ai_request_validation(PAYLOAD)), breaker.state))
+        await asyncio.sleep(0.15)
+        await service._ai_request_validation(PAYLOAD)
+        states.append((200, breaker.state))
+        return states
+
+    states, calls = asyncio.run(
+        with_stub(stub_service, policy(max_attempts=1, breaker=breaker), scenario, fail_first=2)
+    )
+
+    assert states == [(503, "closed"), (503, "open"), (503, "open"), (200, "closed")]
+    assert calls == 3
+
+
+async def open_breaker(breaker: CircuitBreaker) -> None:
+    breaker.record_failure()
+    await asyncio.sleep(breaker.reset_timeout + 0.05)
+
+
+def test_cancelled_probe_is_released():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    upstream_policy = policy(breaker=breaker)
+
+    async def scenario():
+        await open_breaker(breaker)
+        probe = asyncio.ensure_future(upstream_policy.call(lambda: asyncio.sleep(10, "late")))
+        await asyncio.sleep(0.05)
+        probe.cancel()
+        await asyncio.gather(probe, return_exceptions=True)
+        return await upstream_policy.call(lambda: asyncio.sleep(0, "ok"))
+
+    assert asyncio.run(scenario()) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_timed_out_probe_reopens_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    upstream_policy = policy(max_attempts=1, attempt_timeout=0.05, breaker=breaker)
+
+    async def scenario():
+        await open_breaker(breaker)
+        status = await outcome(upstream_policy.call(lambda: asyncio.sleep(10, "late")))
+        state = breaker.state
+        await asyncio.sleep(0.1)
+        return status, state, breaker.allow()
+
+    assert asyncio.run(scenario()) == (504, "open", True)
+
+
+async def rejected() -> str:
+    raise HTTPException(status_code=400)
+
+
+async def collect(stream):
+    return [event async for event in stream]
+
+
+def test_probe_with_non_retryable_error_closes_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    upstream_policy = policy(breaker=breaker)
+
+    async def scenario():
+        await open_breaker(breaker)
+        return await outcome(upstream_policy.call(rejected))
+
+    assert asyncio.run(scenario()) == 400
+    assert breaker.state == "closed"
+
+
+def test_stream_with_non_retryable_error_settles_the_probe(stub_service):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+
+    async def scenario(service):
+        await open_breaker(breaker)
+        stream_status = await outcome(collect(service.validate_itinerary_stream(client_data())))
+        return stream_status, await outcome(service._ai_request_validation(PAYLOAD))
+
+    (stream_status, result), calls = asyncio.run(
+        with_stub(stub_service, policy(max_attempts=1, breaker=breaker), scenario, fail_first=1, failure_status=400)
+    )
+
+    assert stream_status == 400
+    assert isinstance(result, str)
+    assert calls == 2
+    assert breaker.state == "closed"
+
+
+def test_abandoned_stream_releases_the_probe(stub_service):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+
+    async def scenario(service):
+        await open_breaker(breaker)
+        task = asyncio.ensure_future(service.validate_itinerary_stream(client_data()).__anext__())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return breaker.allow()
+
+    allowed, _ = asyncio.run(with_stub(stub_service, policy(breaker=breaker), scenario, latency=1.0))
+
+    assert allowed
+
+
+def test_stream_falls_back_to_local_only_while_the_circuit_is_open(stub_service):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+
+    async def scenario(service):
+        breaker.record_failure()
+        return await collect(service.validate_itinerary_stream(client_data()))
+
+    overrides = {"circuit_breaker_fallback": "local-only"}
+    events, calls = asyncio.run(with_stub(stub_service, policy(breaker=breaker), scenario, overrides))
+
+    assert calls == 0
+    assert [event.event for event in events] == ["result"]
+    assert events[0].response.output_data.is_valid